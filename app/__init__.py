@@ -1,8 +1,7 @@
 # app/__init__.py
 from flask import Flask
-from flask import redirect, request, url_for
 from config import Config
-from .extensions import db, mail, login, migrate # <--- 1. Importamos desde extensions
+from .extensions import db, mail, login, migrate, cache # <--- 1. Importamos desde extensions
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -13,6 +12,7 @@ def create_app(config_class=Config):
     mail.init_app(app)
     login.init_app(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
 
     # Configuración de Login
     login.login_view = 'auth.login'
@@ -30,20 +30,56 @@ def create_app(config_class=Config):
     from .projects.routes import bp as projects_bp
     from .blog import bp as blog_bp
     from .auth.routes import bp as auth_bp
+    from .api import bp as api_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(projects_bp, url_prefix='/projects')
     app.register_blueprint(blog_bp, url_prefix='/blog')
     app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(api_bp, url_prefix='/api/v1')
 
-    @app.get('/proyectos')
-    @app.get('/proyectos/')
-    def legacy_projects_root():
-        return redirect(url_for('projects.projects_home'), code=301)
+    # Índice de tags para el autocompletado del editor
+    from .tags import tag_index
+    tag_index.max_age = app.config.get('TAG_INDEX_MAX_AGE', 60)
 
-    @app.get('/proyectos/<path:subpath>')
-    def legacy_projects(subpath: str):
-        query = f"?{request.query_string.decode()}" if request.query_string else ""
-        return redirect(f"/projects/{subpath}{query}", code=301)
+    # Instrumentación por petición (Server-Timing y log de lentitud)
+    from . import timing
+    timing.init_app(app)
+
+    # Métricas Prometheus en /metrics (solo admins o peticiones locales)
+    from . import metrics
+    metrics.init_app(app)
+
+    # Contadores de visitas en buffer (volcado por lotes, fuera del camino de lectura)
+    from . import pageviews
+    pageviews.init_app(app)
+
+    # Snapshots de las páginas públicas (stale-if-error cuando la BD no responde)
+    from . import snapshots
+    snapshots.init_app(app)
+
+    # Cabeceras Link: rel=preload (y 103 Early Hints si el servidor lo soporta) para CSS y fuentes
+    from . import assets
+    assets.init_app(app)
+
+    # Versiones del contenido (claves de fragmentos y sitemap), recalculadas solo tras escrituras
+    from . import versions
+    versions.init_app(app)
+
+    # Caché de fragmentos de plantilla: {% cache clave, ttl %} ... {% endcache %}
+    from . import fragments
+    fragments.init_app(app)
+
+    # Presupuesto de consultas por vista y detector de N+1 (debug/testing)
+    from . import query_budget
+    query_budget.init_app(app)
+
+    # Perfilador por muestreo bajo demanda para admins (?_profile=1, ?_profile_window=60)
+    from . import profiler
+    profiler.init_app(app)
+
+    # Redirecciones (tabla `redirects`), resueltas antes del routing
+    from . import redirects
+    redirects.init_app(app)
 
     return app
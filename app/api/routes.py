@@ -0,0 +1,299 @@
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+
+from flask import Response, abort, jsonify, request, url_for
+from sqlalchemy import and_, func, or_, select
+from werkzeug.exceptions import HTTPException
+
+from app.extensions import db
+from app.models import BlogPost, BlogTag, Project, ProjectCode, ProjectImage, post_tags
+from . import bp
+
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Campo público -> columna. La proyección de `fields=` decide qué columnas entran en el SELECT,
+# así que `content` o `code_snippet` solo se leen si se piden.
+POST_COLUMNS = {
+    "id": BlogPost.id,
+    "slug": BlogPost.slug,
+    "title": BlogPost.title,
+    "excerpt": BlogPost.excerpt,
+    "content": BlogPost.content,
+    "cover_image_path": BlogPost.cover_image_path,
+    "meta_title": BlogPost.meta_title,
+    "meta_description": BlogPost.meta_description,
+    "published_at": BlogPost.published_at,
+    "created_at": BlogPost.created_at,
+    "updated_at": BlogPost.updated_at,
+}
+POST_DEFAULT = ["id", "slug", "title", "excerpt", "cover_image_path", "published_at", "updated_at", "tags"]
+
+PROJECT_COLUMNS = {
+    "id": Project.id,
+    "slug": Project.slug,
+    "title": Project.title,
+    "description": Project.description,
+    "long_description": Project.long_description,
+    "technologies": Project.technologies,
+    "github_url": Project.github_url,
+    "website_url": Project.website_url,
+    "category_slug": Project.category_slug,
+    "created_at": Project.created_at,
+}
+PROJECT_DEFAULT = ["id", "slug", "title", "description", "technologies", "category_slug", "created_at", "images"]
+
+IMAGE_COLUMNS = {"id": ProjectImage.id, "image_path": ProjectImage.image_path, "caption": ProjectImage.caption}
+CODE_COLUMNS = {
+    "id": ProjectCode.id,
+    "file_name": ProjectCode.file_name,
+    "language": ProjectCode.language,
+    "code_snippet": ProjectCode.code_snippet,
+}
+CODE_DEFAULT = ["id", "file_name", "language"]
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@bp.errorhandler(ApiError)
+def _api_error(e):
+    return jsonify({"error": e.message}), e.status
+
+
+@bp.errorhandler(HTTPException)
+def _http_error(e):
+    return jsonify({"error": e.description}), e.code
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _json_response(payload):
+    body = json.dumps(payload, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    response = Response(body, mimetype="application/json")
+    response.set_etag(hashlib.sha1(body).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = 60
+    return response.make_conditional(request)
+
+
+def _parse_fields(columns: dict, default, relations=()):
+    """`fields=a,b,images,code.code_snippet` -> (columnas, relaciones pedidas, subcampos por relación)."""
+    raw = (request.args.get("fields") or "").strip()
+    names = [f.strip() for f in raw.split(",") if f.strip()] if raw else list(default)
+    fields, wanted, subfields = [], [], {}
+    for name in names:
+        base, _, sub = name.partition(".")
+        if base in relations:
+            if base not in wanted:
+                wanted.append(base)
+            if sub:
+                subfields.setdefault(base, []).append(sub)
+        elif name in columns:
+            if name not in fields:
+                fields.append(name)
+        else:
+            valid = ", ".join(sorted(set(columns) | set(relations)))
+            raise ApiError(f"Unknown field '{name}'. Valid fields: {valid}.")
+    return fields, wanted, subfields
+
+
+def _limit() -> int:
+    try:
+        limit = int(request.args.get("limit") or DEFAULT_LIMIT)
+    except ValueError:
+        raise ApiError("limit must be an integer.")
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def _encode_cursor(values) -> str:
+    raw = json.dumps(values, default=_json_default, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(size: int):
+    cursor = request.args.get("cursor")
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError
+        return values
+    except ValueError:
+        raise ApiError("Invalid cursor.")
+
+
+def _select(columns: dict, fields, required):
+    """Columnas pedidas + las que hacen falta para paginar/unir, sin duplicados."""
+    names = list(dict.fromkeys(list(required) + list(fields)))
+    return select(*(columns[n].label(n) for n in names))
+
+
+def _fetch(stmt, limit: int = None):
+    """Filas como mappings; con `limit`, pide una de más para saber si hay página siguiente."""
+    if limit is None:
+        return db.session.execute(stmt).mappings().all(), False
+    rows = db.session.execute(stmt.limit(limit + 1)).mappings().all()
+    return rows[:limit], len(rows) > limit
+
+
+def _items(rows, fields):
+    return [{name: row[name] for name in fields} for row in rows]
+
+
+def _attach_tags(items, ids):
+    tags = {}
+    if ids:
+        for post_id, name, slug in db.session.execute(
+            select(post_tags.c.post_id, BlogTag.name, BlogTag.slug)
+            .join(BlogTag, BlogTag.id == post_tags.c.tag_id)
+            .where(post_tags.c.post_id.in_(ids))
+            .order_by(BlogTag.name)
+        ):
+            tags.setdefault(post_id, []).append({"name": name, "slug": slug})
+    for item, post_id in zip(items, ids):
+        item["tags"] = tags.get(post_id, [])
+
+
+def _attach_children(items, ids, key, model, columns, subfields, default):
+    fields = subfields or default
+    for name in fields:
+        if name not in columns:
+            raise ApiError(f"Unknown field '{key}.{name}'. Valid fields: {', '.join(sorted(columns))}.")
+    children = {}
+    if ids:
+        stmt = _select(columns, fields, []).add_columns(model.project_id.label("_parent"))
+        for row in db.session.execute(stmt.where(model.project_id.in_(ids)).order_by(model.id)).mappings():
+            child = {name: row[name] for name in fields}
+            if key == "images" and "image_path" in child:
+                child["url"] = url_for("static", filename=f"uploads/{child['image_path']}", _external=True)
+            children.setdefault(row["_parent"], []).append(child)
+    for item, project_id in zip(items, ids):
+        item[key] = children.get(project_id, [])
+
+
+def _published_posts():
+    return BlogPost.is_published.is_(True)
+
+
+def _serialize_posts(rows, fields, wanted):
+    items = _items(rows, fields)
+    if "tags" in wanted:
+        _attach_tags(items, [row["id"] for row in rows])
+    return items
+
+
+@bp.route("/posts")
+def posts():
+    fields, wanted, _ = _parse_fields(POST_COLUMNS, POST_DEFAULT, relations=("tags",))
+    limit = _limit()
+    stmt = _select(POST_COLUMNS, fields, ["id"]).where(_published_posts())
+
+    tag = (request.args.get("tag") or "").strip()
+    if tag:
+        stmt = stmt.where(
+            BlogPost.id.in_(
+                select(post_tags.c.post_id).join(BlogTag, BlogTag.id == post_tags.c.tag_id).where(BlogTag.slug == tag)
+            )
+        )
+
+    # Los posts importados pueden no tener published_at: se ordena y pagina por la fecha que
+    # muestra la web (published_at o, si falta, created_at), que nunca es NULL.
+    sort_at = func.coalesce(BlogPost.published_at, BlogPost.created_at)
+    stmt = stmt.add_columns(sort_at.label("_sort_at"))
+    cursor = _decode_cursor(2)
+    if cursor:
+        try:
+            cursor_at, post_id = datetime.fromisoformat(cursor[0]), int(cursor[1])
+        except (TypeError, ValueError):
+            raise ApiError("Invalid cursor.")
+        stmt = stmt.where(or_(sort_at < cursor_at, and_(sort_at == cursor_at, BlogPost.id < post_id)))
+    rows, more = _fetch(stmt.order_by(sort_at.desc(), BlogPost.id.desc()), limit)
+
+    items = _serialize_posts(rows, fields, wanted)
+    next_cursor = _encode_cursor([rows[-1]["_sort_at"], rows[-1]["id"]]) if more else None
+    return _json_response({"data": items, "next_cursor": next_cursor})
+
+
+@bp.route("/posts/<slug>")
+def post(slug):
+    fields, wanted, _ = _parse_fields(POST_COLUMNS, list(POST_DEFAULT) + ["content"], relations=("tags",))
+    stmt = _select(POST_COLUMNS, fields, ["id"]).where(_published_posts(), BlogPost.slug == slug)
+    rows, _ = _fetch(stmt)
+    if not rows:
+        abort(404, description="Post not found.")
+    return _json_response({"data": _serialize_posts(rows, fields, wanted)[0]})
+
+
+@bp.route("/tags")
+def tags():
+    limit = _limit()
+    published_count = func.count(BlogPost.id)
+    stmt = (
+        select(BlogTag.id, BlogTag.name, BlogTag.slug, published_count.label("count"))
+        .outerjoin(post_tags, post_tags.c.tag_id == BlogTag.id)
+        .outerjoin(BlogPost, and_(BlogPost.id == post_tags.c.post_id, _published_posts()))
+        .group_by(BlogTag.id, BlogTag.name, BlogTag.slug)
+    )
+    cursor = _decode_cursor(1)
+    if cursor:
+        stmt = stmt.where(BlogTag.slug > str(cursor[0]))
+    rows, more = _fetch(stmt.order_by(BlogTag.slug), limit)
+    next_cursor = _encode_cursor([rows[-1]["slug"]]) if more else None
+    return _json_response({"data": _items(rows, ["id", "name", "slug", "count"]), "next_cursor": next_cursor})
+
+
+def _serialize_projects(rows, fields, wanted, subfields, code_default):
+    items = _items(rows, fields)
+    ids = [row["id"] for row in rows]
+    if "images" in wanted:
+        _attach_children(items, ids, "images", ProjectImage, IMAGE_COLUMNS, subfields.get("images"), list(IMAGE_COLUMNS))
+    if "code" in wanted:
+        _attach_children(items, ids, "code", ProjectCode, CODE_COLUMNS, subfields.get("code"), code_default)
+    return items
+
+
+@bp.route("/projects")
+def projects():
+    fields, wanted, subfields = _parse_fields(PROJECT_COLUMNS, PROJECT_DEFAULT, relations=("images", "code"))
+    limit = _limit()
+    stmt = _select(PROJECT_COLUMNS, fields, ["id"])
+
+    category = (request.args.get("category") or "").strip()
+    if category:
+        stmt = stmt.where(Project.category_slug == category)
+
+    cursor = _decode_cursor(1)
+    if cursor:
+        try:
+            stmt = stmt.where(Project.id < int(cursor[0]))
+        except (TypeError, ValueError):
+            raise ApiError("Invalid cursor.")
+    rows, more = _fetch(stmt.order_by(Project.id.desc()), limit)
+
+    items = _serialize_projects(rows, fields, wanted, subfields, CODE_DEFAULT)
+    next_cursor = _encode_cursor([rows[-1]["id"]]) if more else None
+    return _json_response({"data": items, "next_cursor": next_cursor})
+
+
+@bp.route("/projects/<int:project_id>")
+def project(project_id):
+    default = list(PROJECT_DEFAULT) + ["long_description", "github_url", "website_url", "code"]
+    fields, wanted, subfields = _parse_fields(PROJECT_COLUMNS, default, relations=("images", "code"))
+    stmt = _select(PROJECT_COLUMNS, fields, ["id"]).where(Project.id == project_id)
+    rows, _ = _fetch(stmt)
+    if not rows:
+        abort(404, description="Project not found.")
+    return _json_response({"data": _serialize_projects(rows, fields, wanted, subfields, list(CODE_COLUMNS))[0]})
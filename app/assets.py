@@ -0,0 +1,335 @@
+import os
+import re
+
+from flask import current_app, g, request, url_for
+from flask.signals import before_render_template
+from markupsafe import Markup
+
+
+# Subconjunto de bootstrap-icons servido desde app/static (ver `python manage.py build_icons`).
+ICONS_DIR = "vendor/bootstrap-icons"
+ICONS_CSS = f"{ICONS_DIR}/bootstrap-icons.css"
+ICONS_FONT = f"{ICONS_DIR}/bootstrap-icons.woff2"
+
+# Recursos que bloquean el primer render: se anuncian con Link: rel=preload (y 103 si el servidor lo permite).
+CRITICAL_STYLES = ["css/output.css", "css/theme.css", ICONS_CSS]
+CRITICAL_FONTS = [ICONS_FONT]
+
+# CSS crítico por plantilla (ver `python manage.py build_critical_css`).
+FULL_STYLESHEET = "css/output.css"
+CRITICAL_DIR = "css/critical"
+# Caracteres del bloque `content` de cada plantilla que se consideran "above the fold".
+CRITICAL_FOLD_CHARS = 4000
+
+_ICON_CLASS_RE = re.compile(r"\bbi-([a-z0-9]+(?:-[a-z0-9]+)*)")
+_ICON_RULE_RE = re.compile(r'\.bi-([a-z0-9-]+)::?before\s*\{\s*content:\s*"\\([0-9a-fA-F]+)"\s*;?\s*\}')
+_BASE_RULE_RE = re.compile(r"(\.bi::before\s*,[^{]*\{[^}]*\})")
+
+
+def used_icons(directories):
+    """Nombres de icono (`code-slash`, `linkedin`, ...) que aparecen en las plantillas."""
+    names = set()
+    for directory in directories:
+        for root, _dirs, files in os.walk(directory):
+            for name in files:
+                if not name.endswith((".html", ".js")):
+                    continue
+                with open(os.path.join(root, name), encoding="utf-8") as fh:
+                    names.update(_ICON_CLASS_RE.findall(fh.read()))
+    return names
+
+
+def build_icon_subset(source_dir: str, static_folder: str, template_dirs) -> dict:
+    """Genera el CSS y la fuente woff2 solo con los glifos que usan las plantillas.
+
+    `source_dir` es la carpeta `font/` de una distribución de bootstrap-icons
+    (bootstrap-icons.css + fonts/bootstrap-icons.woff2). Necesita fonttools y brotli.
+    """
+    from fontTools import subset
+
+    css_path = os.path.join(source_dir, "bootstrap-icons.css")
+    if not os.path.exists(css_path):
+        css_path = os.path.join(source_dir, "bootstrap-icons.min.css")
+    with open(css_path, encoding="utf-8") as fh:
+        source_css = fh.read()
+    codepoints = {name: int(code, 16) for name, code in _ICON_RULE_RE.findall(source_css)}
+    base_rule = _BASE_RULE_RE.search(source_css)
+    if not codepoints or base_rule is None:
+        raise ValueError(f"{css_path} does not look like a bootstrap-icons stylesheet")
+
+    wanted = used_icons(template_dirs)
+    found = sorted(name for name in wanted if name in codepoints)
+    unknown = sorted(wanted - set(codepoints))
+
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = []
+    options.notdef_outline = True
+    options.name_IDs = ["*"]
+    font = subset.load_font(os.path.join(source_dir, "fonts", "bootstrap-icons.woff2"), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=[codepoints[name] for name in found])
+    subsetter.subset(font)
+
+    target_dir = os.path.join(static_folder, *ICONS_DIR.split("/"))
+    os.makedirs(target_dir, exist_ok=True)
+    font_path = os.path.join(static_folder, *ICONS_FONT.split("/"))
+    subset.save_font(font, font_path, options)
+
+    rules = [
+        "/* Bootstrap Icons (MIT, https://icons.getbootstrap.com/) - subset generado por `python manage.py build_icons` */",
+        # Misma URL que el preload de la cabecera Link: con un ?hash el navegador la descargaría dos veces.
+        '@font-face{font-display:block;font-family:bootstrap-icons;src:url("bootstrap-icons.woff2") format("woff2")}',
+        base_rule.group(1),
+    ]
+    rules += [f'.bi-{name}::before{{content:"\\{codepoints[name]:x}"}}' for name in found]
+    with open(os.path.join(static_folder, *ICONS_CSS.split("/")), "w", encoding="utf-8") as fh:
+        fh.write("\n".join(rules) + "\n")
+
+    return {"icons": len(found), "unknown": unknown, "font_bytes": os.path.getsize(font_path)}
+
+
+def preload_links():
+    # Con el CSS crítico en línea, output.css ya no bloquea el render: no compite con el resto por ancho de banda.
+    styles = [path for path in CRITICAL_STYLES if not (path == FULL_STYLESHEET and g.get("critical_css_inlined"))]
+    links = [f"<{url_for('static', filename=path)}>; rel=preload; as=style" for path in styles]
+    links += [
+        f"<{url_for('static', filename=path)}>; rel=preload; as=font; type=\"font/woff2\"; crossorigin"
+        for path in CRITICAL_FONTS
+    ]
+    return ", ".join(links)
+
+
+_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_SELECTOR_CLASS_RE = re.compile(r"\.((?:\\.|[A-Za-z0-9_-])+)")
+_UNESCAPE_RE = re.compile(r"\\(.)")
+_TOKEN_SPLIT_RE = re.compile(r"[\s\"'`<>{}=|~]+")
+_KEYFRAMES_RE = re.compile(r"@keyframes\s+([A-Za-z0-9_-]+)")
+_VAR_RE = re.compile(r"var\((--[A-Za-z0-9_-]+)")
+_INCLUDE_RE = re.compile(r"{%-?\s*include\s+[\"']([^\"']+)[\"']")
+
+
+def split_blocks(css: str):
+    """Parte una hoja de estilos en sentencias de primer nivel: (prelude, cuerpo o None)."""
+    css = _COMMENT_RE.sub("", css)
+    blocks, depth, start, prelude, quote = [], 0, 0, None, None
+    for i, ch in enumerate(css):
+        if quote:
+            if ch == quote and css[i - 1] != "\\":
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch == "{":
+            if depth == 0:
+                prelude, start = css[start:i].strip(), i + 1
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude, css[start:i]))
+                start = i + 1
+        elif ch == ";" and depth == 0:
+            blocks.append((css[start:i].strip(), None))
+            start = i + 1
+    return blocks
+
+
+def _minify(css: str) -> str:
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};,>])\s*", r"\1", css).replace(";}", "}").strip()
+
+
+def _selector_classes(selector: str):
+    return {_UNESCAPE_RE.sub(r"\1", name) for name in _SELECTOR_CLASS_RE.findall(selector)}
+
+
+def stylesheet_classes(css: str):
+    """Todas las clases que define una capa `utilities`/`components` de la hoja compilada."""
+    names = set()
+    for prelude, body in split_blocks(css):
+        if body is not None and prelude in ("@layer utilities", "@layer components"):
+            for selector, _rule in split_blocks(body):
+                names |= _selector_classes(selector)
+    return names
+
+
+def _used_theme(body: str, used: set) -> str:
+    """Solo las variables de `@layer theme` que se usan, siguiendo las que dependen de otras."""
+    rules = []
+    for selector, decls in split_blocks(body):
+        pairs = [d.strip().split(":", 1) for d in decls.split(";") if ":" in d]
+        kept, changed = {}, True
+        while changed:
+            changed = False
+            for name, value in pairs:
+                name = name.strip()
+                if name not in kept and name in used:
+                    kept[name] = value.strip()
+                    used |= set(_VAR_RE.findall(value))
+                    changed = True
+        if kept:
+            rules.append(selector + "{" + ";".join(f"{n}:{v}" for n, v in kept.items()) + "}")
+    return "".join(rules)
+
+
+def _used_fallbacks(body: str, used_text: str) -> str:
+    """`@layer properties` (valores iniciales para navegadores sin @property), solo con las variables usadas."""
+    blocks = []
+    for condition, inner in split_blocks(body):
+        rules = []
+        for selector, decls in split_blocks(inner):
+            kept = [d.strip() for d in decls.split(";") if ":" in d and d.split(":", 1)[0].strip() in used_text]
+            if kept:
+                rules.append(selector + "{" + ";".join(kept) + "}")
+        if rules:
+            blocks.append(condition + "{" + "".join(rules) + "}")
+    return "".join(blocks)
+
+
+def extract_critical(css: str, classes) -> str:
+    """Reglas de `css` (salida de Tailwind v4) necesarias para pintar elementos con `classes`.
+
+    De utilities/components quedan las reglas cuyo selector usa alguna de las clases; de
+    theme, @property, @keyframes y el fallback de `@layer properties` solo lo que esas reglas
+    (o el preflight) referencian. Las declaraciones de capas y base se copian enteras.
+    """
+    classes = set(classes)
+    out, theme, fallbacks, properties, keyframes = [], [], [], {}, {}
+    for prelude, body in split_blocks(css):
+        if body is None:
+            out.append(prelude + ";")
+        elif prelude in ("@layer utilities", "@layer components"):
+            rules = [f"{sel}{{{rule}}}" for sel, rule in split_blocks(body) if _selector_classes(sel) & classes]
+            if rules:
+                out.append(f"{prelude}{{{''.join(rules)}}}")
+        elif prelude == "@layer theme":
+            theme.append((len(out), body))
+            out.append("")
+        elif prelude == "@layer properties":
+            fallbacks.append((len(out), body))
+            out.append("")
+        elif prelude.startswith("@property"):
+            properties[prelude.split()[1]] = f"{prelude}{{{body}}}"
+        elif prelude.startswith("@keyframes"):
+            keyframes[_KEYFRAMES_RE.match(prelude).group(1)] = f"{prelude}{{{body}}}"
+        else:
+            out.append(f"{prelude}{{{body}}}")
+    used_text = "".join(out)
+    used_vars = set(_VAR_RE.findall(used_text))
+    for index, body in theme:
+        out[index] = f"@layer theme{{{_used_theme(body, used_vars)}}}"
+    for index, body in fallbacks:
+        out[index] = f"@layer properties{{{_used_fallbacks(body, used_text)}}}"
+    out += [rule for name, rule in properties.items() if name in used_text]
+    used_text = "".join(out)
+    out += [rule for name, rule in keyframes.items() if re.search(rf"(?<![\w-]){re.escape(name)}(?![\w-])", used_text)]
+    return _minify("".join(out))
+
+
+def _template_source(template_dirs, name: str):
+    for directory in template_dirs:
+        path = os.path.join(directory, *name.split("/"))
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                return fh.read()
+    return None
+
+
+def _with_includes(template_dirs, source: str, seen=None) -> str:
+    seen = seen if seen is not None else set()
+    parts = [source]
+    for name in _INCLUDE_RE.findall(source):
+        if name not in seen:
+            seen.add(name)
+            parts.append(_with_includes(template_dirs, _template_source(template_dirs, name) or "", seen))
+    return "\n".join(parts)
+
+
+def above_the_fold(template_dirs, name: str, fold_chars: int = CRITICAL_FOLD_CHARS) -> str:
+    """Fuente que se pinta en el primer viewport: base.html hasta el contenido y el inicio del bloque `content`."""
+    base = _template_source(template_dirs, "base.html")
+    source = _template_source(template_dirs, name) or ""
+    head, _sep, _rest = base.partition("{% block content %}")
+    _before, _sep, content = source.partition("{% block content %}")
+    content = content.split("{% endblock %}")[-2] if "{% endblock %}" in content else content
+    return _with_includes(template_dirs, head + "\n" + content[:fold_chars])
+
+
+def page_templates(template_dirs):
+    """Plantillas que extienden base.html, con su ruta relativa ("blog/post_detail.html")."""
+    names = []
+    for directory in template_dirs:
+        for root, _dirs, files in os.walk(directory):
+            for file_name in files:
+                if not file_name.endswith(".html"):
+                    continue
+                name = os.path.relpath(os.path.join(root, file_name), directory).replace(os.sep, "/")
+                if re.search(r"{%\s*extends\s+[\"']base\.html[\"']", _template_source([directory], name)):
+                    names.append(name)
+    return sorted(set(names))
+
+
+def critical_css_path(static_folder: str, template_name: str) -> str:
+    return os.path.join(static_folder, *CRITICAL_DIR.split("/"), *template_name[: -len(".html")].split("/")) + ".css"
+
+
+def build_critical_css(static_folder: str, template_dirs, fold_chars: int = CRITICAL_FOLD_CHARS) -> list:
+    """Escribe css/critical/<plantilla>.css para cada página. Devuelve [(plantilla, bytes críticos, bytes totales)]."""
+    with open(os.path.join(static_folder, *FULL_STYLESHEET.split("/")), encoding="utf-8") as fh:
+        full_css = fh.read()
+    known = stylesheet_classes(full_css)
+    results = []
+    for name in page_templates(template_dirs):
+        tokens = set(_TOKEN_SPLIT_RE.split(above_the_fold(template_dirs, name, fold_chars)))
+        critical = extract_critical(full_css, tokens & known)
+        path = critical_css_path(static_folder, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(critical)
+        results.append((name, len(critical.encode("utf-8")), len(full_css.encode("utf-8"))))
+    return results
+
+
+_critical_cache = {}
+
+
+def critical_css(template_name):
+    """CSS crítico de la plantilla como Markup, o None si no hay (la página carga output.css de forma normal)."""
+    if not template_name or not current_app.config.get("CRITICAL_CSS_ENABLED", True):
+        return None
+    if template_name not in _critical_cache or current_app.debug:
+        try:
+            with open(critical_css_path(current_app.static_folder, template_name), encoding="utf-8") as fh:
+                _critical_cache[template_name] = Markup(fh.read().replace("</", "<\\/"))
+        except OSError:
+            _critical_cache[template_name] = None
+    css = _critical_cache[template_name]
+    if css is not None:
+        g.critical_css_inlined = True
+    return css
+
+
+def _remember_page_template(sender, template, context, **extra):
+    # La primera plantilla renderizada en la petición es la página; los fragmentos no la sustituyen.
+    context.setdefault("page_template", template.name)
+
+
+def _send_early_hints():
+    # Gunicorn no expone 103 a las apps WSGI; otros servidores (y versiones futuras) sí,
+    # con un callable en `wsgi.early_hints`. Si no está, basta con la cabecera Link de la respuesta.
+    early_hints = request.environ.get("wsgi.early_hints")
+    if early_hints is not None and request.method == "GET":
+        early_hints([("Link", preload_links())])
+
+
+def _add_preload_header(response):
+    if response.mimetype == "text/html" and response.status_code == 200 and "Link" not in response.headers:
+        response.headers["Link"] = preload_links()
+    return response
+
+
+def init_app(app):
+    app.jinja_env.globals["critical_css"] = critical_css
+    before_render_template.connect(_remember_page_template, app)
+    app.before_request(_send_early_hints)
+    app.after_request(_add_preload_header)
@@ -2,12 +2,19 @@ from datetime import datetime, date, timezone
 import os
 from uuid import uuid4
 
-from flask import render_template, redirect, url_for, flash, request, current_app
+from flask import render_template, redirect, url_for, flash, request, current_app, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
-from sqlalchemy import inspect
-from sqlalchemy.orm import load_only
+from sqlalchemy import inspect, or_
+from sqlalchemy.orm import load_only, selectinload
 from app.extensions import db
-from app.models import User, Project, ProjectImage, BlogPost, BlogTag
+from app.models import User, Project, ProjectImage, BlogPost, BlogTag, Redirect
+from app.metrics import record_upload
+from app.query_budget import query_budget
+from app.redirects import RedirectError, add_slug_redirect, import_redirects, normalize, parse_redirects, seed_legacy_redirects
+from app.related import refresh_related
+from app.tags import merge_tags, rename_tag, tag_index, upsert_tags
+from app.technologies import sync_technologies
+from app.timing import timed_io
 from . import bp
 from werkzeug.utils import secure_filename
 
@@ -69,38 +76,15 @@ def _blog_post_query_safe():
     )
 
 
-def _slugify_text(value: str, max_len: int = 120) -> str:
-    value = (value or "").strip().lower()
-    out = []
-    prev_dash = False
-    for ch in value:
-        if ("a" <= ch <= "z") or ("0" <= ch <= "9"):
-            out.append(ch)
-            prev_dash = False
-            continue
-        if ch in {" ", "-", "_", ".", "/"}:
-            if not prev_dash and out:
-                out.append("-")
-                prev_dash = True
-    slug = "".join(out).strip("-")[:max_len]
-    return slug or "tag"
-
-
-def _parse_tags(tag_string: str):
-    raw = [t.strip() for t in (tag_string or "").split(",")]
-    return [t for t in raw if t]
-
-
-def _upsert_tags(tag_string: str):
-    tags = []
-    for name in _parse_tags(tag_string):
-        slug = _slugify_text(name, max_len=80)
-        tag = BlogTag.query.filter_by(slug=slug).first()
-        if not tag:
-            tag = BlogTag(name=name, slug=slug)
-            db.session.add(tag)
-        tags.append(tag)
-    return tags
+def _refresh_related(kind: str, item_id: int):
+    # Se ejecuta tras el commit del guardado: si falla, el contenido ya está guardado y
+    # `python manage.py related` lo recalcula todo.
+    try:
+        refresh_related(kind, item_id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning('Error updating related %s %s: %s', kind, item_id, e)
 
 
 def _parse_optional_publish_datetime(value: str):
@@ -163,9 +147,10 @@ def logout():
 
 @bp.route('/dashboard')
 @login_required
+@query_budget(5)
 def dashboard():
-    # Obtenemos los proyectos ordenados por fecha (más reciente primero)
-    projects = Project.query.order_by(Project.created_at.desc()).all()
+    # Obtenemos los proyectos ordenados por fecha (más reciente primero), con sus imágenes en una sola consulta
+    projects = Project.query.options(selectinload(Project.images)).order_by(Project.created_at.desc()).all()
     stats = {
         'total': len(projects),
         'with_github': sum(1 for p in projects if p.github_url),
@@ -179,21 +164,22 @@ def dashboard():
 
     cv_filename = current_app.config.get('CV_FILENAME') or 'cv_angel.pdf'
     cv_path = _cv_path()
-    cv_exists = os.path.exists(cv_path)
     cv_size = None
     cv_size_display = None
-    if cv_exists:
-        try:
-            cv_size = os.path.getsize(cv_path)
-            if cv_size < 1024:
-                cv_size_display = f"{cv_size} B"
-            elif cv_size < 1024 * 1024:
-                cv_size_display = f"{round(cv_size / 1024)} KB"
-            else:
-                cv_size_display = f"{cv_size / (1024 * 1024):.1f} MB"
-        except Exception:
-            cv_size = None
-            cv_size_display = None
+    with timed_io('cv'):
+        cv_exists = os.path.exists(cv_path)
+        if cv_exists:
+            try:
+                cv_size = os.path.getsize(cv_path)
+                if cv_size < 1024:
+                    cv_size_display = f"{cv_size} B"
+                elif cv_size < 1024 * 1024:
+                    cv_size_display = f"{round(cv_size / 1024)} KB"
+                else:
+                    cv_size_display = f"{cv_size / (1024 * 1024):.1f} MB"
+            except Exception:
+                cv_size = None
+                cv_size_display = None
 
     return render_template(
         'auth/dashboard.html',
@@ -208,18 +194,160 @@ def dashboard():
     )
 
 
+ADMIN_POSTS_PER_PAGE = 25
+
+
+def _blog_admin_return():
+    # Vuelve a la misma página/búsqueda del listado; solo se aceptan URLs del propio listado.
+    target = request.form.get('next') or ''
+    base = url_for('auth.blog')
+    return target if target == base or target.startswith(base + '?') else base
+
+
 @bp.route('/blog')
 @login_required
+@query_budget(10)
 def blog():
+    q = (request.args.get('q') or '').strip()
+    status = request.args.get('status') if request.args.get('status') in ('published', 'draft') else 'all'
     try:
-        posts = _blog_post_query_safe().order_by(BlogPost.created_at.desc()).all()
+        page = max(int(request.args.get('page') or 1), 1)
+    except ValueError:
+        page = 1
+
+    # Solo columnas de resumen: el contenido, las etiquetas completas y los meta se piden
+    # al abrir el formulario de edición (auth.blog_post_data).
+    posts, total, pages = [], 0, 1
+    try:
+        query = BlogPost.query
+        if q:
+            like = f"%{q}%"
+            query = query.filter(or_(BlogPost.title.ilike(like), BlogPost.slug.ilike(like)))
+        if status != 'all':
+            query = query.filter(BlogPost.is_published.is_(status == 'published'))
+        total = query.count()
+        pages = max(1, (total + ADMIN_POSTS_PER_PAGE - 1) // ADMIN_POSTS_PER_PAGE)
+        page = min(page, pages)
+        posts = (
+            query.options(
+                load_only(
+                    BlogPost.id,
+                    BlogPost.slug,
+                    BlogPost.title,
+                    BlogPost.cover_image_path,
+                    BlogPost.is_published,
+                    BlogPost.published_at,
+                    BlogPost.created_at,
+                ),
+                selectinload(BlogPost.tags).load_only(BlogTag.name),
+            )
+            .order_by(BlogPost.created_at.desc(), BlogPost.id.desc())
+            .limit(ADMIN_POSTS_PER_PAGE)
+            .offset((page - 1) * ADMIN_POSTS_PER_PAGE)
+            .all()
+        )
     except Exception as e:
+        db.session.rollback()
         posts = []
         flash(f'Blog tables not ready yet ({e}). Run migrations to enable blog admin.', 'warning')
     meta_ready = _blog_posts_has_meta_columns()
     if not meta_ready:
         flash('Blog admin needs a migration update. Run `flask db upgrade` to enable creating/editing posts.', 'warning')
-    return render_template('auth/blog.html', title='Blog', posts=posts, blog_meta_ready=meta_ready)
+    try:
+        all_tags = tag_index.all()
+    except Exception:
+        db.session.rollback()
+        all_tags = []
+    return render_template(
+        'auth/blog.html',
+        title='Blog',
+        posts=posts,
+        q=q,
+        status=status,
+        page=page,
+        pages=pages,
+        total=total,
+        per_page=ADMIN_POSTS_PER_PAGE,
+        blog_meta_ready=meta_ready,
+        all_tags=all_tags,
+    )
+
+
+@bp.route('/blog/<int:id>/data')
+@login_required
+def blog_post_data(id):
+    """Campos del formulario de edición de un post (se piden al abrirlo)."""
+    post = db.get_or_404(BlogPost, id)
+    meta_ready = _blog_posts_has_meta_columns()
+    return jsonify({
+        'id': post.id,
+        'title': post.title,
+        'slug': post.slug,
+        'excerpt': post.excerpt or '',
+        'content': post.content or '',
+        'tags': ', '.join(t.name for t in post.tags),
+        'meta_title': (post.meta_title or '') if meta_ready else '',
+        'meta_description': (post.meta_description or '') if meta_ready else '',
+        'is_published': bool(post.is_published),
+        'published_at': post.published_at.strftime('%Y-%m-%d') if post.published_at else '',
+        'cover_url': url_for('static', filename='uploads/blog/' + post.cover_image_path) if post.cover_image_path else '',
+        'edit_url': url_for('auth.edit_blog_post', id=post.id),
+    })
+
+
+@bp.route('/blog/tags/autocomplete')
+@login_required
+def blog_tags_autocomplete():
+    q = (request.args.get('q') or '').strip()
+    try:
+        limit = min(max(int(request.args.get('limit') or 10), 1), 50)
+    except ValueError:
+        limit = 10
+    return jsonify(tag_index.search(q, limit=limit) if q else [])
+
+
+@bp.route('/blog/tags/merge', methods=['POST'])
+@login_required
+def merge_blog_tags():
+    try:
+        target_id = int(request.form.get('target_id') or 0)
+        source_ids = [int(raw) for raw in request.form.getlist('source_ids')]
+    except ValueError:
+        flash('Choose valid tags to merge.', 'danger')
+        return redirect(url_for('auth.blog'))
+    target = db.session.get(BlogTag, target_id)
+    if not target or not source_ids:
+        flash('Choose the tags to merge and the tag to keep.', 'danger')
+        return redirect(url_for('auth.blog'))
+    try:
+        moved = merge_tags(source_ids, target.id)
+        db.session.commit()
+        flash(f'Tags merged into "{target.name}" ({moved} posts re-tagged).', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error merging tags: {str(e)}', 'danger')
+    return redirect(url_for('auth.blog'))
+
+
+@bp.route('/blog/tags/rename/<int:id>', methods=['POST'])
+@login_required
+def rename_blog_tag(id):
+    tag = db.get_or_404(BlogTag, id)
+    new_name = (request.form.get('name') or '').strip()
+    if not new_name:
+        flash('Tag name is required.', 'danger')
+        return redirect(url_for('auth.blog'))
+    try:
+        result = rename_tag(tag, new_name)
+        db.session.commit()
+        if result.id != id:
+            flash(f'"{new_name}" already existed, so the tags were merged.', 'info')
+        else:
+            flash('Tag renamed.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error renaming tag: {str(e)}', 'danger')
+    return redirect(url_for('auth.blog'))
 
 
 @bp.route('/blog/create', methods=['POST'])
@@ -258,7 +386,7 @@ def create_blog_post():
         is_published=is_published,
         published_at=(custom_published_at or datetime.utcnow()) if is_published else None,
     )
-    post.tags = _upsert_tags(tags_string)
+    post.tags = upsert_tags(tags_string)
 
     saved_cover_path = None
     cover = request.files.get('cover_image')
@@ -271,11 +399,13 @@ def create_blog_post():
         unique_name = f"{uuid4().hex}_{safe_name}"
         saved_cover_path = os.path.join(_blog_upload_dir(), unique_name)
         cover.save(saved_cover_path)
+        record_upload('blog_cover', saved_cover_path)
         post.cover_image_path = unique_name
 
     try:
         db.session.add(post)
         db.session.commit()
+        _refresh_related('post', post.id)
         if is_published:
             flash('Post created and published.', 'success')
         else:
@@ -297,7 +427,7 @@ def create_blog_post():
 def edit_blog_post(id):
     if not _blog_posts_has_meta_columns():
         flash('Run `flask db upgrade` before editing posts (blog schema update pending).', 'danger')
-        return redirect(url_for('auth.blog'))
+        return redirect(_blog_admin_return())
 
     post = _blog_post_query_safe().filter(BlogPost.id == id).first_or_404()
 
@@ -314,21 +444,22 @@ def edit_blog_post(id):
 
     if not title or not slug or not content:
         flash('Title, slug, and content are required.', 'danger')
-        return redirect(url_for('auth.blog'))
+        return redirect(_blog_admin_return())
 
     custom_published_at = _parse_optional_publish_datetime(published_at_input)
     if is_published and published_at_input and not custom_published_at:
         flash('Published date must be in YYYY-MM-DD format.', 'danger')
-        return redirect(url_for('auth.blog'))
+        return redirect(_blog_admin_return())
     custom_published_at = _preserve_time_if_date_only(published_at_input, custom_published_at, post.published_at)
 
+    old_slug = post.slug
     post.title = title
     post.slug = slug
     post.excerpt = excerpt
     post.content = content
     post.meta_title = meta_title
     post.meta_description = meta_description
-    post.tags = _upsert_tags(tags_string)
+    post.tags = upsert_tags(tags_string)
     post.is_published = is_published
     if is_published:
         if custom_published_at:
@@ -344,12 +475,13 @@ def edit_blog_post(id):
     if cover and cover.filename:
         if not _is_allowed_image(cover.filename):
             flash('Cover image must be PNG/JPG/JPEG/WEBP/GIF.', 'danger')
-            return redirect(url_for('auth.blog'))
+            return redirect(_blog_admin_return())
         os.makedirs(_blog_upload_dir(), exist_ok=True)
         safe_name = secure_filename(cover.filename)
         unique_name = f"{uuid4().hex}_{safe_name}"
         new_cover_path_saved = os.path.join(_blog_upload_dir(), unique_name)
         cover.save(new_cover_path_saved)
+        record_upload('blog_cover', new_cover_path_saved)
         if post.cover_image_path:
             old_cover_path_to_delete = os.path.join(_blog_upload_dir(), post.cover_image_path)
         post.cover_image_path = unique_name
@@ -357,8 +489,13 @@ def edit_blog_post(id):
         old_cover_path_to_delete = os.path.join(_blog_upload_dir(), post.cover_image_path)
         post.cover_image_path = None
 
+    if old_slug != slug:
+        # Los enlaces al slug anterior siguen funcionando
+        add_slug_redirect(url_for('blog.post_detail', slug=old_slug), url_for('blog.post_detail', slug=slug))
+
     try:
         db.session.commit()
+        _refresh_related('post', post.id)
         if old_cover_path_to_delete and os.path.exists(old_cover_path_to_delete):
             try:
                 os.remove(old_cover_path_to_delete)
@@ -374,7 +511,7 @@ def edit_blog_post(id):
                 pass
         flash(f'Error updating post: {str(e)}', 'danger')
 
-    return redirect(url_for('auth.blog'))
+    return redirect(_blog_admin_return())
 
 
 @bp.route('/blog/delete/<int:id>', methods=['POST'])
@@ -383,8 +520,10 @@ def delete_blog_post(id):
     post = _blog_post_query_safe().filter(BlogPost.id == id).first_or_404()
     try:
         cover_path = os.path.join(_blog_upload_dir(), post.cover_image_path) if post.cover_image_path else None
+        post_id = post.id
         db.session.delete(post)
         db.session.commit()
+        _refresh_related('post', post_id)
         if cover_path and os.path.exists(cover_path):
             try:
                 os.remove(cover_path)
@@ -394,7 +533,78 @@ def delete_blog_post(id):
     except Exception as e:
         db.session.rollback()
         flash(f'Error deleting post: {str(e)}', 'danger')
-    return redirect(url_for('auth.blog'))
+    return redirect(_blog_admin_return())
+
+
+@bp.route('/redirects')
+@login_required
+def redirects():
+    try:
+        if seed_legacy_redirects():
+            db.session.commit()
+        rows = Redirect.query.order_by(Redirect.source.asc()).all()
+    except Exception as e:
+        db.session.rollback()
+        rows = []
+        flash(f'Redirects table not ready yet ({e}). Run migrations to enable it.', 'warning')
+    return render_template('auth/redirects.html', title='Redirects', redirects=rows)
+
+
+@bp.route('/redirects/create', methods=['POST'])
+@login_required
+def create_redirect():
+    try:
+        row = normalize(
+            request.form.get('source'),
+            request.form.get('target'),
+            is_prefix=request.form.get('is_prefix') == 'on',
+            status_code=int(request.form.get('status_code') or 301),
+        )
+        result = import_redirects([row])
+        db.session.commit()
+        flash('Redirect updated.' if result['updated'] else 'Redirect created.', 'success')
+    except (RedirectError, ValueError) as e:
+        db.session.rollback()
+        flash(str(e), 'danger')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error saving redirect: {str(e)}', 'danger')
+    return redirect(url_for('auth.redirects'))
+
+
+@bp.route('/redirects/import', methods=['POST'])
+@login_required
+def import_redirects_bulk():
+    text = request.form.get('lines') or ''
+    upload = request.files.get('file')
+    if upload and upload.filename:
+        text += '\n' + upload.read().decode('utf-8', errors='replace')
+    rows, errors = parse_redirects(text)
+    if errors:
+        flash('Nothing imported. ' + '; '.join(errors[:5]) + (' …' if len(errors) > 5 else ''), 'danger')
+        return redirect(url_for('auth.redirects'))
+    try:
+        result = import_redirects(rows)
+        db.session.commit()
+        flash(f"Imported redirects: {result['created']} created, {result['updated']} updated.", 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error importing redirects: {str(e)}', 'danger')
+    return redirect(url_for('auth.redirects'))
+
+
+@bp.route('/redirects/delete/<int:id>', methods=['POST'])
+@login_required
+def delete_redirect(id):
+    row = db.get_or_404(Redirect, id)
+    try:
+        db.session.delete(row)
+        db.session.commit()
+        flash('Redirect deleted.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error deleting redirect: {str(e)}', 'danger')
+    return redirect(url_for('auth.redirects'))
 
 
 @bp.route('/cv/upload', methods=['POST'])
@@ -419,6 +629,7 @@ def upload_cv():
     tmp_path = os.path.join(_documents_dir(), tmp_name)
     try:
         cv_file.save(tmp_path)
+        record_upload('cv', tmp_path)
         os.replace(tmp_path, target)
         flash('CV uploaded successfully.', 'success')
     except Exception as e:
@@ -510,6 +721,7 @@ def create_project():
                 file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
                 file.save(file_path)
                 saved_files.append(file_path)
+                record_upload('project_image', file_path)
                 
                 # Guardamos la referencia en la Base de Datos
                 # Aquí usamos new_project.id que acabamos de crear
@@ -520,7 +732,9 @@ def create_project():
                 )
                 db.session.add(new_image)
         
+        sync_technologies([new_project.id])
         db.session.commit()
+        _refresh_related('project', new_project.id)
         
         flash('Project and images created successfully!', 'success')
 
@@ -553,8 +767,12 @@ def delete_project(id):
         # === Borrar de la Base de Datos ===
         # Gracias al cascade="all, delete" en tu modelo, esto borrará 
         # también las filas en la tabla ProjectImage automáticamente.
+        project_id = project.id
         db.session.delete(project)
+        db.session.flush()
+        sync_technologies([project_id])
         db.session.commit()
+        _refresh_related('project', project_id)
 
         for file_path in image_paths:
             if os.path.exists(file_path):
@@ -633,6 +851,7 @@ def edit_project(id):
                 file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
                 file.save(file_path)
                 saved_files.append(file_path)
+                record_upload('project_image', file_path)
                 
                 new_image = ProjectImage(
                     project_id=project.id, 
@@ -641,7 +860,10 @@ def edit_project(id):
                 )
                 db.session.add(new_image)
         
+        db.session.flush()
+        sync_technologies([project.id])
         db.session.commit()
+        _refresh_related('project', project.id)
         for file_path in delete_paths:
             if os.path.exists(file_path):
                 try:
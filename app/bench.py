@@ -0,0 +1,408 @@
+import gzip
+import json
+import math
+import os
+import platform
+import re
+import threading
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from sqlalchemy import event, select
+
+from app.extensions import db
+from app.models import BlogPost, BlogTag, Project
+
+
+_counter = threading.local()
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    _counter.queries = getattr(_counter, "queries", 0) + 1
+
+
+def percentile(sorted_values, pct: float):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def public_routes(app, samples: int = 3):
+    """Rutas públicas a medir: las estáticas más algunas instancias de las dinámicas."""
+    routes = []
+    for rule in app.url_map.iter_rules():
+        if "GET" not in (rule.methods or ()) or rule.arguments:
+            continue
+        if rule.endpoint == "static" or rule.endpoint.startswith("auth.") or rule.endpoint == "main.download_cv":
+            continue
+        if rule.endpoint.endswith("_legacy") or rule.endpoint.startswith("legacy_"):
+            continue
+        routes.append((rule.endpoint, rule.rule))
+
+    with app.app_context():
+        slugs = db.session.execute(
+            select(BlogPost.slug).where(BlogPost.is_published.is_(True)).order_by(BlogPost.id).limit(samples)
+        ).scalars().all()
+        project_ids = db.session.execute(select(Project.id).order_by(Project.id).limit(samples)).scalars().all()
+        tag_slugs = db.session.execute(select(BlogTag.slug).order_by(BlogTag.id).limit(samples)).scalars().all()
+
+    routes += [("blog.post_detail", f"/blog/{slug}") for slug in slugs]
+    routes += [("projects.project_detail", f"/projects/{pid}") for pid in project_ids]
+    routes += [("blog.index", f"/blog/?tag={slug}") for slug in tag_slugs]
+    routes += [("blog.index", "/blog/?page=2"), ("blog.index", "/blog/?q=data")]
+    routes += [("projects.projects_home", "/projects/category/web-dev/"), ("projects.projects_grid", "/projects/grid?q=data")]
+    # Quitamos duplicados conservando el orden (p. ej. "/" y "/home").
+    seen = set()
+    return [r for r in routes if not (r[1] in seen or seen.add(r[1]))]
+
+
+def _drive_test_client(app, path: str, requests: int, concurrency: int):
+    clients = threading.local()
+
+    def one(_):
+        client = getattr(clients, "client", None)
+        if client is None:
+            client = clients.client = app.test_client()
+        _counter.queries = 0
+        start = time.perf_counter()
+        response = client.get(path)
+        response.get_data()
+        elapsed = time.perf_counter() - start
+        response.close()
+        return elapsed, response.status_code, _counter.queries
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(requests)))
+
+
+def _drive_http(base_url: str, path: str, requests: int, concurrency: int):
+    url = base_url.rstrip("/") + path
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        return time.perf_counter() - start, status, None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(requests)))
+
+
+def _summarize(endpoint: str, path: str, samples, wall: float):
+    latencies = sorted(s[0] * 1000 for s in samples)
+    queries = [s[2] for s in samples if s[2] is not None]
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "endpoint": endpoint,
+        "path": path,
+        "requests": len(samples),
+        "statuses": statuses,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+        "throughput_rps": round(len(samples) / wall, 2) if wall else None,
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def run_benchmark(app, requests: int = 200, concurrency: int = 4, warmup: int = 5, base_url: str | None = None, only=None):
+    """Mide cada ruta pública y devuelve un dict serializable a JSON."""
+    routes = public_routes(app)
+    if only:
+        routes = [r for r in routes if r[0] in only]
+
+    listener_engine = None
+    if base_url is None:
+        with app.app_context():
+            listener_engine = db.engine
+        event.listen(listener_engine, "before_cursor_execute", _count_query)
+
+    results = []
+    try:
+        for endpoint, path in routes:
+            if base_url is None:
+                _drive_test_client(app, path, warmup, 1)
+                start = time.perf_counter()
+                samples = _drive_test_client(app, path, requests, concurrency)
+            else:
+                _drive_http(base_url, path, warmup, 1)
+                start = time.perf_counter()
+                samples = _drive_http(base_url, path, requests, concurrency)
+            results.append(_summarize(endpoint, path, samples, time.perf_counter() - start))
+    finally:
+        if listener_engine is not None:
+            event.remove(listener_engine, "before_cursor_execute", _count_query)
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": base_url or "test-client",
+        "database": app.config.get("SQLALCHEMY_DATABASE_URI", "").split("://", 1)[0],
+        "python": platform.python_version(),
+        "requests": requests,
+        "concurrency": concurrency,
+        "results": results,
+    }
+
+
+def save_report(report: dict, output: str):
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+
+
+def compare_reports(current: dict, previous: dict):
+    """Devuelve filas (path, p95 anterior, p95 actual, % de cambio) para las rutas comunes."""
+    before = {r["path"]: r for r in previous.get("results", [])}
+    rows = []
+    for r in current.get("results", []):
+        old = before.get(r["path"])
+        if not old or not old.get("p95_ms"):
+            continue
+        change = (r["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+        rows.append((r["path"], old["p95_ms"], r["p95_ms"], round(change, 1)))
+    return rows
+
+
+_NOSCRIPT_RE = re.compile(r"<noscript>.*?</noscript>", re.S | re.I)
+_BLOCKING_CSS_RE = re.compile(r"<link\s+rel=\"stylesheet\"\s+href=\"([^\"]+)\"", re.I)
+
+
+def _render_blocking(app, html: bytes):
+    """Bytes que el navegador necesita antes del primer render: el HTML más las hojas de estilo bloqueantes."""
+    text = _NOSCRIPT_RE.sub("", html.decode("utf-8"))
+    raw, gz = len(html), len(gzip.compress(html, 6))
+    for href in _BLOCKING_CSS_RE.findall(text):
+        path = href.split("?", 1)[0]
+        if not path.startswith(app.static_url_path + "/"):
+            continue
+        with open(os.path.join(app.static_folder, *path[len(app.static_url_path) + 1:].split("/")), "rb") as fh:
+            body = fh.read()
+        raw, gz = raw + len(body), gz + len(gzip.compress(body, 6))
+    return raw, gz
+
+
+def first_render_bytes(app, only=None):
+    """Compara por página los bytes bloqueantes con y sin CSS crítico en línea."""
+    routes = public_routes(app)
+    if only:
+        routes = [r for r in routes if r[0] in only]
+    enabled = app.config.get("CRITICAL_CSS_ENABLED", True)
+    client = app.test_client()
+    results = []
+    try:
+        for endpoint, path in routes:
+            sizes = {}
+            for mode in (False, True):
+                app.config["CRITICAL_CSS_ENABLED"] = mode
+                response = client.get(path)
+                if response.status_code != 200 or response.mimetype != "text/html":
+                    break
+                sizes[mode] = _render_blocking(app, response.get_data())
+            if len(sizes) != 2:
+                continue
+            (before_raw, before_gz), (after_raw, after_gz) = sizes[False], sizes[True]
+            results.append({
+                "endpoint": endpoint,
+                "path": path,
+                "before_bytes": before_raw,
+                "after_bytes": after_raw,
+                "before_gzip": before_gz,
+                "after_gzip": after_gz,
+                "saved_gzip_pct": round((before_gz - after_gz) / before_gz * 100, 1) if before_gz else 0.0,
+            })
+    finally:
+        app.config["CRITICAL_CSS_ENABLED"] = enabled
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": "test-client",
+        "results": results,
+    }
+
+
+def _time_ops(fn, ops: int) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    return time.perf_counter() - start
+
+
+def _shared_cache_reader(path: str, ops: int, keys: int) -> float:
+    from app.shared_cache import SharedCache
+
+    shared = SharedCache(path)
+    return _time_ops(lambda i: shared.get("bench", str(i % keys)), ops)
+
+
+def cache_throughput(path: str, ops: int = 20000, value_bytes: int = 1024, processes: int = 4, keys: int = 1000):
+    """Operaciones por segundo de un dict por proceso frente a la caché compartida (SQLite WAL) en `path`.
+
+    Las lecturas concurrentes se miden con `processes` procesos leyendo a la vez del mismo fichero,
+    como harían los workers de gunicorn.
+    """
+    import multiprocessing
+
+    from app.shared_cache import SharedCache
+
+    value = os.urandom(value_bytes // 2).hex()
+    results = []
+
+    def add(backend, operation, seconds, total_ops, workers=1):
+        results.append({
+            "backend": backend,
+            "operation": operation,
+            "processes": workers,
+            "ops": total_ops,
+            "seconds": round(seconds, 4),
+            "ops_per_sec": round(total_ops / seconds) if seconds else None,
+            "us_per_op": round(seconds / total_ops * 1e6 * workers, 2) if total_ops else None,
+        })
+
+    local = {}
+    add("dict", "set", _time_ops(lambda i: local.__setitem__(str(i % keys), value), ops), ops)
+    add("dict", "get", _time_ops(lambda i: local.get(str(i % keys)), ops), ops)
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    shared = SharedCache(path, max_bytes=max(64 * 1024 * 1024, keys * value_bytes * 4))
+    add("shared", "set", _time_ops(lambda i: shared.set("bench", str(i % keys), value), ops), ops)
+    add("shared", "get", _time_ops(lambda i: shared.get("bench", str(i % keys)), ops), ops)
+    add("shared", "generation", _time_ops(lambda i: shared.generation("bench"), ops), ops)
+
+    if processes > 1:
+        context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+        with context.Pool(processes) as pool:
+            # El arranque de los procesos no cuenta: cada uno mide solo sus lecturas.
+            elapsed = pool.starmap(_shared_cache_reader, [(path, ops, keys)] * processes)
+            add("shared", "get", max(elapsed), ops * processes, processes)
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "value_bytes": value_bytes,
+        "keys": keys,
+        "results": results,
+    }
+
+
+STREAMED_ENDPOINTS = ("main.resume", "blog.index", "projects.projects_home")
+
+
+def ttfb(app, requests: int = 20, only=None):
+    """Tiempo hasta el primer byte y hasta el último de las páginas largas, con y sin STREAMED_RENDERING.
+
+    Con el test client y `buffered=False`, el primer trozo del cuerpo llega en cuanto la
+    vista lo produce: sin streaming eso es después de renderizar la página entera.
+    """
+    routes = [r for r in public_routes(app) if r[0] in (only or STREAMED_ENDPOINTS)]
+    streamed = app.config.get("STREAMED_RENDERING", False)
+    client = app.test_client()
+    results = []
+    try:
+        for endpoint, path in routes:
+            timings = {}
+            for mode in (False, True):
+                app.config["STREAMED_RENDERING"] = mode
+                client.get(path).close()
+                first, last = [], []
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    response = client.get(path, buffered=False)
+                    chunks = iter(response.response)
+                    next(chunks, None)
+                    first.append((time.perf_counter() - start) * 1000)
+                    for _chunk in chunks:
+                        pass
+                    last.append((time.perf_counter() - start) * 1000)
+                    response.close()
+                first.sort()
+                last.sort()
+                timings[mode] = (percentile(first, 50), percentile(last, 50))
+            (before_first, before_last), (after_first, after_last) = timings[False], timings[True]
+            results.append({
+                "endpoint": endpoint,
+                "path": path,
+                "buffered_ttfb_ms": round(before_first, 2),
+                "buffered_total_ms": round(before_last, 2),
+                "streamed_ttfb_ms": round(after_first, 2),
+                "streamed_total_ms": round(after_last, 2),
+                "ttfb_saved_pct": round((before_first - after_first) / before_first * 100, 1) if before_first else 0.0,
+            })
+    finally:
+        app.config["STREAMED_RENDERING"] = streamed
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": "test-client",
+        "python": platform.python_version(),
+        "requests": requests,
+        "results": results,
+    }
+
+
+READ_MODEL_ENDPOINTS = ("blog.index", "blog.rss", "projects.projects_home", "projects.projects_grid", "main.resume")
+
+
+def request_cost(app, requests: int = 40, only=None):
+    """CPU (process_time) y pico de memoria asignada (tracemalloc) por petición de los listados públicos.
+
+    Es lo que ahorran las filas de app/read_models.py frente a instancias ORM; la latencia
+    de `bench` lo mezcla con la espera de la BD.
+    """
+    routes = [r for r in public_routes(app) if r[0] in (only or READ_MODEL_ENDPOINTS)]
+    client = app.test_client()
+    results = []
+    for endpoint, path in routes:
+        for _ in range(3):
+            client.get(path)
+        cpu = []
+        for _ in range(requests):
+            start = time.process_time()
+            client.get(path)
+            cpu.append((time.process_time() - start) * 1000)
+        peaks = []
+        for _ in range(max(3, requests // 8)):
+            tracemalloc.start()
+            try:
+                client.get(path)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+        cpu.sort()
+        peaks.sort()
+        results.append({
+            "endpoint": endpoint,
+            "path": path,
+            "cpu_ms": round(percentile(cpu, 50), 2),
+            "peak_kb": round(percentile(peaks, 50) / 1024, 1),
+        })
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": "test-client",
+        "python": platform.python_version(),
+        "requests": requests,
+        "results": results,
+    }
+
+
+def compare_costs(current: dict, previous: dict):
+    """Filas (path, cpu anterior, cpu actual, pico anterior, pico actual) para las rutas comunes."""
+    before = {r["path"]: r for r in previous.get("results", [])}
+    return [
+        (r["path"], before[r["path"]]["cpu_ms"], r["cpu_ms"], before[r["path"]]["peak_kb"], r["peak_kb"])
+        for r in current.get("results", [])
+        if r["path"] in before
+    ]
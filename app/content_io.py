@@ -0,0 +1,417 @@
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from uuid import uuid4
+
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.orm import selectinload
+from werkzeug.utils import secure_filename
+
+from app.extensions import db
+from app.models import BlogPost, Project, ProjectCode, ProjectImage, post_tags
+from app.tags import parse_tags, resolve_tags, slugify_text
+from app.technologies import sync_technologies
+
+
+POST_FIELDS = (
+    "slug", "title", "excerpt", "content", "cover_image_path", "meta_title", "meta_description",
+    "is_published", "published_at", "created_at", "updated_at",
+)
+PROJECT_FIELDS = (
+    "slug", "title", "description", "long_description", "technologies", "github_url", "website_url",
+    "category_slug", "created_at",
+)
+_DATETIME_FIELDS = {"published_at", "created_at", "updated_at"}
+_CODE_MARKER = re.compile(r"^<!-- code: (.*?) -->$", re.MULTILINE)
+
+
+class ContentImportError(ValueError):
+    pass
+
+
+# --- Serialización -----------------------------------------------------------
+
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    return value
+
+
+def _load_datetime(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def post_record(post: BlogPost) -> dict:
+    record = {"type": "post"}
+    record.update({f: _dump_value(getattr(post, f)) for f in POST_FIELDS})
+    record["tags"] = [t.name for t in post.tags]
+    return record
+
+
+def project_record(project: Project) -> dict:
+    record = {"type": "project"}
+    record.update({f: _dump_value(getattr(project, f)) for f in PROJECT_FIELDS})
+    record["images"] = [{"path": i.image_path, "caption": i.caption} for i in project.images]
+    record["code"] = [
+        {"file_name": c.file_name, "language": c.language, "code_snippet": c.code_snippet} for c in project.code
+    ]
+    return record
+
+
+def iter_records(kinds=("posts", "projects"), chunk_size: int = 500):
+    """Recorre posts y proyectos en bloques (yield_per) sin cargar toda la tabla en memoria."""
+    if "posts" in kinds:
+        stmt = (
+            select(BlogPost)
+            .options(selectinload(BlogPost.tags))
+            .order_by(BlogPost.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        for post in db.session.scalars(stmt):
+            yield post_record(post)
+    if "projects" in kinds:
+        stmt = (
+            select(Project)
+            .options(selectinload(Project.images), selectinload(Project.code))
+            .order_by(Project.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        for project in db.session.scalars(stmt):
+            yield project_record(project)
+
+
+# --- Markdown con frontmatter ------------------------------------------------
+
+def _frontmatter_value(value) -> str:
+    if isinstance(value, str) and "\n" not in value and value.strip() == value and value:
+        try:
+            json.loads(value)
+        except ValueError:
+            if value[0] not in "[{\"":
+                return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _parse_frontmatter_value(raw: str):
+    raw = raw.strip()
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def record_to_markdown(record: dict) -> str:
+    body_field = "content" if record["type"] == "post" else "long_description"
+    lines = ["---"]
+    for key, value in record.items():
+        if key in (body_field, "code") or value is None:
+            continue
+        lines.append(f"{key}: {_frontmatter_value(value)}")
+    lines.append("---")
+    lines.append(record.get(body_field) or "")
+    for snippet in record.get("code") or []:
+        lines.append("")
+        lines.append(f"<!-- code: {json.dumps({'file_name': snippet['file_name'], 'language': snippet['language']})} -->")
+        lines.append(f"```{snippet.get('language') or ''}")
+        lines.append(snippet.get("code_snippet") or "")
+        lines.append("```")
+    return "\n".join(lines) + "\n"
+
+
+def markdown_to_record(text: str, default_type: str | None = None) -> dict:
+    if not text.startswith("---\n"):
+        raise ContentImportError("missing frontmatter")
+    end = text.find("\n---\n", 4)
+    if end == -1:
+        raise ContentImportError("unterminated frontmatter")
+    record = {}
+    for line in text[4:end].splitlines():
+        if not line.strip():
+            continue
+        key, _, raw = line.partition(":")
+        record[key.strip()] = _parse_frontmatter_value(raw)
+    record.setdefault("type", default_type)
+    body = text[end + 5:]
+
+    if record["type"] == "project":
+        parts = _CODE_MARKER.split(body)
+        record["long_description"] = parts[0].rstrip("\n") or None
+        code = []
+        for meta, block in zip(parts[1::2], parts[2::2]):
+            block = block.strip("\n")
+            block_lines = block.split("\n")
+            if block_lines and block_lines[0].startswith("```"):
+                block_lines = block_lines[1:]
+            if block_lines and block_lines[-1].strip() == "```":
+                block_lines = block_lines[:-1]
+            snippet = json.loads(meta)
+            snippet["code_snippet"] = "\n".join(block_lines)
+            code.append(snippet)
+        record["code"] = code
+    else:
+        record["content"] = body.rstrip("\n")
+    return record
+
+
+def iter_markdown_dir(directory: str):
+    for root, _dirs, files in os.walk(directory):
+        default_type = {"posts": "post", "projects": "project"}.get(os.path.basename(root))
+        for name in sorted(files):
+            if not name.endswith(".md"):
+                continue
+            path = os.path.join(root, name)
+            with open(path, encoding="utf-8") as fh:
+                try:
+                    yield markdown_to_record(fh.read(), default_type)
+                except (ContentImportError, ValueError) as e:
+                    raise ContentImportError(f"{path}: {e}") from e
+
+
+def iter_jsonl(path: str):
+    with open(path, encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                raise ContentImportError(f"{path}:{lineno}: {e}") from e
+
+
+# --- Ficheros ----------------------------------------------------------------
+
+def media_jobs(record: dict, source_root: str, target_root: str):
+    """Pares (origen, destino) de las imágenes de un registro, con el mismo nombre (exportación).
+
+    `*_root` siguen la estructura de UPLOAD_FOLDER.
+    """
+    if record["type"] == "post":
+        names = [record.get("cover_image_path")]
+        sub = "blog"
+    else:
+        names = [img.get("path") for img in record.get("images") or []]
+        sub = ""
+    names = [os.path.basename(name) for name in names if name]
+    return [(os.path.join(source_root, sub, name), os.path.join(target_root, sub, name)) for name in names]
+
+
+class MediaPlan:
+    """Copias pendientes de una importación. Cada imagen se guarda con un nombre nuevo, como las
+    subidas desde el admin, para no pisar un fichero en uso con el mismo nombre.
+    """
+
+    def __init__(self, source_root: str, target_root: str):
+        self.source_root = source_root
+        self.target_root = target_root
+        self.jobs = []
+
+    def add(self, sub: str, name: str) -> str:
+        """Encola la copia de `name` y devuelve el nombre con que hay que guardarlo en la BD."""
+        source_name = os.path.basename(name)
+        target_name = f"{uuid4().hex}_{secure_filename(source_name)}"
+        self.jobs.append(
+            (os.path.join(self.source_root, sub, source_name), os.path.join(self.target_root, sub, target_name))
+        )
+        return target_name
+
+
+def _copy_one(job):
+    source, target = job
+    if os.path.exists(target) and os.path.getsize(target) == os.path.getsize(source):
+        return None
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copyfile(source, target)
+    return target
+
+
+def copy_files(jobs, workers: int = 8):
+    """Copia en paralelo; devuelve los destinos escritos. Si algo falla, borra lo copiado y relanza."""
+    copied = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_copy_one, job) for job in jobs]
+        for future in futures:
+            try:
+                target = future.result()
+            except OSError as e:
+                errors.append(e)
+                continue
+            if target:
+                copied.append(target)
+    if errors:
+        remove_files(copied)
+        raise errors[0]
+    return copied
+
+
+def remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# --- Importación -------------------------------------------------------------
+
+def _clean(record: dict, fields) -> dict:
+    row = {f: record.get(f) for f in fields}
+    for f in _DATETIME_FIELDS & set(fields):
+        row[f] = _load_datetime(row[f])
+    return {k: v for k, v in row.items() if v is not None}
+
+
+def _existing_slugs(model, slugs):
+    if not slugs:
+        return set()
+    return set(db.session.scalars(select(model.slug).where(model.slug.in_(slugs))))
+
+
+def _import_posts(records, stats, media: MediaPlan | None = None):
+    slugs = [r.get("slug") for r in records]
+    skip = _existing_slugs(BlogPost, slugs)
+    rows, tags_by_slug = [], {}
+    for record in records:
+        if not record.get("slug") or not record.get("title") or not record.get("content"):
+            raise ContentImportError(f"post without slug/title/content: {record.get('slug')!r}")
+        if record["slug"] in skip:
+            stats["skipped"] += 1
+            continue
+        skip.add(record["slug"])
+        row = _clean(record, POST_FIELDS)
+        row.setdefault("is_published", False)
+        if media and row.get("cover_image_path"):
+            row["cover_image_path"] = media.add("blog", row["cover_image_path"])
+        rows.append(row)
+        tags = record.get("tags") or []
+        tags_by_slug[record["slug"]] = parse_tags(tags) if isinstance(tags, str) else [t for t in tags if t]
+    if not rows:
+        return
+
+    tag_map = resolve_tags([name for names in tags_by_slug.values() for name in names])
+    db.session.flush()
+    result = db.session.execute(insert(BlogPost).returning(BlogPost.id, BlogPost.slug), rows)
+    post_ids = {slug: post_id for post_id, slug in result}
+    links = []
+    for slug, names in tags_by_slug.items():
+        tag_ids = {tag_map[slugify_text(name, max_len=80)].id for name in names}
+        links += [{"post_id": post_ids[slug], "tag_id": tag_id} for tag_id in tag_ids]
+    if links:
+        db.session.execute(insert(post_tags), links)
+    stats["posts"] += len(rows)
+
+
+def _import_projects(records, stats, media: MediaPlan | None = None):
+    slugs = [r.get("slug") for r in records]
+    skip = _existing_slugs(Project, slugs)
+    rows, children = [], {}
+    for record in records:
+        if not record.get("slug") or not record.get("title") or not record.get("category_slug"):
+            raise ContentImportError(f"project without slug/title/category_slug: {record.get('slug')!r}")
+        if record["slug"] in skip:
+            stats["skipped"] += 1
+            continue
+        skip.add(record["slug"])
+        row = _clean(record, PROJECT_FIELDS)
+        row.setdefault("description", "")
+        rows.append(row)
+        images = [dict(i) for i in record.get("images") or [] if i.get("path")]
+        if media:
+            for image in images:
+                image["path"] = media.add("", image["path"])
+        children[record["slug"]] = (images, record.get("code") or [])
+    if not rows:
+        return
+
+    result = db.session.execute(insert(Project).returning(Project.id, Project.slug), rows)
+    project_ids = {slug: project_id for project_id, slug in result}
+    images, code = [], []
+    for slug, (slug_images, slug_code) in children.items():
+        pid = project_ids[slug]
+        images += [{"project_id": pid, "image_path": i["path"], "caption": i.get("caption")} for i in slug_images]
+        code += [
+            {
+                "project_id": pid,
+                "file_name": c.get("file_name"),
+                "language": c.get("language"),
+                "code_snippet": c.get("code_snippet"),
+            }
+            for c in slug_code
+        ]
+    if images:
+        db.session.execute(insert(ProjectImage), images)
+    if code:
+        db.session.execute(insert(ProjectCode), code)
+    sync_technologies(project_ids.values())
+    stats["projects"] += len(rows)
+    stats["images"] += len(images)
+    stats["code"] += len(code)
+
+
+def import_records(records, media_dir: str | None = None, batch_size: int = 500, workers: int = 8) -> dict:
+    """Importa en lotes dentro de una sola transacción; las imágenes se copian en paralelo antes del commit.
+
+    Solo se copian las imágenes de los registros insertados (no de los omitidos por slug).
+    """
+    stats = {"posts": 0, "projects": 0, "images": 0, "code": 0, "skipped": 0, "files": 0}
+    media = MediaPlan(media_dir, current_app.config["UPLOAD_FOLDER"]) if media_dir else None
+    copied = []
+
+    def flush(batch):
+        posts = [r for r in batch if r.get("type") == "post"]
+        projects = [r for r in batch if r.get("type") == "project"]
+        unknown = [r for r in batch if r.get("type") not in ("post", "project")]
+        if unknown:
+            raise ContentImportError(f"unknown record type: {unknown[0].get('type')!r}")
+        _import_posts(posts, stats, media)
+        _import_projects(projects, stats, media)
+
+    try:
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        copied = copy_files(media.jobs, workers=workers) if media else []
+        stats["files"] = len(copied)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        remove_files(copied)
+        raise
+    return stats
+
+
+# --- Exportación -------------------------------------------------------------
+
+def export_jsonl(records, fh):
+    count = 0
+    for record in records:
+        fh.write(json.dumps(record, ensure_ascii=False))
+        fh.write("\n")
+        count += 1
+    return count
+
+
+def export_markdown(records, directory: str):
+    count = 0
+    for record in records:
+        subdir = os.path.join(directory, "posts" if record["type"] == "post" else "projects")
+        os.makedirs(subdir, exist_ok=True)
+        with open(os.path.join(subdir, f"{record['slug']}.md"), "w", encoding="utf-8") as fh:
+            fh.write(record_to_markdown(record))
+        count += 1
+    return count
@@ -0,0 +1,251 @@
+import json
+import re
+
+from flask import current_app, url_for
+from sqlalchemy import Column, Table, event, inspect, select
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, UnaryExpression
+from sqlalchemy.sql.selectable import Alias, Select
+
+from app.extensions import db
+from app.models import BlogTag, Technology, User
+
+
+# Rutas calientes cuyas consultas se reproducen. (endpoint, valores para url_for, requiere login)
+HOT_ROUTES = [
+    ("blog.index", {}, False),
+    ("blog.index", {"tag": "<tag>"}, False),
+    ("blog.rss", {}, False),
+    ("projects.projects_home", {}, False),
+    ("projects.projects_home", {"category": "<category>"}, False),
+    ("projects.projects_home", {"tech": "<tech>"}, False),
+    ("main.resume", {}, False),
+    ("auth.dashboard", {}, True),
+]
+
+_EQ_OPERATORS = {operators.eq, operators.is_, operators.in_op}
+_SQLITE_SCAN_RE = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+_SQLITE_SORT_RE = re.compile(r"USE TEMP B-TREE FOR (.+)$")
+# SQLite crea un índice temporal en cada ejecución cuando falta uno: ya nos dice cuál.
+_SQLITE_AUTO_INDEX_RE = re.compile(r"^SEARCH (\w+)(?: AS \w+)? USING AUTOMATIC (?:COVERING |PARTIAL )*INDEX \((.+)\)")
+
+
+class CapturedQuery:
+    def __init__(self, endpoint, path, sql, parameters, statement):
+        self.endpoint = endpoint
+        self.path = path
+        self.sql = sql
+        self.parameters = parameters
+        self.statement = statement
+        self.plan = []
+        self.scans = []
+        self.sorts = []
+        self.automatic_indexes = []
+
+
+def _sample_values():
+    tag = db.session.scalar(select(BlogTag.slug).order_by(BlogTag.id).limit(1))
+    from app.projects.routes import PROJECT_CATEGORIES
+
+    tech = db.session.scalar(select(Technology.slug).order_by(Technology.project_count.desc()).limit(1))
+    return {"<tag>": tag, "<category>": PROJECT_CATEGORIES[0][0], "<tech>": tech}
+
+
+def capture_queries(app, routes=HOT_ROUTES):
+    """Visita cada ruta con el test client y devuelve las SELECT distintas que emitió, en orden."""
+    with app.app_context():
+        engine = db.engine
+        samples = _sample_values()
+        admin_id = db.session.scalar(select(User.id).order_by(User.id).limit(1))
+        with app.test_request_context():
+            targets = []
+            for endpoint, values, needs_login in routes:
+                values = {k: samples.get(v, v) for k, v in values.items()}
+                if None in values.values() or (needs_login and admin_id is None):
+                    continue
+                targets.append((endpoint, url_for(endpoint, **values), needs_login))
+
+    current = {}
+    captured, seen = [], set()
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith("SELECT") or not current:
+            return
+        if statement in seen:
+            return
+        seen.add(statement)
+        compiled = getattr(context, "compiled", None)
+        captured.append(CapturedQuery(
+            current["endpoint"], current["path"], statement, parameters,
+            compiled.statement if compiled is not None else None,
+        ))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        client = app.test_client()
+        for endpoint, path, needs_login in targets:
+            if needs_login:
+                with client.session_transaction() as session:
+                    session["_user_id"] = str(admin_id)
+                    session["_fresh"] = True
+            current.update(endpoint=endpoint, path=path)
+            client.get(path).close()
+            current.clear()
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+    return captured
+
+
+def _explain_sqlite(conn, query):
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + query.sql, query.parameters).all()
+    depth = {0: 0}
+    for row in rows:
+        node_id, parent, detail = row[0], row[1], row[-1]
+        depth[node_id] = depth.get(parent, 0) + 1
+        query.plan.append("  " * (depth[node_id] - 1) + detail)
+        scan = _SQLITE_SCAN_RE.match(detail)
+        if scan:
+            query.scans.append(scan.group(1))
+        automatic = _SQLITE_AUTO_INDEX_RE.match(detail)
+        if automatic:
+            columns = tuple(re.findall(r"(\w+)[=<>]", automatic.group(2)))
+            query.automatic_indexes.append((automatic.group(1), columns))
+        sort = _SQLITE_SORT_RE.search(detail)
+        if sort:
+            query.sorts.append(sort.group(1))
+
+
+def _explain_postgresql(conn, query):
+    raw = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + query.sql, query.parameters).scalar()
+    plan = json.loads(raw) if isinstance(raw, str) else raw
+
+    def walk(node, level):
+        kind = node["Node Type"]
+        relation = node.get("Relation Name")
+        label = f"{kind} on {relation}" if relation else kind
+        query.plan.append(f"{'  ' * level}{label}  (rows={node.get('Plan Rows')}, cost={node.get('Total Cost')})")
+        if kind == "Seq Scan":
+            query.scans.append(relation)
+        elif kind in ("Sort", "Incremental Sort"):
+            query.sorts.append(", ".join(node.get("Sort Key", [])))
+        for child in node.get("Plans", []):
+            walk(child, level + 1)
+
+    walk(plan[0]["Plan"], 0)
+
+
+def explain_queries(queries):
+    """Rellena plan, scans y sorts de cada consulta con EXPLAIN del motor configurado."""
+    dialect = db.engine.dialect.name
+    explain = {"sqlite": _explain_sqlite, "postgresql": _explain_postgresql}.get(dialect)
+    if explain is None:
+        raise ValueError(f"EXPLAIN is only supported on SQLite and PostgreSQL, not {dialect}")
+    with db.engine.connect() as conn:
+        for query in queries:
+            explain(conn, query)
+            conn.rollback()
+    return queries
+
+
+def _table_column(element):
+    """La Column de tabla real detrás de una expresión (quitando DESC/ASC y alias), o None.
+
+    Las PK de una sola columna se descartan: ya están indexadas y no aportan como prefijo.
+    """
+    if isinstance(element, UnaryExpression):
+        element = element.element
+    table = getattr(element, "table", None)
+    if isinstance(table, Alias) and isinstance(table.original, Table):
+        element, table = table.original.c.get(element.name), table.original
+    if not isinstance(element, Column) or not isinstance(table, Table):
+        return None
+    if element.primary_key and len(table.primary_key.columns) == 1:
+        return None
+    return element
+
+
+def _existing_indexes(inspector, table: str):
+    existing = [inspector.get_pk_constraint(table).get("constrained_columns") or []]
+    existing += [ix["column_names"] for ix in inspector.get_indexes(table)]
+    existing += [uc["column_names"] for uc in inspector.get_unique_constraints(table)]
+    return [cols for cols in existing if cols]
+
+
+def _covered(inspector, table: str, columns) -> bool:
+    # Basta con que un índice existente empiece por las mismas columnas.
+    return any(sorted(cols[:len(columns)]) == sorted(columns) for cols in _existing_indexes(inspector, table))
+
+
+def recommend_indexes(queries):
+    """Índices compuestos para las tablas con scan completo o sort: columnas de igualdad (WHERE y
+    JOIN) primero y después las del ORDER BY, si ningún índice existente las cubre ya como prefijo.
+
+    Devuelve {(tabla, (columnas...)): [consultas que lo motivan]}.
+    """
+    inspector = inspect(db.engine)
+    known_tables = set(inspector.get_table_names())
+    recommendations = {}
+    for query in queries:
+        for table, columns in query.automatic_indexes:
+            if table in known_tables and columns and not _covered(inspector, table, columns):
+                recommendations.setdefault((table, columns), []).append(query)
+        if not (query.scans or query.sorts) or query.statement is None:
+            continue
+
+        aliases, equality, ordering = {}, {}, {}
+        for element in visitors.iterate(query.statement):
+            if isinstance(element, Alias) and isinstance(element.original, Table):
+                aliases[element.name] = element.original.name
+            elif isinstance(element, BinaryExpression) and element.operator in _EQ_OPERATORS:
+                for side in (element.left, element.right):
+                    column = _table_column(side)
+                    if column is not None:
+                        equality.setdefault(column.table.name, []).append(column.name)
+            elif isinstance(element, Select):
+                for clause in element._order_by_clauses:
+                    column = _table_column(clause)
+                    if column is not None:
+                        ordering.setdefault(column.table.name, []).append(column.name)
+
+        scanned = {aliases.get(t, t) for t in query.scans} & known_tables
+        sorted_tables = set(ordering) if query.sorts else set()
+        for table in scanned | sorted_tables:
+            columns = equality.get(table, []) + (ordering.get(table, []) if table in sorted_tables else [])
+            columns = tuple(dict.fromkeys(columns))
+            if not columns:
+                continue
+            if _covered(inspector, table, columns):
+                continue
+            recommendations.setdefault((table, columns), []).append(query)
+
+    # Un índice que es prefijo de otro recomendado para la misma tabla sobra.
+    for table, columns in list(recommendations):
+        longer = [c for t, c in recommendations if t == table and len(c) > len(columns) and c[:len(columns)] == columns]
+        if longer:
+            recommendations[(table, longer[0])].extend(recommendations.pop((table, columns)))
+    return recommendations
+
+
+def index_name(table: str, columns) -> str:
+    return f"ix_{table}_{'_'.join(columns)}"[:63]
+
+
+def write_migration(recommendations, directory: str, message: str):
+    """Genera una revisión de Alembic (encima del head actual) que crea los índices recomendados."""
+    from alembic import util
+    from alembic.script import ScriptDirectory
+
+    config = current_app.extensions["migrate"].migrate.get_config(directory)
+    script = ScriptDirectory.from_config(config)
+    upgrades = [
+        f"op.create_index({index_name(t, c)!r}, {t!r}, {list(c)!r}, unique=False)" for t, c in sorted(recommendations)
+    ]
+    downgrades = [f"op.drop_index({index_name(t, c)!r}, table_name={t!r})" for t, c in sorted(recommendations, reverse=True)]
+    revision = script.generate_revision(
+        util.rev_id(),
+        message,
+        head="head",
+        upgrades="\n    ".join(upgrades),
+        downgrades="\n    ".join(downgrades),
+    )
+    return revision.path
@@ -4,7 +4,10 @@ from flask_mail import Mail
 from flask_login import LoginManager
 from flask_migrate import Migrate
 
+from app.shared_cache import SharedCache
+
 db = SQLAlchemy()
 mail = Mail()
 login = LoginManager()
 migrate = Migrate()
+cache = SharedCache()  # compartida por los workers del host (fichero SQLite)
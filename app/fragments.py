@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, has_request_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.metrics import FRAGMENT_CACHE
+from app.snapshots import mark_degraded
+from app.versions import content_version
+
+
+logger = logging.getLogger("app.fragments")
+
+
+class FragmentCache:
+    """LRU en memoria (por proceso) de fragmentos HTML ya renderizados.
+
+    Acotado por número de entradas y por bytes; cada entrada puede llevar además un TTL.
+    La invalidación va en la clave: quien cachea incluye las versiones del contenido del
+    que depende el fragmento (ver `fragment_version`).
+    """
+
+    def __init__(self, max_entries: int = 2000, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] < time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, expires)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        value, _expires = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+fragment_cache = FragmentCache()
+
+
+def fragment_version(*kinds: str):
+    """`content_version` para usar en claves de `{% cache %}`, calculada una vez por petición.
+
+    Si la BD no responde el fragmento se renderiza sin caché (y la página no se guarda como snapshot).
+    """
+    memo = g.setdefault("fragment_versions", {}) if has_request_context() else {}
+    if kinds not in memo:
+        try:
+            memo[kinds] = content_version(*kinds)
+        except SQLAlchemyError as e:
+            logger.warning("Could not compute content version for %s: %s", ",".join(kinds), e)
+            mark_degraded()
+            if has_request_context():
+                g.fragment_cache_bypass = True
+            memo[kinds] = None
+    return memo[kinds]
+
+
+class FragmentCacheExtension(Extension):
+    """`{% cache key[, ttl] %}...{% endcache %}`: guarda el HTML del bloque en `fragment_cache`.
+
+    `key` es cualquier expresión hashable (p. ej. una lista con un nombre y las versiones de
+    las que depende); se combina con la plantilla y la línea del tag. `ttl` en segundos; sin
+    él se usa FRAGMENT_CACHE_TTL y con 0 la entrada solo sale por LRU o al cambiar la clave.
+    """
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        args.append(parser.parse_expression() if parser.stream.skip_if("comma") else nodes.Const(None))
+        args.append(nodes.Const(f"{parser.name}:{lineno}"))
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_render", args), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, ttl, location, caller):
+        config = current_app.config
+        if not config.get("FRAGMENT_CACHE_ENABLED", True) or g.get("fragment_cache_bypass"):
+            return caller()
+        full_key = (location, _hashable(key))
+        html = fragment_cache.get(full_key)
+        if html is not None:
+            FRAGMENT_CACHE.labels(fragment=location, result="hit").inc()
+            return html
+        FRAGMENT_CACHE.labels(fragment=location, result="miss").inc()
+        html = caller()
+        if not g.get("fragment_cache_bypass"):
+            fragment_cache.set(full_key, html, config.get("FRAGMENT_CACHE_TTL", 300) if ttl is None else ttl)
+        return html
+
+
+def _hashable(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    return value
+
+
+def init_app(app):
+    fragment_cache.max_entries = app.config.get("FRAGMENT_CACHE_MAX_ENTRIES", 2000)
+    fragment_cache.max_bytes = app.config.get("FRAGMENT_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.globals["fragment_version"] = fragment_version
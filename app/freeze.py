@@ -0,0 +1,307 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import url_for
+from sqlalchemy import func, select
+
+from app.blog.routes import DEFAULT_PER_PAGE
+from app.extensions import db
+from app.models import BlogPost, BlogTag, Project, RelatedItem, Technology, post_tags, project_technologies
+from app.projects.routes import PROJECT_CATEGORIES, PROJECTS_PER_PAGE
+
+
+MANIFEST_NAME = ".freeze-manifest.json"
+
+# Páginas sin dependencias de la base de datos. main.index se congela como "/" (url_for daría "/home").
+_STATIC_ENDPOINTS = ["main.about"]
+_PROJECT_ENDPOINTS = ["main.resume"]
+
+
+def output_path(output_dir: str, url: str) -> str:
+    """`/blog/` -> blog/index.html, `/blog/x` -> blog/x/index.html, `/blog/rss.xml` -> blog/rss.xml."""
+    path = url.lstrip("/")
+    if not path or path.endswith("/"):
+        path += "index.html"
+    elif "." not in path.rsplit("/", 1)[-1]:
+        path += "/index.html"
+    return os.path.join(output_dir, *path.split("/"))
+
+
+def _pages(total: int, per_page: int = DEFAULT_PER_PAGE) -> int:
+    return max(1, (total + per_page - 1) // per_page)
+
+
+def _listing_urls(endpoint: str, total: int, per_page: int = DEFAULT_PER_PAGE, **values):
+    urls = [url_for(endpoint, **values)]
+    urls += [url_for(endpoint, page=n, **values) for n in range(2, _pages(total, per_page) + 1)]
+    return urls
+
+
+def _project_listing_urls(state: dict):
+    """/projects/ y cada categoría del filtro (aunque esté vacía: el botón enlaza a ella), con sus páginas.
+
+    Lo mismo para cada tecnología, sola y combinada con cada categoría: las fichas y el filtro
+    enlazan a todas, y los botones de categoría conservan la tecnología elegida.
+    """
+    counts = state.get("project_categories", {})
+    categories = sorted(set(counts) | {slug for slug, _ in PROJECT_CATEGORIES})
+    urls = _listing_urls("projects.projects_home", sum(counts.values()), PROJECTS_PER_PAGE)
+    for category in categories:
+        urls += _listing_urls("projects.projects_home", counts.get(category, 0), PROJECTS_PER_PAGE, category=category)
+    for tech, by_category in sorted(state.get("project_techs", {}).items()):
+        urls += _listing_urls("projects.projects_home", sum(by_category.values()), PROJECTS_PER_PAGE, tech=tech)
+        for category in categories:
+            urls += _listing_urls(
+                "projects.projects_home", by_category.get(category, 0), PROJECTS_PER_PAGE, category=category, tech=tech
+            )
+    return urls
+
+
+def _project_digest(row) -> str:
+    return hashlib.sha1(json.dumps([str(v) for v in row], ensure_ascii=False).encode()).hexdigest()
+
+
+def snapshot_state():
+    """Estado actual de las filas de las que dependen las páginas públicas (sin cargar objetos ORM)."""
+    posts = {}
+    for post_id, slug, updated_at in db.session.execute(
+        select(BlogPost.id, BlogPost.slug, BlogPost.updated_at).where(BlogPost.is_published.is_(True))
+    ):
+        posts[str(post_id)] = {"slug": slug, "updated_at": updated_at.isoformat() if updated_at else None, "tags": []}
+    for post_id, tag_slug in db.session.execute(
+        select(post_tags.c.post_id, BlogTag.slug).join(BlogTag, BlogTag.id == post_tags.c.tag_id)
+    ):
+        if str(post_id) in posts:
+            posts[str(post_id)]["tags"].append(tag_slug)
+
+    projects = {
+        str(row[0]): _project_digest(row)
+        for row in db.session.execute(
+            select(
+                Project.id, Project.title, Project.slug, Project.description, Project.long_description,
+                Project.technologies, Project.github_url, Project.website_url, Project.created_at,
+                Project.category_slug,
+            )
+        )
+    }
+    images = dict(db.session.execute(
+        select(Project.id, func.count()).select_from(Project).join(Project.images).group_by(Project.id)
+    ).all())
+    code = dict(db.session.execute(
+        select(Project.id, func.count()).select_from(Project).join(Project.code).group_by(Project.id)
+    ).all())
+    for project_id in projects:
+        # Los cambios en imágenes y snippets no tocan la fila del proyecto: los incluimos en el digest.
+        projects[project_id] += f":{images.get(int(project_id), 0)}:{code.get(int(project_id), 0)}"
+
+    project_categories = dict(
+        db.session.execute(select(Project.category_slug, func.count()).group_by(Project.category_slug)).all()
+    )
+    project_techs = {}
+    for tech, category, total in db.session.execute(
+        select(Technology.slug, Project.category_slug, func.count())
+        .select_from(project_technologies)
+        .join(Technology, Technology.id == project_technologies.c.technology_id)
+        .join(Project, Project.id == project_technologies.c.project_id)
+        .group_by(Technology.slug, Project.category_slug)
+    ):
+        project_techs.setdefault(tech, {})[category] = total
+
+    tags = sorted(db.session.execute(select(BlogTag.id, BlogTag.name, BlogTag.slug)).all())
+    tags_digest = hashlib.sha1(json.dumps([list(t) for t in tags], ensure_ascii=False).encode()).hexdigest()
+
+    # Cada detalle enlaza a sus relacionados (título, extracto): depende también de esas filas.
+    related = {"post": {}, "project": {}}
+    for kind, item_id, related_id in db.session.execute(
+        select(RelatedItem.kind, RelatedItem.item_id, RelatedItem.related_id).order_by(
+            RelatedItem.kind, RelatedItem.item_id, RelatedItem.rank
+        )
+    ):
+        related.setdefault(kind, {}).setdefault(str(item_id), []).append(str(related_id))
+    return {
+        "posts": posts,
+        "projects": projects,
+        "project_categories": project_categories,
+        "project_techs": project_techs,
+        "tags_digest": tags_digest,
+        "related": related,
+    }
+
+
+def all_urls(state: dict):
+    """Todas las URLs públicas a congelar para `state`."""
+    urls = ["/"] + [url_for(e) for e in _STATIC_ENDPOINTS + _PROJECT_ENDPOINTS]
+    urls += _project_listing_urls(state)
+    urls += [url_for("projects.project_detail", project_id=int(pid)) for pid in state["projects"]]
+    urls += _blog_listing_urls(state, all_tags=True)
+    urls.append(url_for("blog.rss"))
+    urls += [url_for("blog.post_detail", slug=p["slug"]) for p in state["posts"].values()]
+    return urls
+
+
+def _blog_listing_urls(state: dict, tag_slugs=(), all_tags: bool = False):
+    urls = _listing_urls("blog.index", len(state["posts"]))
+    tag_totals = {}
+    for post in state["posts"].values():
+        for slug in post["tags"]:
+            tag_totals[slug] = tag_totals.get(slug, 0) + 1
+    wanted = tag_totals if all_tags else {s: tag_totals.get(s, 0) for s in tag_slugs}
+    for slug, total in sorted(wanted.items()):
+        urls += _listing_urls("blog.index", total, tag=slug)
+    return urls
+
+
+def _related_neighbours(previous: dict, current: dict, kind: str, changed: set):
+    """Ids cuya lista de relacionados cambió o contiene (antes o ahora) alguno de `changed`."""
+    old = previous.get("related", {}).get(kind, {})
+    new = current.get("related", {}).get(kind, {})
+    ids = set()
+    for item_id in set(old) | set(new):
+        old_list, new_list = old.get(item_id, []), new.get(item_id, [])
+        if old_list != new_list or changed.intersection(old_list) or changed.intersection(new_list):
+            ids.add(item_id)
+    return ids
+
+
+def affected_urls(previous: dict, current: dict):
+    """URLs a re-renderizar a partir de lo que cambió entre dos estados."""
+    urls = set()
+
+    old_posts, new_posts = previous.get("posts", {}), current["posts"]
+    changed_posts = {pid for pid in set(old_posts) | set(new_posts) if old_posts.get(pid) != new_posts.get(pid)}
+    if changed_posts or previous.get("tags_digest") != current["tags_digest"]:
+        touched_tags = set()
+        for pid in changed_posts:
+            for state in (old_posts.get(pid), new_posts.get(pid)):
+                if state:
+                    touched_tags.update(state["tags"])
+        tags_changed = previous.get("tags_digest") != current["tags_digest"]
+        urls.update(_blog_listing_urls(current, touched_tags, all_tags=tags_changed))
+        urls.add(url_for("blog.rss"))
+        # Si cambian los tags, su nombre aparece en cada post: se re-renderizan todos.
+        detail_ids = set(new_posts) if tags_changed else changed_posts & set(new_posts)
+        urls.update(url_for("blog.post_detail", slug=new_posts[pid]["slug"]) for pid in detail_ids)
+    neighbours = _related_neighbours(previous, current, "post", changed_posts) & set(new_posts)
+    urls.update(url_for("blog.post_detail", slug=new_posts[pid]["slug"]) for pid in neighbours)
+
+    old_projects, new_projects = previous.get("projects", {}), current["projects"]
+    changed_projects = {
+        pid for pid in set(old_projects) | set(new_projects) if old_projects.get(pid) != new_projects.get(pid)
+    }
+    if changed_projects:
+        urls.update(url_for(e) for e in _PROJECT_ENDPOINTS)
+        urls.update(_project_listing_urls(current))
+        urls.update(
+            url_for("projects.project_detail", project_id=int(pid)) for pid in changed_projects & set(new_projects)
+        )
+    neighbours = _related_neighbours(previous, current, "project", changed_projects) & set(new_projects)
+    urls.update(url_for("projects.project_detail", project_id=int(pid)) for pid in neighbours)
+    # La portada resume posts y proyectos: cualquier cambio la afecta.
+    if urls:
+        urls.add("/")
+    return urls
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def render_urls(app, urls, output_dir: str, workers: int = 8, base_url: str = "http://localhost/"):
+    """Renderiza `urls` con el test client (como visitante anónimo) en un pool de hilos."""
+    local = threading.local()
+
+    def render(url):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        response = client.get(url, base_url=base_url)
+        try:
+            if response.status_code != 200:
+                return url, response.status_code
+            _write_atomic(output_path(output_dir, url), response.get_data())
+            return url, 200
+        finally:
+            response.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(render, sorted(urls)))
+
+
+def copy_static(app, output_dir: str) -> int:
+    """Copia app/static al árbol de salida; solo los ficheros nuevos o modificados."""
+    source_root = app.static_folder
+    target_root = os.path.join(output_dir, (app.static_url_path or "/static").strip("/"))
+    copied = 0
+    for root, _dirs, files in os.walk(source_root):
+        for name in files:
+            source = os.path.join(root, name)
+            target = os.path.join(target_root, os.path.relpath(source, source_root))
+            try:
+                src_stat = os.stat(source)
+                dst_stat = os.stat(target)
+                if dst_stat.st_size == src_stat.st_size and dst_stat.st_mtime >= src_stat.st_mtime:
+                    continue
+            except FileNotFoundError:
+                pass
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(source, target)
+            copied += 1
+    return copied
+
+
+def load_manifest(output_dir: str) -> dict:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def freeze(app, output_dir: str, workers: int = 8, full: bool = False, base_url: str = "http://localhost/"):
+    """Congela el sitio en `output_dir`. Sin `full`, solo re-renderiza lo afectado desde la última ejecución."""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {} if full else load_manifest(output_dir)
+
+    with app.test_request_context(base_url=base_url):
+        state = snapshot_state()
+        current_urls = set(all_urls(state))
+        previous_urls = set(manifest.get("urls", []))
+        if manifest:
+            to_render = affected_urls(manifest.get("state", {}), state) | (current_urls - previous_urls)
+        else:
+            to_render = current_urls
+        to_render &= current_urls
+        removed = previous_urls - current_urls
+
+    results = render_urls(app, to_render, output_dir, workers=workers, base_url=base_url)
+    failed = [(url, status) for url, status in results if status != 200]
+
+    for url in removed:
+        try:
+            os.remove(output_path(output_dir, url))
+        except FileNotFoundError:
+            pass
+
+    static_copied = copy_static(app, output_dir)
+    manifest = {
+        "frozen_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "urls": sorted(current_urls - {url for url, _ in failed}),
+        "state": state,
+    }
+    _write_atomic(os.path.join(output_dir, MANIFEST_NAME), json.dumps(manifest).encode())
+    return {
+        "rendered": len(results) - len(failed),
+        "failed": failed,
+        "removed": len(removed),
+        "total": len(current_urls),
+        "static_copied": static_copied,
+    }
@@ -1,8 +1,15 @@
 from flask import Blueprint, render_template, send_from_directory, current_app, request, flash, redirect, url_for
 import os
 from flask_mail import Message
-from app import mail
+from app import mail, read_models
 from app.extensions import db
+from app.metrics import time_mail
+from app.query_budget import query_budget
+from app.sitemap import serve_sitemap
+from app.snapshots import stale_response
+from app.streaming import render_page
+from sqlalchemy.exc import OperationalError
+from app.timing import timed_io
 
 bp = Blueprint('main', __name__, template_folder='templates')
 
@@ -11,18 +18,10 @@ bp = Blueprint('main', __name__, template_folder='templates')
 def index():
     return render_template('index.html', title='Home')
 
-@bp.route('/index')
-def index_legacy():
-    return redirect(url_for('main.index'), code=301)
-
 @bp.route('/about')
 def about():
     return render_template('about.html', title='About')
 
-@bp.route('/sobre-mi')
-def about_legacy():
-    return redirect(url_for('main.about'), code=301)
-
 @bp.route('/contact', methods=['GET', 'POST'])
 def contact():
     if request.method == 'POST':
@@ -50,7 +49,8 @@ def contact():
         msg.reply_to = email
 
         try:
-            mail.send(msg)
+            with time_mail():
+                mail.send(msg)
             flash(f'Thanks {name}! Your message has been sent successfully.', 'success')
         except Exception as e:
             print(f"Error enviando correo: {e}")
@@ -60,57 +60,60 @@ def contact():
 
     return render_template('contact.html', title='Contact')
 
-@bp.route('/contacto')
-def contact_legacy():
-    return redirect(url_for('main.contact'), code=301)
+@bp.route('/sitemap.xml')
+def sitemap():
+    return serve_sitemap()
+
+@bp.route('/sitemap-<int:n>.xml')
+def sitemap_part(n):
+    return serve_sitemap(n)
 
 @bp.route('/download-cv')
 def download_cv():
     path = current_app.config.get('DOCUMENTS_FOLDER') or os.path.join(current_app.root_path, 'static', 'documents')
     filename = current_app.config.get('CV_FILENAME') or 'cv_angel.pdf'
     full_path = os.path.join(path, filename)
-    if not os.path.exists(full_path):
+    with timed_io('cv'):
+        cv_available = os.path.exists(full_path)
+    if not cv_available:
         flash('Resume file is not available yet. You can still reach out via the contact form.', 'info')
         return redirect(url_for('main.resume'))
     return send_from_directory(path, filename, as_attachment=True)
 
-@bp.route('/descargar-cv')
-def download_cv_legacy():
-    return redirect(url_for('main.download_cv'), code=301)
-
 @bp.route('/resume')
+@query_budget(6)
 def resume():
     recent_projects = []
     try:
-        from app.models import Project
-
-        recent_projects = (
-            Project.query.order_by(Project.created_at.desc())
-            .limit(3)
-            .all()
-        )
+        recent_projects = read_models.recent_projects(3)
+    except OperationalError:
+        stale = stale_response()
+        if stale is not None:
+            return stale
     except Exception:
         recent_projects = []
 
     documents_dir = current_app.config.get('DOCUMENTS_FOLDER') or os.path.join(current_app.root_path, 'static', 'documents')
     cv_filename = current_app.config.get('CV_FILENAME') or 'cv_angel.pdf'
     cv_path = os.path.join(documents_dir, cv_filename)
-    cv_exists = os.path.exists(cv_path)
     cv_size_display = None
-    if cv_exists:
-        try:
-            size = os.path.getsize(cv_path)
-            if size < 1024:
-                cv_size_display = f"{size} B"
-            elif size < 1024 * 1024:
-                cv_size_display = f"{round(size / 1024)} KB"
-            else:
-                cv_size_display = f"{size / (1024 * 1024):.1f} MB"
-        except Exception:
-            cv_size_display = None
-
-    return render_template(
+    with timed_io('cv'):
+        cv_exists = os.path.exists(cv_path)
+        if cv_exists:
+            try:
+                size = os.path.getsize(cv_path)
+                if size < 1024:
+                    cv_size_display = f"{size} B"
+                elif size < 1024 * 1024:
+                    cv_size_display = f"{round(size / 1024)} KB"
+                else:
+                    cv_size_display = f"{size / (1024 * 1024):.1f} MB"
+            except Exception:
+                cv_size_display = None
+
+    return render_page(
         'resume.html',
+        versions=[('projects',)],
         title='Resume',
         recent_projects=recent_projects,
         cv_exists=cv_exists,
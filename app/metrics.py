@@ -0,0 +1,136 @@
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, abort, g, request
+from flask_login import current_user
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+
+from app.extensions import db
+
+
+# Con PROMETHEUS_MULTIPROC_DIR definido (ver gunicorn.conf.py) cada worker escribe
+# sus valores en ficheros mmap y /metrics los agrega; sin él se usa el registro normal.
+_MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_PROXY_HEADERS = ("X-Forwarded-For", "X-Real-IP", "Forwarded")
+_LOCAL_ADDRS = {"127.0.0.1", "::1"}
+
+REQUESTS = Counter(
+    "cvweb_http_requests_total",
+    "HTTP requests by endpoint, method and status code.",
+    ["endpoint", "method", "status"],
+)
+LATENCY = Histogram(
+    "cvweb_http_request_duration_seconds",
+    "Request latency by endpoint.",
+    ["endpoint"],
+    buckets=_LATENCY_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "cvweb_db_pool_checked_out",
+    "SQLAlchemy connections currently checked out.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "cvweb_db_pool_overflow",
+    "SQLAlchemy overflow connections currently open.",
+    multiprocess_mode="livesum",
+)
+UPLOAD_BYTES = Counter(
+    "cvweb_upload_bytes_total",
+    "Bytes written to disk by admin uploads.",
+    ["kind"],
+)
+MAIL_LATENCY = Histogram(
+    "cvweb_mail_send_duration_seconds",
+    "Time spent sending contact form mail.",
+    ["outcome"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+FRAGMENT_CACHE = Counter(
+    "cvweb_fragment_cache_total",
+    "Template fragment cache lookups by fragment (template:line) and result.",
+    ["fragment", "result"],
+)
+
+
+def record_upload(kind: str, path: str):
+    """Suma al contador el tamaño de un fichero recién guardado."""
+    try:
+        UPLOAD_BYTES.labels(kind=kind).inc(os.path.getsize(path))
+    except OSError:
+        pass
+
+
+@contextmanager
+def time_mail():
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "sent"
+    finally:
+        MAIL_LATENCY.labels(outcome=outcome).observe(time.perf_counter() - start)
+
+
+def _update_pool_gauges(pool, returning: int = 0):
+    # El evento "checkin" se emite antes de devolver la conexión al pool.
+    checked_out = getattr(pool, "checkedout", None)
+    overflow = getattr(pool, "overflow", None)
+    if checked_out is not None:
+        DB_POOL_CHECKED_OUT.set(max(0, checked_out() - returning))
+    if overflow is not None:
+        DB_POOL_OVERFLOW.set(max(0, overflow()))
+
+
+def _registry():
+    if not _MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def init_app(app):
+    if not app.config.get("METRICS_ENABLED"):
+        return
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _update_pool_gauges(engine.pool)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        _update_pool_gauges(engine.pool, returning=1)
+
+    @app.before_request
+    def _start_metrics():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_metrics(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None and request.endpoint != "metrics":
+            endpoint = request.endpoint or "unmatched"
+            LATENCY.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+            REQUESTS.labels(endpoint=endpoint, method=request.method, status=str(response.status_code)).inc()
+        return response
+
+    @app.get("/metrics")
+    def metrics():
+        # Una petición reenviada por un proxy también llega desde 127.0.0.1: no cuenta como local.
+        is_local = (
+            app.config.get("METRICS_ALLOW_LOCAL")
+            and request.remote_addr in _LOCAL_ADDRS
+            and not any(h in request.headers for h in _PROXY_HEADERS)
+        )
+        if not (is_local or current_user.is_authenticated):
+            abort(404)
+        return Response(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
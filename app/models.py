@@ -8,6 +8,19 @@ post_tags = db.Table(
     "post_tags",
     db.Column("post_id", db.Integer, db.ForeignKey("blog_posts.id"), primary_key=True),
     db.Column("tag_id", db.Integer, db.ForeignKey("blog_tags.id"), primary_key=True),
+    # La PK empieza por post_id; el filtro por etiqueta del blog entra por tag_id
+    db.Index("ix_post_tags_tag_id", "tag_id"),
+)
+
+
+# Normalización de Project.technologies (ver app/technologies.py); position conserva el orden del texto
+project_technologies = db.Table(
+    "project_technologies",
+    db.Column("project_id", db.Integer, db.ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("technology_id", db.Integer, db.ForeignKey("technologies.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("position", db.Integer, nullable=False, default=0),
+    # La PK empieza por project_id; el filtro ?tech= de /projects/ entra por technology_id
+    db.Index("ix_project_technologies_technology_id", "technology_id"),
 )
 
 
@@ -24,22 +37,34 @@ class User(UserMixin, db.Model):
 
 class Project(db.Model):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Listado filtrado por categoría y ordenado por fecha (projects_home)
+        db.Index("ix_projects_category_created", "category_slug", "created_at"),
+        # Listados sin filtro (resume, dashboard): solo por fecha
+        db.Index("ix_projects_created_at", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     slug = db.Column(db.String(100), unique=True, nullable=False)
     description = db.Column(db.String(255), nullable=False) # Descripción corta
     long_description = db.Column(db.Text) # Markdown o HTML completo
-    technologies = db.Column(db.String(200)) # Ej: "Python, Flask, Docker"
+    technologies = db.Column(db.String(200)) # Ej: "Python, Flask, Docker". Se edita como texto; sync_technologies lo normaliza
     github_url = db.Column(db.String(255))
     website_url = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow) # <--- Automático
+    # Cualquier cambio de texto la mueve: entra en la versión "projects" de las cachés y en el sitemap
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     category_slug = db.Column(db.String(50), nullable=False) # Ej: "web-dev", "data-science"
 
     # Relaciones
     # cascade="all, delete" significa que si borras el proyecto, se borran sus imágenes y código
     images = db.relationship("ProjectImage", backref="project", lazy=True, cascade="all, delete-orphan")
     code = db.relationship("ProjectCode", backref="project", lazy=True, cascade="all, delete-orphan")
+    # Solo lectura: los enlaces los escribe sync_technologies a partir de `technologies`
+    tech_stack = db.relationship(
+        "Technology", secondary=project_technologies, order_by=project_technologies.c.position, lazy=True, viewonly=True
+    )
 
     def __repr__(self):
         return f'<Project {self.title}>'
@@ -49,7 +74,7 @@ class ProjectImage(db.Model):
     __tablename__ = "project_images"
 
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey("projects.id"), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey("projects.id"), nullable=False, index=True)
     image_path = db.Column(db.String(255), nullable=False)
     caption = db.Column(db.String(255))
 
@@ -64,12 +89,29 @@ class ProjectCode(db.Model):
     language = db.Column(db.String(50)) # Ej: "python", "javascript"
 
 
+class Technology(db.Model):
+    __tablename__ = "technologies"
+    # Barra de filtros de /projects/: las más usadas primero
+    __table_args__ = (db.Index("ix_technologies_project_count_name", "project_count", "name"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), unique=True, nullable=False)
+    slug = db.Column(db.String(80), unique=True, nullable=False, index=True)
+    # Precalculado por sync_technologies: nº de proyectos que la usan
+    project_count = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<Technology {self.slug}>"
+
+
 class BlogTag(db.Model):
     __tablename__ = "blog_tags"
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), unique=True, nullable=False, index=True)
     slug = db.Column(db.String(80), unique=True, nullable=False, index=True)
+    # Un renombrado no cambia los ids: esta fecha es la que invalida la nube de tags cacheada
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     def __repr__(self):
         return f"<BlogTag {self.slug}>"
@@ -77,6 +119,10 @@ class BlogTag(db.Model):
 
 class BlogPost(db.Model):
     __tablename__ = "blog_posts"
+    # Listado público y RSS: publicados ordenados por fecha de publicación
+    __table_args__ = (
+        db.Index("ix_blog_posts_is_published_published_at_created_at", "is_published", "published_at", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     slug = db.Column(db.String(120), unique=True, nullable=False, index=True)
@@ -91,9 +137,82 @@ class BlogPost(db.Model):
     published_at = db.Column(db.DateTime)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Indexada: max(updated_at) entra en la huella de app/versions.py
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
 
     tags = db.relationship("BlogTag", secondary=post_tags, lazy="joined")
 
     def __repr__(self):
         return f"<BlogPost {self.slug}>"
+
+
+# Paginación por cursor del API (/api/v1/posts): orden por la fecha mostrada y el id
+db.Index(
+    "ix_blog_posts_is_published_display_date_id",
+    BlogPost.is_published,
+    db.func.coalesce(BlogPost.published_at, BlogPost.created_at),
+    BlogPost.id,
+)
+
+
+class RelatedItem(db.Model):
+    """Top-N de contenido relacionado, precalculado (ver app/related.py). kind: "post" | "project"."""
+    __tablename__ = "related_items"
+
+    kind = db.Column(db.String(16), primary_key=True)
+    item_id = db.Column(db.Integer, primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    related_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+
+class RelatedFeature(db.Model):
+    """Índice invertido rasgo -> (item, peso tf-idf normalizado) de los relacionados (ver app/related.py).
+
+    Lo escribe la reconstrucción completa y lo mantiene al día el guardado de cada item.
+    """
+    __tablename__ = "related_features"
+    __table_args__ = (db.Index("ix_related_features_kind_item_id", "kind", "item_id"),)
+
+    kind = db.Column(db.String(16), primary_key=True)
+    feature = db.Column(db.String(96), primary_key=True)
+    item_id = db.Column(db.Integer, primary_key=True)
+    weight = db.Column(db.Float, nullable=False)
+
+
+class RelatedTerm(db.Model):
+    """Frecuencia documental de cada rasgo en la última reconstrucción completa (el idf del guardado incremental).
+
+    Solo rasgos presentes en 2 o más documentos; la fila con feature "*" guarda el total de documentos.
+    """
+    __tablename__ = "related_terms"
+
+    kind = db.Column(db.String(16), primary_key=True)
+    feature = db.Column(db.String(96), primary_key=True)
+    df = db.Column(db.Integer, nullable=False)
+
+
+class PageViewCount(db.Model):
+    """Visitas acumuladas por post/proyecto. Se escribe en lotes desde app/pageviews.py, nunca por petición."""
+    __tablename__ = "page_view_counts"
+    __table_args__ = (db.Index("ix_page_view_counts_kind_views", "kind", "views"),)
+
+    kind = db.Column(db.String(16), primary_key=True)
+    item_id = db.Column(db.Integer, primary_key=True)
+    views = db.Column(db.BigInteger, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class Redirect(db.Model):
+    """Redirección servida antes del routing (ver app/redirects.py). Con is_prefix, `source` es un prefijo de ruta."""
+    __tablename__ = "redirects"
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(255), unique=True, nullable=False, index=True)
+    target = db.Column(db.String(500), nullable=False)
+    is_prefix = db.Column(db.Boolean, default=False, nullable=False)
+    status_code = db.Column(db.Integer, default=301, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<Redirect {self.source} -> {self.target}>"
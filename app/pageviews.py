@@ -0,0 +1,191 @@
+import atexit
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import request
+from flask_login import current_user
+from sqlalchemy import select, update
+
+from app.extensions import db
+from app.models import BlogPost, PageViewCount
+
+
+logger = logging.getLogger("app.pageviews")
+
+_BOT_RE = re.compile(
+    r"bot|crawl|spider|slurp|archiver|fetch|monitor|preview|scanner|headless|lighthouse|pingdom|"
+    r"curl|wget|httpie|python-requests|python-urllib|aiohttp|go-http-client|java/|okhttp|libwww|"
+    r"facebookexternalhit|whatsapp|telegram|discord|slack|"
+    # Test client de Werkzeug: freeze, bench, bench_ttfb, bench_cost, explain
+    r"werkzeug/",
+    re.IGNORECASE,
+)
+
+
+def is_countable_request() -> bool:
+    """Filtra lo que no es una visita humana antes de tocar el buffer."""
+    if request.method != "GET":
+        return False
+    user_agent = request.headers.get("User-Agent", "")
+    if not user_agent or _BOT_RE.search(user_agent):
+        return False
+    # Prefetch/prerender del navegador: no es una lectura real.
+    if "prefetch" in (request.headers.get("Sec-Purpose") or request.headers.get("Purpose") or "").lower():
+        return False
+    # Las visitas del propio admin no cuentan.
+    return not current_user.is_authenticated
+
+
+def _upsert(rows):
+    """Suma `rows` (kind, item_id, views) a page_view_counts con una sola sentencia si el dialecto lo permite."""
+    now = datetime.utcnow()
+    values = [{"kind": kind, "item_id": item_id, "views": views, "updated_at": now} for kind, item_id, views in rows]
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(PageViewCount).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PageViewCount.kind, PageViewCount.item_id],
+            set_={"views": PageViewCount.views + stmt.excluded.views, "updated_at": stmt.excluded.updated_at},
+        )
+        db.session.execute(stmt)
+        return
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(PageViewCount).values(values)
+        stmt = stmt.on_duplicate_key_update(
+            views=PageViewCount.views + stmt.inserted.views, updated_at=stmt.inserted.updated_at
+        )
+        db.session.execute(stmt)
+        return
+    for row in values:
+        result = db.session.execute(
+            update(PageViewCount)
+            .where(PageViewCount.kind == row["kind"], PageViewCount.item_id == row["item_id"])
+            .values(views=PageViewCount.views + row["views"], updated_at=now)
+        )
+        if not result.rowcount:
+            db.session.add(PageViewCount(**row))
+
+
+class PopularPosts:
+    """Top de posts más vistos, precalculado por proceso. Se renueva tras cada volcado o al caducar."""
+
+    def __init__(self, limit: int = 5, max_age: float = 300):
+        self.limit = limit
+        self.max_age = max_age
+        self._items = []
+        self._built_at = None
+
+    def invalidate(self):
+        self._built_at = None
+
+    def refresh(self):
+        rows = db.session.execute(
+            select(BlogPost.slug, BlogPost.title, PageViewCount.views)
+            .join(PageViewCount, (PageViewCount.kind == "post") & (PageViewCount.item_id == BlogPost.id))
+            .where(BlogPost.is_published.is_(True))
+            .order_by(PageViewCount.views.desc())
+            .limit(self.limit)
+        ).all()
+        self._items = [{"slug": slug, "title": title, "views": int(views)} for slug, title, views in rows]
+        self._built_at = time.monotonic()
+
+    def get(self):
+        if self._built_at is None or time.monotonic() - self._built_at > self.max_age:
+            self.refresh()
+        return self._items
+
+
+popular_posts = PopularPosts()
+
+
+class ViewBuffer:
+    """Contadores de visitas en memoria, por worker, volcados en lote por un hilo cada `interval` segundos.
+
+    El hilo se arranca con la primera visita (ya dentro del worker, después del fork de
+    gunicorn). Al salir del worker se vuelca lo pendiente: atexit y el hook worker_exit.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.interval = 5.0
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get("PAGEVIEWS_ENABLED", True)
+        self.interval = float(app.config.get("PAGEVIEWS_FLUSH_SECONDS", 5))
+        popular_posts.max_age = app.config.get("POPULAR_POSTS_MAX_AGE", 300)
+        if self.enabled:
+            atexit.register(self.flush)
+
+    def add(self, kind: str, item_id: int):
+        if not self.enabled:
+            return
+        if self._pid != os.getpid():
+            # Proceso hijo: el lock, el buffer y el hilo heredados no sirven.
+            self._reset()
+        with self._lock:
+            self._counts[(kind, item_id)] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pageview-flush", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def pending(self) -> int:
+        return sum(self._counts.values())
+
+    def flush(self) -> int:
+        """Vuelca el buffer en un único UPSERT. Si falla, las cuentas vuelven al buffer."""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts or self.app is None:
+            return 0
+        try:
+            with self.app.app_context():
+                _upsert([(kind, item_id, views) for (kind, item_id), views in sorted(counts.items())])
+                db.session.commit()
+                popular_posts.refresh()
+        except Exception:
+            logger.exception("Error flushing %d page views", sum(counts.values()))
+            with self._lock:
+                self._counts.update(counts)
+            return 0
+        return len(counts)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+
+view_buffer = ViewBuffer()
+
+
+def count_view(kind: str, item_id: int):
+    if view_buffer.enabled and is_countable_request():
+        view_buffer.add(kind, item_id)
+
+
+def init_app(app):
+    view_buffer.init_app(app)
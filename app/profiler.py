@@ -0,0 +1,201 @@
+import fcntl
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app, g, request
+from flask_login import current_user
+
+from app.extensions import cache
+
+
+logger = logging.getLogger("app.profiler")
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_FLAG_ARG = "_profile"
+_WINDOW_ARG = "_profile_window"
+_FLAG_HEADER = "X-Profile"
+_WINDOW_HEADER = "X-Profile-Window"
+_TRUE = {"1", "true", "yes", "on"}
+
+
+class SamplingProfiler:
+    """Perfilador por muestreo de los hilos que atienden peticiones, uno por proceso.
+
+    Un hilo en segundo plano lee `sys._current_frames()` cada `interval` segundos y cuenta
+    la pila de cada hilo registrado con `start()`. Solo corre mientras hay algún hilo
+    registrado, así que fuera de las peticiones perfiladas no cuesta nada.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._targets = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self, ident: int) -> Counter:
+        samples = Counter()
+        with self._lock:
+            self._targets[ident] = samples
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        return samples
+
+    def stop(self, ident: int):
+        with self._lock:
+            return self._targets.pop(ident, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._targets:
+                    self._thread = None
+                    return
+                targets = list(self._targets.items())
+            frames = sys._current_frames()
+            for ident, samples in targets:
+                frame = frames.get(ident)
+                if frame is not None:
+                    samples[collapse(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_APP_ROOT + os.sep) and os.sep + "site-packages" + os.sep not in filename:
+        filename = os.path.relpath(filename, _APP_ROOT)
+    else:
+        filename = os.path.join(*filename.split(os.sep)[-2:]) if os.sep in filename else filename
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def collapse(frame) -> str:
+    """Pila en formato "collapsed" (raíz primero, marcos separados por ';') de flamegraph.pl/speedscope."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code).replace(";", ":"))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+profiler = SamplingProfiler()
+
+
+def profile_path(folder: str, endpoint: str, day: datetime = None) -> str:
+    return os.path.join(folder, f"{(day or datetime.now()):%Y%m%d}-{endpoint}.folded")
+
+
+def read_folded(path: str) -> Counter:
+    stacks = Counter()
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack and count.isdigit():
+                    stacks[stack] += int(count)
+    except FileNotFoundError:
+        pass
+    return stacks
+
+
+def merge_folded(path: str, samples: Counter):
+    """Suma `samples` al fichero de `path` bajo un flock, para que los workers agreguen en el mismo fichero."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        stacks = read_folded(path)
+        stacks.update(samples)
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for stack, count in stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+        os.replace(tmp, path)
+
+
+def list_profiles(folder: str):
+    """[(nombre, bytes, muestras, mtime)] de los ficheros .folded, los más recientes primero."""
+    rows = []
+    try:
+        names = os.listdir(folder)
+    except FileNotFoundError:
+        return rows
+    for name in names:
+        if not name.endswith(".folded"):
+            continue
+        path = os.path.join(folder, name)
+        stat = os.stat(path)
+        rows.append((name, stat.st_size, sum(read_folded(path).values()), stat.st_mtime))
+    rows.sort(key=lambda r: r[3], reverse=True)
+    return rows
+
+
+def _window_open(endpoint: str) -> bool:
+    memo = current_app.extensions["profiler_windows"]
+    now = time.monotonic()
+    cached = memo.get(endpoint)
+    if cached is None or now - cached[1] >= 1.0:
+        cached = (cache.get("profiler", f"window:{endpoint}") or 0, now)
+        memo[endpoint] = cached
+    return cached[0] > time.time()
+
+
+def _requested(name_arg: str, name_header: str):
+    return request.args.get(name_arg) or request.headers.get(name_header)
+
+
+def _start_profiling():
+    endpoint = request.endpoint
+    if endpoint is None or endpoint == "static":
+        return
+    config = current_app.config
+    wanted = False
+    if current_user.is_authenticated:
+        window = _requested(_WINDOW_ARG, _WINDOW_HEADER)
+        if window and window.isdigit():
+            seconds = min(int(window), config.get("PROFILER_MAX_WINDOW_SECONDS", 600))
+            cache.set("profiler", f"window:{endpoint}", time.time() + seconds, ttl=seconds)
+            current_app.extensions["profiler_windows"].pop(endpoint, None)
+            logger.warning("Profiling window of %ss opened for %s by %s", seconds, endpoint, current_user.get_id())
+            wanted = True
+        flag = _requested(_FLAG_ARG, _FLAG_HEADER)
+        wanted = wanted or (flag or "").lower() in _TRUE
+    if wanted or _window_open(endpoint):
+        g.profile_samples = profiler.start(threading.get_ident())
+
+
+def _finish_profiling(response):
+    if "profile_samples" in g:
+        profiler.stop(threading.get_ident())
+        if current_user.is_authenticated:
+            response.headers["X-Profile-Samples"] = str(sum(g.profile_samples.values()))
+    return response
+
+
+def _save_profile(exc):
+    samples = g.pop("profile_samples", None)
+    if samples is None:
+        return
+    profiler.stop(threading.get_ident())
+    if not samples:
+        return
+    try:
+        merge_folded(profile_path(current_app.config["PROFILER_FOLDER"], request.endpoint), samples)
+    except OSError:
+        logger.exception("Could not write profile for %s", request.endpoint)
+
+
+def init_app(app):
+    if not app.config.get("PROFILER_ENABLED", True):
+        return
+    app.config["PROFILER_FOLDER"] = app.config.get("PROFILER_FOLDER") or os.path.join(app.instance_path, "profiles")
+    profiler.interval = app.config.get("PROFILER_INTERVAL_MS", 5) / 1000
+    app.extensions["profiler_windows"] = {}
+    app.before_request(_start_profiling)
+    app.after_request(_finish_profiling)
+    app.teardown_request(_save_profile)
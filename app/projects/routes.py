@@ -1,25 +1,81 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request
+from sqlalchemy.exc import OperationalError
+from app import read_models
 from app.models import Project as Proyecto #Alias en español porque si no me lío jaja
-from app.extensions import db
+from app.pageviews import count_view
+from app.query_budget import query_budget
+from app.related import related_projects
+from app.snapshots import mark_degraded
+from app.streaming import render_page
 
 # --- Blueprint ---
 bp = Blueprint('projects', __name__, template_folder='templates')
 
 
+PROJECTS_PER_PAGE = 12
+
+# Botones del filtro: (category_slug, etiqueta)
+PROJECT_CATEGORIES = [
+    ('web-dev', 'Web Development'),
+    ('data-science', 'Data Science'),
+    ('data-engineer', 'Data Engineer'),
+    ('other', 'Other'),
+]
+
+# Botones del filtro por tecnología: las más usadas (Technology.project_count)
+TECHNOLOGY_FILTERS = 12
+
+
+def _grid_context(category=None, page=None, tech=None):
+    category = (category or request.args.get('category') or '').strip()
+    q = (request.args.get('q') or '').strip()
+    tech = (tech or request.args.get('tech') or '').strip()
+    try:
+        page = int(page or request.args.get('page') or 1)
+    except ValueError:
+        page = 1
+    # Tarjetas de solo lectura (app/read_models.py): filtro en la BD con el índice category_slug + created_at
+    # y la portada de cada tarjeta en una sola consulta extra.
+    proyectos, total, pages, page = read_models.project_page(category, q, page, PROJECTS_PER_PAGE, tech=tech)
+    return dict(
+        proyectos=proyectos,
+        categories=PROJECT_CATEGORIES,
+        category=category,
+        technologies=read_models.technology_counts(TECHNOLOGY_FILTERS, selected=tech),
+        tech=tech,
+        q=q,
+        total=total,
+        pages=pages,
+        page=page,
+    )
+
+
 @bp.route('/')
-def projects_home():
-    """Listado de proyectos obtenidos de la base de datos"""
-    
-    # Consulta a la Base de Datos 
-    # Esto carga TODOS los objetos 'Proyecto' de tu tabla.
-    proyectos = Proyecto.query.all() 
-    
-    return render_template(
-        'projects.html', 
+@bp.route('/page/<int:page>/')
+@bp.route('/category/<category>/')
+@bp.route('/category/<category>/page/<int:page>/')
+# Filtro por tecnología en la ruta (y no en ?tech=) para que el sitio congelado tenga esas páginas
+@bp.route('/tech/<tech>/')
+@bp.route('/tech/<tech>/page/<int:page>/')
+@bp.route('/category/<category>/tech/<tech>/')
+@bp.route('/category/<category>/tech/<tech>/page/<int:page>/')
+@query_budget(8)
+def projects_home(category=None, tech=None, page=None):
+    """Listado de proyectos: filtro por categoría/tecnología y búsqueda en el servidor, paginado"""
+    return render_page(
+        'projects.html',
+        versions=[('projects',)],
         title='Projects',
-        proyectos=proyectos
+        **_grid_context(category, page, tech)
     )
 
+
+@bp.route('/grid')
+@query_budget(8)
+def projects_grid():
+    """Solo la rejilla de tarjetas (y su paginación): la piden los filtros de projects.html por fetch"""
+    return render_template('_project_grid.html', **_grid_context())
+
 @bp.route('/<int:project_id>')
 def project_detail(project_id):
     """Detalle de un proyecto obtenido de la base de datos"""
@@ -27,9 +83,26 @@ def project_detail(project_id):
     #Consulta a la Base de Datos 
     # Busca el proyecto por su ID. Si no lo encuentra, lanza un error 404.
     proyecto = Proyecto.query.get_or_404(project_id)
+    count_view('project', proyecto.id)
+
+    # Relacionados precalculados (app/related.py): una sola consulta por la PK de related_items
+    try:
+        relacionados = related_projects(proyecto.id)
+    except OperationalError:
+        mark_degraded()
+        relacionados = []
+    
+    # Tecnologías normalizadas (tabla technologies), en el orden del texto; enlazan al filtro ?tech=
+    try:
+        tech_stack = proyecto.tech_stack
+    except OperationalError:
+        mark_degraded()
+        tech_stack = []
     
     return render_template(
         'project_detail.html', 
         title=proyecto.title, # Nota: Accedemos a los atributos como objetos, no diccionarios
-        proyecto=proyecto
+        proyecto=proyecto,
+        tech_stack=tech_stack,
+        relacionados=relacionados
     )
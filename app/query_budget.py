@@ -0,0 +1,172 @@
+import functools
+import logging
+import os
+import sys
+import threading
+from collections import Counter
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+
+from app.extensions import db
+
+
+logger = logging.getLogger("app.query_budget")
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_active = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class _Tracker:
+    __slots__ = ("label", "max_statements", "max_repeats", "count", "statements")
+
+    def __init__(self, label: str, max_statements, max_repeats: int):
+        self.label = label
+        self.max_statements = max_statements
+        self.max_repeats = max_repeats
+        self.count = 0
+        # sql -> [parámetros distintos, Counter de ubicaciones]
+        self.statements = {}
+
+    def record(self, statement: str, parameters, location: str):
+        self.count += 1
+        seen = self.statements.get(statement)
+        if seen is None:
+            seen = self.statements[statement] = [set(), Counter()]
+        seen[0].add(repr(parameters))
+        seen[1][location] += 1
+
+    def problems(self):
+        found = []
+        if self.max_statements is not None and self.count > self.max_statements:
+            found.append(f"{self.count} statements, budget is {self.max_statements}")
+        for statement, (params, locations) in self.statements.items():
+            if len(params) >= self.max_repeats:
+                where = ", ".join(f"{loc} (x{n})" for loc, n in locations.most_common(3))
+                found.append(
+                    f"N+1: same statement run {sum(locations.values())} times with {len(params)} different parameters, "
+                    f"from {where}: {' '.join(statement.split())[:200]}"
+                )
+        return found
+
+
+def _stack() -> list:
+    stack = getattr(_active, "stack", None)
+    if stack is None:
+        stack = _active.stack = []
+    return stack
+
+
+def caller_location() -> str:
+    """Línea de plantilla (si la consulta sale de un render: típicamente una carga lazy) o del código de la app."""
+    frame = sys._getframe(1)
+    app_line = None
+    while frame is not None:
+        template = frame.f_globals.get("__jinja_template__")
+        if template is not None:
+            return f"{template.name or '<template>'}:{template.get_corresponding_lineno(frame.f_lineno)}"
+        filename = frame.f_code.co_filename
+        if app_line is None and filename.startswith(_APP_DIR) and filename != __file__:
+            app_line = f"{os.path.relpath(filename, os.path.dirname(_APP_DIR))}:{frame.f_lineno}"
+        frame = frame.f_back
+    return app_line or "?"
+
+
+def _enabled() -> bool:
+    if not has_app_context():
+        return False
+    config = current_app.config
+    enabled = config.get("QUERY_BUDGET_ENABLED")
+    return (current_app.debug or current_app.testing) if enabled is None else enabled
+
+
+class query_budget:
+    """Presupuesto de sentencias SQL para una vista (decorador) o un bloque (`with`).
+
+    Falla si se ejecutan más de `max_statements` sentencias o si una misma sentencia se
+    repite con `max_repeats` o más juegos de parámetros distintos (el patrón N+1), indicando
+    la línea de plantilla que lanzó la carga. En testing lanza QueryBudgetExceeded; en debug
+    lo registra como error. Fuera de debug/testing (o con QUERY_BUDGET_ENABLED=False) no hace nada.
+    """
+
+    def __init__(self, max_statements: int = None, max_repeats: int = None, label: str = None):
+        self.max_statements = max_statements
+        self.max_repeats = max_repeats
+        self.label = label
+
+    def __call__(self, view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with query_budget(self.max_statements, self.max_repeats, self.label):
+                return view(*args, **kwargs)
+
+        return wrapper
+
+    def __enter__(self):
+        if not _enabled():
+            _stack().append(None)
+            return None
+        label = self.label or (request.endpoint if has_request_context() else None) or "block"
+        max_repeats = self.max_repeats or current_app.config.get("QUERY_BUDGET_MAX_REPEATS", 5)
+        tracker = _Tracker(label, self.max_statements, max_repeats)
+        _stack().append(tracker)
+        return tracker
+
+    def __exit__(self, exc_type, exc, tb):
+        tracker = _stack().pop()
+        if tracker is None or exc_type is not None:
+            return False
+        problems = tracker.problems()
+        if not problems or (has_request_context() and g.get("query_budget_reported")):
+            return False
+        if has_request_context():
+            # El presupuesto de la vista ya ha avisado: el de la petición no repite el mensaje.
+            g.query_budget_reported = True
+        message = f"Query budget exceeded in {tracker.label}:\n  " + "\n  ".join(problems)
+        if current_app.testing or current_app.config.get("QUERY_BUDGET_RAISE"):
+            raise QueryBudgetExceeded(message)
+        logger.error(message)
+        return False
+
+
+def _record(conn, cursor, statement, parameters, context, executemany):
+    trackers = [t for t in getattr(_active, "stack", ()) if t is not None]
+    if not trackers:
+        return
+    location = caller_location()
+    for tracker in trackers:
+        tracker.record(statement, parameters, location)
+
+
+def init_app(app):
+    """Registra el contador de sentencias y un presupuesto sin límite por petición que solo vigila N+1.
+
+    Ambos solo actúan en debug/testing (o con QUERY_BUDGET_ENABLED=True); con False ni se registran.
+    """
+    if app.config.get("QUERY_BUDGET_ENABLED") is False:
+        return
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, "before_cursor_execute", _record):
+        event.listen(engine, "before_cursor_execute", _record)
+
+    @app.before_request
+    def _open_request_budget():
+        g.query_budget = query_budget()
+        g.query_budget.__enter__()
+
+    @app.after_request
+    def _check_request_budget(response):
+        budget = g.pop("query_budget", None)
+        if budget is not None:
+            budget.__exit__(None, None, None)
+        return response
+
+    @app.teardown_request
+    def _discard_request_budget(exc):
+        if g.pop("query_budget", None) is not None:
+            _stack().pop()
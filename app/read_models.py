@@ -0,0 +1,366 @@
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+
+from sqlalchemy import case, desc, func, inspect, lambda_stmt, or_, select
+
+from app.extensions import db
+from app.models import BlogPost, BlogTag, Project, ProjectImage, Technology, post_tags, project_technologies
+
+
+MAX_PER_PAGE = 24
+TEASER_CHARS = 180
+
+
+# Las rutas públicas solo leen: en vez de instancias ORM (identity map, estado de atributos,
+# cargas lazy) devuelven estas filas inmutables. Las consultas son `lambda_stmt`, así que
+# SQLAlchemy cachea la construcción y la compilación de cada forma de la sentencia.
+
+
+@dataclass(frozen=True, slots=True)
+class TagRef:
+    slug: str
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class PostSummary:
+    id: int
+    slug: str
+    title: str
+    excerpt: str | None
+    teaser: str
+    cover_image_path: str | None
+    is_published: bool
+    created_at: datetime | None
+    display_date: datetime | None
+    reading_minutes: int
+    tags: tuple = ()
+
+
+@dataclass(frozen=True, slots=True)
+class PostDetail:
+    id: int
+    slug: str
+    title: str
+    excerpt: str | None
+    content: str
+    cover_image_path: str | None
+    is_published: bool
+    created_at: datetime | None
+    display_date: datetime | None
+    reading_minutes: int
+    meta_description: str | None
+    tags: tuple = ()
+
+
+@dataclass(frozen=True, slots=True)
+class FeedItem:
+    slug: str
+    title: str
+    excerpt: str | None
+    date: datetime | None
+
+
+@dataclass(frozen=True, slots=True)
+class ProjectCard:
+    id: int
+    title: str
+    description: str
+    technologies: str | None
+    category_slug: str
+    github_url: str | None
+    website_url: str | None
+    cover_image: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class TechnologyCount:
+    slug: str
+    name: str
+    project_count: int
+
+
+def reading_minutes(content: str) -> int:
+    words = len((content or "").split())
+    return max(1, (words + 219) // 220)
+
+
+def _teaser(excerpt, content) -> str:
+    """Texto de la tarjeta del listado: el extracto o, si no hay, el principio del contenido."""
+    if excerpt:
+        return excerpt
+    content = content or ""
+    return content[:TEASER_CHARS] + "…" if len(content) > TEASER_CHARS else content
+
+
+def post_from_dict(post: dict, detail: bool = False):
+    """PostSummary (o PostDetail) de uno de los posts de respaldo en memoria, para cuando la BD no responde."""
+    fields = dict(
+        id=None,
+        slug=post["slug"],
+        title=post["title"],
+        excerpt=post.get("excerpt"),
+        cover_image_path=None,
+        is_published=post.get("published", True),
+        created_at=post.get("created_at"),
+        display_date=post.get("created_at"),
+        reading_minutes=reading_minutes(post.get("content")),
+    )
+    if detail:
+        return PostDetail(content=post.get("content", ""), meta_description=None, **fields)
+    return PostSummary(teaser=_teaser(post.get("excerpt"), post.get("content")), **fields)
+
+
+def _clamp_page(total: int, page: int, per_page: int):
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
+    pages = max(1, (total + per_page - 1) // per_page)
+    return min(max(page, 1), pages), pages, per_page
+
+
+# --- blog ---------------------------------------------------------------------------------
+
+_POST_COLUMNS = (
+    BlogPost.id,
+    BlogPost.slug,
+    BlogPost.title,
+    BlogPost.excerpt,
+    BlogPost.content,
+    BlogPost.cover_image_path,
+    BlogPost.is_published,
+    BlogPost.published_at,
+    BlogPost.created_at,
+)
+
+
+def _post_filters(stmt, published_only: bool, q: str, tag: str):
+    if published_only:
+        stmt += lambda s: s.where(BlogPost.is_published.is_(True))
+    if q:
+        like = f"%{q}%"
+        stmt += lambda s: s.where(
+            or_(BlogPost.title.ilike(like), BlogPost.slug.ilike(like), BlogPost.excerpt.ilike(like), BlogPost.content.ilike(like))
+        )
+    if tag:
+        stmt += lambda s: s.where(
+            BlogPost.id.in_(
+                select(post_tags.c.post_id).join(BlogTag, BlogTag.id == post_tags.c.tag_id).where(BlogTag.slug == tag)
+            )
+        )
+    return stmt
+
+
+def _tags_for(post_ids) -> dict:
+    if not post_ids:
+        return {}
+    ids = list(post_ids)
+    rows = db.session.execute(
+        lambda_stmt(
+            lambda: select(post_tags.c.post_id, BlogTag.slug, BlogTag.name)
+            .join(BlogTag, BlogTag.id == post_tags.c.tag_id)
+            .where(post_tags.c.post_id.in_(ids))
+            .order_by(post_tags.c.post_id, BlogTag.id)
+        )
+    )
+    tags = {}
+    for post_id, slug, name in rows:
+        tags.setdefault(post_id, []).append(TagRef(slug, name))
+    return {post_id: tuple(refs) for post_id, refs in tags.items()}
+
+
+def post_page(published_only: bool, q: str = "", tag: str = "", page: int = 1, per_page: int = 9):
+    """Una página del listado del blog. Devuelve (posts, total, pages, page, per_page)."""
+    total = db.session.execute(
+        _post_filters(lambda_stmt(lambda: select(func.count(BlogPost.id))), published_only, q, tag)
+    ).scalar()
+    page, pages, per_page = _clamp_page(total, page, per_page)
+    offset = (page - 1) * per_page
+    stmt = _post_filters(
+        lambda_stmt(lambda: select(*_POST_COLUMNS)),
+        published_only,
+        q,
+        tag,
+    )
+    stmt += lambda s: s.order_by(desc(BlogPost.published_at), desc(BlogPost.created_at)).limit(per_page).offset(offset)
+    rows = db.session.execute(stmt).all()
+    tags = _tags_for([row.id for row in rows])
+    posts = [
+        PostSummary(
+            id=row.id,
+            slug=row.slug,
+            title=row.title,
+            excerpt=row.excerpt,
+            teaser=_teaser(row.excerpt, row.content),
+            cover_image_path=row.cover_image_path,
+            is_published=row.is_published,
+            created_at=row.created_at,
+            display_date=row.published_at or row.created_at,
+            reading_minutes=reading_minutes(row.content),
+            tags=tags.get(row.id, ()),
+        )
+        for row in rows
+    ]
+    return posts, total, pages, page, per_page
+
+
+def tag_cloud(published_only: bool):
+    """([TagRef] por nombre, {slug: nº de posts}); sin sesión iniciada solo cuentan los publicados."""
+    if published_only:
+        stmt = lambda_stmt(lambda: select(BlogTag.slug, BlogTag.name, func.sum(case((BlogPost.is_published.is_(True), 1), else_=0))))
+    else:
+        stmt = lambda_stmt(lambda: select(BlogTag.slug, BlogTag.name, func.count(BlogPost.id)))
+    stmt += lambda s: (
+        s.outerjoin(post_tags, BlogTag.id == post_tags.c.tag_id)
+        .outerjoin(BlogPost, BlogPost.id == post_tags.c.post_id)
+        .group_by(BlogTag.id, BlogTag.slug, BlogTag.name)
+        .order_by(BlogTag.name.asc())
+    )
+    rows = db.session.execute(stmt).all()
+    return [TagRef(slug, name) for slug, name, _ in rows], {slug: int(count or 0) for slug, _, count in rows}
+
+
+@lru_cache(maxsize=1)
+def _has_meta_columns(bind) -> bool:
+    try:
+        cols = {c["name"] for c in inspect(bind).get_columns("blog_posts")}
+    except Exception:
+        return False
+    return "meta_description" in cols and "meta_title" in cols
+
+
+def post_detail(slug: str, published_only: bool):
+    """El post de `slug` (con contenido y tags) o None."""
+    if _has_meta_columns(db.engine):
+        stmt = lambda_stmt(lambda: select(*_POST_COLUMNS, BlogPost.meta_description))
+    else:
+        stmt = lambda_stmt(lambda: select(*_POST_COLUMNS))
+    stmt += lambda s: s.where(BlogPost.slug == slug)
+    if published_only:
+        stmt += lambda s: s.where(BlogPost.is_published.is_(True))
+    row = db.session.execute(stmt).first()
+    if row is None:
+        return None
+    return PostDetail(
+        id=row.id,
+        slug=row.slug,
+        title=row.title,
+        excerpt=row.excerpt,
+        content=row.content,
+        cover_image_path=row.cover_image_path,
+        is_published=row.is_published,
+        created_at=row.created_at,
+        display_date=row.published_at or row.created_at,
+        reading_minutes=reading_minutes(row.content),
+        meta_description=row._mapping.get("meta_description"),
+        tags=_tags_for([row.id]).get(row.id, ()),
+    )
+
+
+def feed_items(limit: int = 20):
+    rows = db.session.execute(
+        lambda_stmt(
+            lambda: select(BlogPost.slug, BlogPost.title, BlogPost.excerpt, BlogPost.published_at, BlogPost.created_at)
+            .where(BlogPost.is_published.is_(True))
+            .order_by(desc(BlogPost.published_at), desc(BlogPost.created_at))
+            .limit(limit)
+        )
+    )
+    return [FeedItem(slug, title, excerpt, published_at or created_at) for slug, title, excerpt, published_at, created_at in rows]
+
+
+# --- proyectos ----------------------------------------------------------------------------
+
+def _project_filters(stmt, category: str, q: str, tech: str = ""):
+    if category:
+        stmt += lambda s: s.where(Project.category_slug == category)
+    if q:
+        like = f"%{q}%"
+        stmt += lambda s: s.where(or_(Project.title.ilike(like), Project.description.ilike(like), Project.technologies.ilike(like)))
+    if tech:
+        # slug único -> ix_project_technologies_technology_id -> PK de projects
+        stmt += lambda s: (
+            s.join(project_technologies, project_technologies.c.project_id == Project.id)
+            .join(Technology, Technology.id == project_technologies.c.technology_id)
+            .where(Technology.slug == tech)
+        )
+    return stmt
+
+
+def _covers_for(project_ids) -> dict:
+    """Primera imagen (por id) de cada proyecto, en una sola consulta."""
+    if not project_ids:
+        return {}
+    ids = list(project_ids)
+    return dict(
+        db.session.execute(
+            lambda_stmt(
+                lambda: select(ProjectImage.project_id, ProjectImage.image_path).where(
+                    ProjectImage.id.in_(
+                        select(func.min(ProjectImage.id))
+                        .where(ProjectImage.project_id.in_(ids))
+                        .group_by(ProjectImage.project_id)
+                    )
+                )
+            )
+        ).all()
+    )
+
+
+_CARD_COLUMNS = (
+    Project.id,
+    Project.title,
+    Project.description,
+    Project.technologies,
+    Project.category_slug,
+    Project.github_url,
+    Project.website_url,
+)
+
+
+def _cards(rows, covers=None):
+    covers = covers or {}
+    return [ProjectCard(*row, cover_image=covers.get(row.id)) for row in rows]
+
+
+def project_page(category: str = "", q: str = "", page: int = 1, per_page: int = 12, tech: str = ""):
+    """Una página de tarjetas de proyecto. Devuelve (cards, total, pages, page)."""
+    total = db.session.execute(
+        _project_filters(lambda_stmt(lambda: select(func.count(Project.id))), category, q, tech)
+    ).scalar()
+    pages = max(1, (total + per_page - 1) // per_page)
+    page = min(max(page, 1), pages)
+    offset = (page - 1) * per_page
+    stmt = _project_filters(lambda_stmt(lambda: select(*_CARD_COLUMNS)), category, q, tech)
+    stmt += lambda s: s.order_by(Project.created_at.desc(), Project.id.desc()).limit(per_page).offset(offset)
+    rows = db.session.execute(stmt).all()
+    return _cards(rows, _covers_for([row.id for row in rows])), total, pages, page
+
+
+def recent_projects(limit: int = 3):
+    """Los últimos proyectos para el CV, sin portada (la plantilla no la pinta)."""
+    rows = db.session.execute(
+        lambda_stmt(lambda: select(*_CARD_COLUMNS).order_by(Project.created_at.desc()).limit(limit))
+    ).all()
+    return _cards(rows)
+
+
+def technology_counts(limit: int = 12, selected: str = ""):
+    """Las `limit` tecnologías con más proyectos (contadores precalculados), más `selected` si se ha quedado fuera."""
+    rows = db.session.execute(
+        lambda_stmt(
+            lambda: select(Technology.slug, Technology.name, Technology.project_count)
+            .where(Technology.project_count > 0)
+            .order_by(Technology.project_count.desc(), Technology.name)
+            .limit(limit)
+        )
+    ).all()
+    counts = [TechnologyCount(*row) for row in rows]
+    if selected and all(t.slug != selected for t in counts):
+        row = db.session.execute(
+            lambda_stmt(
+                lambda: select(Technology.slug, Technology.name, Technology.project_count).where(Technology.slug == selected)
+            )
+        ).first()
+        if row is not None:
+            counts.append(TechnologyCount(*row))
+    return counts
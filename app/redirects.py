@@ -0,0 +1,254 @@
+import csv
+import io
+import logging
+import threading
+import time
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import object_session
+
+from app.extensions import cache, db
+from app.models import Redirect
+
+
+logger = logging.getLogger("app.redirects")
+
+# Rutas antiguas en español. Van siempre en el mapa, por debajo de las filas de la tabla (una fila
+# con el mismo origen manda), así que funcionan aunque la tabla esté vacía o aún no exista.
+LEGACY_REDIRECTS = [
+    ("/index", "/", False),
+    ("/sobre-mi", "/about", False),
+    ("/contacto", "/contact", False),
+    ("/descargar-cv", "/download-cv", False),
+    ("/proyectos", "/projects/", False),
+    ("/proyectos/", "/projects/", True),
+]
+
+_STATUS_TEXT = {301: "301 Moved Permanently", 302: "302 Found", 307: "307 Temporary Redirect", 308: "308 Permanent Redirect"}
+_MAX_HOPS = 5
+
+
+class RedirectError(ValueError):
+    pass
+
+
+def normalize(source: str, target: str, is_prefix: bool = False, status_code: int = 301):
+    """Valida y normaliza una redirección. Un `source` terminado en `*` es un prefijo."""
+    source = (source or "").strip()
+    target = (target or "").strip()
+    if source.endswith("*"):
+        source, is_prefix = source[:-1], True
+    if not source.startswith("/") or "?" in source or " " in source:
+        raise RedirectError(f"Source must be a path starting with '/': {source!r}")
+    if not (target.startswith("/") or target.startswith("http://") or target.startswith("https://")):
+        raise RedirectError(f"Target must be a path or an http(s) URL: {target!r}")
+    if is_prefix:
+        # El resto de la ruta se añade al destino: ambos deben acabar en segmento completo.
+        source = source if source.endswith("/") else source + "/"
+        target = target if target.endswith("/") else target + "/"
+    if source == target:
+        raise RedirectError(f"Source and target are the same: {source!r}")
+    if status_code not in _STATUS_TEXT:
+        raise RedirectError(f"Unsupported status code: {status_code}")
+    return {"source": source, "target": target, "is_prefix": bool(is_prefix), "status_code": status_code}
+
+
+class RedirectMap:
+    """Mapas en memoria (exactos y por prefijo) de la tabla `redirects`, uno por proceso.
+
+    Los prefijos se indexan por su primer segmento, así que cada petición hace como mucho
+    dos búsquedas en diccionario y recorre solo los prefijos de ese segmento. Las filas se
+    leen una vez por host (caché compartida, namespace "redirects") y se recargan cuando
+    cualquier worker cambia una fila (sube la generación al hacer commit) o cada `max_age`
+    segundos.
+    """
+
+    namespace = "redirects"
+
+    def __init__(self, max_age: float = 60):
+        self.max_age = max_age
+        self._exact = {}
+        self._prefixes = {}
+        self._built_at = None
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def invalidate(self, session=None):
+        self._built_at = None
+        cache.invalidate_on_commit(session, self.namespace)
+
+    def _stale(self) -> bool:
+        if self._built_at is None or time.monotonic() - self._built_at > self.max_age:
+            return True
+        return cache.generation(self.namespace) != self._generation
+
+    def load(self, rows):
+        """Carga `rows` (source, target, is_prefix, status_code) sobre LEGACY_REDIRECTS."""
+        exact, by_prefix = {}, {}
+        legacy = [(s, t, p, 301) for s, t, p in LEGACY_REDIRECTS]
+        for source, target, is_prefix, status_code in legacy + list(rows):
+            if is_prefix:
+                by_prefix[source] = (target, status_code)
+            else:
+                exact[source] = (target, status_code)
+        prefixes = {}
+        for source, (target, status_code) in by_prefix.items():
+            prefixes.setdefault(_first_segment(source), []).append((source, target, status_code))
+        # Cadenas A -> B -> C se sirven como A -> C: el cliente da un solo salto.
+        for source, (target, status_code) in list(exact.items()):
+            seen = {source}
+            while target in exact and target not in seen and len(seen) <= _MAX_HOPS:
+                seen.add(target)
+                target = exact[target][0]
+            exact[source] = (target, status_code)
+        for entries in prefixes.values():
+            entries.sort(key=lambda e: len(e[0]), reverse=True)
+        self._exact, self._prefixes = exact, prefixes
+        self._built_at = time.monotonic()
+
+    def refresh(self, app):
+        generation = cache.generation(self.namespace)
+        try:
+            with app.app_context():
+                rows = cache.get_or_set(
+                    self.namespace,
+                    "rows",
+                    lambda: [tuple(row) for row in db.session.execute(
+                        select(Redirect.source, Redirect.target, Redirect.is_prefix, Redirect.status_code)
+                    )],
+                    ttl=self.max_age,
+                )
+        except Exception as e:
+            if self._built_at is None and not self._exact and not self._prefixes:
+                self.load([])
+            else:
+                self._built_at = time.monotonic()
+            logger.warning("Could not load redirects, keeping the previous map: %s", e)
+            return
+        self.load(rows)
+        self._generation = generation
+
+    def ensure_fresh(self, app):
+        if not self._stale():
+            return
+        with self._lock:
+            if self._stale():
+                self.refresh(app)
+
+    def match(self, path: str):
+        """(location, status_code) para `path`, o None."""
+        hit = self._exact.get(path)
+        if hit is not None:
+            return hit
+        for source, target, status_code in self._prefixes.get(_first_segment(path), ()):
+            if path.startswith(source):
+                return target + path[len(source):], status_code
+            if path + "/" == source:
+                return target, status_code
+        return None
+
+
+def _first_segment(path: str) -> str:
+    return path.split("/", 2)[1] if path.startswith("/") else ""
+
+
+redirect_map = RedirectMap()
+
+
+def _invalidate_map(mapper, connection, target):
+    redirect_map.invalidate(object_session(target))
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Redirect, _event_name, _invalidate_map)
+
+
+class RedirectMiddleware:
+    """Responde las redirecciones de la tabla antes de que Flask cree el contexto y haga el routing."""
+
+    def __init__(self, app, wsgi_app):
+        self.app = app
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") in ("GET", "HEAD"):
+            redirect_map.ensure_fresh(self.app)
+            hit = redirect_map.match(environ.get("PATH_INFO") or "/")
+            if hit is not None:
+                location, status_code = hit
+                query = environ.get("QUERY_STRING")
+                if query and "?" not in location:
+                    location = f"{location}?{query}"
+                headers = [("Location", location), ("Content-Length", "0")]
+                if status_code in (301, 308):
+                    headers.append(("Cache-Control", f"public, max-age={self.app.config.get('REDIRECTS_CACHE_SECONDS', 86400)}"))
+                else:
+                    headers.append(("Cache-Control", "no-cache"))
+                start_response(_STATUS_TEXT[status_code], headers)
+                return [b""]
+        return self.wsgi_app(environ, start_response)
+
+
+def parse_redirects(text: str):
+    """Líneas `origen destino [código]` o CSV `origen,destino[,código]`. Devuelve (filas, errores)."""
+    rows, errors = [], []
+    for lineno, line in enumerate((text or "").splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = next(csv.reader(io.StringIO(line))) if "," in line else line.split()
+        parts = [p.strip() for p in parts if p.strip()]
+        try:
+            if len(parts) not in (2, 3):
+                raise RedirectError("expected 'source target [status]'")
+            status_code = int(parts[2]) if len(parts) == 3 else 301
+            rows.append(normalize(parts[0], parts[1], status_code=status_code))
+        except ValueError as e:
+            errors.append(f"line {lineno}: {e}")
+    return rows, errors
+
+
+def import_redirects(rows) -> dict:
+    """Inserta o actualiza (por `source`) en lote. No hace commit."""
+    by_source = {row["source"]: row for row in rows}
+    if not by_source:
+        return {"created": 0, "updated": 0}
+    existing = set()
+    sources = list(by_source)
+    for start in range(0, len(sources), 500):
+        existing.update(db.session.scalars(select(Redirect.source).where(Redirect.source.in_(sources[start:start + 500]))))
+    new_rows = [row for source, row in by_source.items() if source not in existing]
+    if new_rows:
+        db.session.execute(insert(Redirect), new_rows)
+    for source in existing:
+        row = by_source[source]
+        db.session.execute(
+            update(Redirect)
+            .where(Redirect.source == source)
+            .values(target=row["target"], is_prefix=row["is_prefix"], status_code=row["status_code"])
+        )
+    redirect_map.invalidate(db.session)
+    return {"created": len(new_rows), "updated": len(existing)}
+
+
+def seed_legacy_redirects() -> int:
+    """Siembra las rutas antiguas si la tabla está vacía, para que se vean (y editen) en /auth/redirects.
+
+    El mapa ya las sirve sin sembrar; no hace commit.
+    """
+    if db.session.scalar(select(func.count()).select_from(Redirect)):
+        return 0
+    return import_redirects([normalize(s, t, is_prefix=p) for s, t, p in LEGACY_REDIRECTS])["created"]
+
+
+def add_slug_redirect(old_path: str, new_path: str):
+    """Redirección automática al cambiar un slug; si el destino ya era origen de otra, se elimina el bucle."""
+    if old_path == new_path:
+        return
+    db.session.query(Redirect).filter(Redirect.source == new_path).delete(synchronize_session=False)
+    import_redirects([normalize(old_path, new_path)])
+
+
+def init_app(app):
+    redirect_map.max_age = app.config.get("REDIRECTS_MAX_AGE", 60)
+    app.wsgi_app = RedirectMiddleware(app, app.wsgi_app)
@@ -0,0 +1,323 @@
+import math
+import re
+from collections import Counter, defaultdict
+from heapq import nlargest
+
+from sqlalchemy import and_, delete, func, insert, select
+
+from app.extensions import db
+from app.models import BlogPost, Project, RelatedFeature, RelatedItem, RelatedTerm, post_tags
+
+
+RELATED_LIMIT = 4
+
+# Peso de cada tipo de rasgo antes del idf: compartir un tag o una tecnología pesa más que una palabra.
+FEATURE_WEIGHTS = {"tag": 3.0, "tech": 3.0, "category": 1.0, "word": 1.0}
+
+# Palabras presentes en más de esta fracción de los documentos no discriminan: se quedan fuera del índice.
+MAX_WORD_DF = 0.5
+
+_TEXT_CHARS = 4000
+# Palabras o tecnologías más largas no son vocabulario útil y la clave del rasgo ha de caber en related_features
+_MAX_WORD_CHARS = 64
+_BATCH = 500
+# Fila de related_terms con el número de documentos de la última reconstrucción
+_TOTAL = "*"
+_WORD_RE = re.compile(r"[a-z0-9áéíóúüñ][a-z0-9áéíóúüñ+#]{2,}")
+_STOPWORDS = frozenset(
+    "the and for with that this from are was were but not you your our have has into about how what when "
+    "why can will its it's using use via los las del una uno por para con que como más sus sobre"
+    .split()
+)
+
+
+def _words(*texts) -> Counter:
+    counts = Counter()
+    for text in texts:
+        counts.update(
+            w for w in _WORD_RE.findall((text or "").lower()) if w not in _STOPWORDS and len(w) <= _MAX_WORD_CHARS
+        )
+    return counts
+
+
+def post_features(ids=None):
+    """{post_id: Counter(rasgo -> frecuencia)} de los posts publicados (solo `ids` si se da), en streaming."""
+    features = {}
+    query = (
+        select(BlogPost.id, BlogPost.title, BlogPost.excerpt, func.substr(BlogPost.content, 1, _TEXT_CHARS))
+        .where(BlogPost.is_published.is_(True))
+        .execution_options(yield_per=1000)
+    )
+    links = select(post_tags.c.post_id, post_tags.c.tag_id)
+    if ids is not None:
+        query = query.where(BlogPost.id.in_(list(ids)))
+        links = links.where(post_tags.c.post_id.in_(list(ids)))
+    for post_id, title, excerpt, content in db.session.execute(query):
+        counts = Counter({("word", w): c for w, c in _words(title, title, excerpt, content).items()})
+        features[post_id] = counts
+    for post_id, tag_id in db.session.execute(links):
+        if post_id in features:
+            features[post_id][("tag", tag_id)] = 1
+    return features
+
+
+def project_features(ids=None):
+    """{project_id: Counter(rasgo -> frecuencia)}: tecnologías, categoría y texto corto (solo `ids` si se da)."""
+    features = {}
+    query = select(Project.id, Project.title, Project.description, Project.technologies, Project.category_slug)
+    if ids is not None:
+        query = query.where(Project.id.in_(list(ids)))
+    for project_id, title, description, technologies, category in db.session.execute(query):
+        counts = Counter({("word", w): c for w, c in _words(title, title, description).items()})
+        for tech in (technologies or "").split(","):
+            tech = tech.strip().lower()[:_MAX_WORD_CHARS]
+            if tech:
+                counts[("tech", tech)] = 1
+        if category:
+            counts[("category", category)] = 1
+        features[project_id] = counts
+    return features
+
+
+_FEATURES = {"post": post_features, "project": project_features}
+
+
+def _key(feature) -> str:
+    """("word", "flask") -> "word:flask", la clave del rasgo en related_features/related_terms."""
+    return f"{feature[0]}:{feature[1]}"
+
+
+def _weigh(counts, df, total: int) -> dict:
+    """Vector tf-idf normalizado de un documento; los rasgos que no estén en `df` cuentan como únicos."""
+    vector = {}
+    for feature, tf in counts.items():
+        idf = math.log(1 + total / df.get(feature, 1))
+        vector[feature] = FEATURE_WEIGHTS[feature[0]] * (1 + math.log(tf)) * idf
+    norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+    return {f: w / norm for f, w in vector.items()}
+
+
+def _indexed(feature, df, total: int) -> bool:
+    """Si el rasgo entra en el índice invertido: lo comparten 2+ documentos y, si es palabra, no es demasiado común."""
+    count = df.get(feature, 1)
+    if count < 2:
+        return False
+    return not (feature[0] == "word" and count > MAX_WORD_DF * total)
+
+
+def _top(scores: dict, limit: int):
+    """[(score, item)] de los `limit` mejores con score > 0; a igual score, el id más bajo."""
+    return nlargest(limit, ((s, other) for other, s in scores.items() if s > 0), key=lambda p: (p[0], -p[1]))
+
+
+class SimilarityIndex:
+    """Vectores tf-idf dispersos normalizados + índice invertido rasgo -> [(item, peso)].
+
+    La similitud coseno de un item con todos los demás se acumula recorriendo solo las
+    listas de sus rasgos, así que el coste depende del solapamiento y no del total de items.
+    """
+
+    def __init__(self, features: dict):
+        self.total = len(features) or 1
+        self.df = Counter()
+        for counts in features.values():
+            self.df.update(counts.keys())
+
+        self.vectors = {}
+        self.postings = defaultdict(list)
+        for item_id, counts in features.items():
+            vector = _weigh(counts, self.df, self.total)
+            self.vectors[item_id] = vector
+            for feature, weight in vector.items():
+                if _indexed(feature, self.df, self.total):
+                    self.postings[feature].append((item_id, weight))
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self.vectors
+
+    def scores(self, item_id) -> dict:
+        acc = defaultdict(float)
+        for feature, weight in self.vectors.get(item_id, {}).items():
+            for other_id, other_weight in self.postings.get(feature, ()):
+                acc[other_id] += weight * other_weight
+        acc.pop(item_id, None)
+        return acc
+
+    def top(self, item_id, limit: int = RELATED_LIMIT):
+        return _top(self.scores(item_id), limit)
+
+
+def _chunks(values, size: int = _BATCH):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _store(kind: str, index: SimilarityIndex, item_ids, limit: int, batch_size: int = _BATCH):
+    for chunk in _chunks(sorted(item_ids), batch_size):
+        db.session.execute(delete(RelatedItem).where(RelatedItem.kind == kind, RelatedItem.item_id.in_(chunk)))
+        rows = [
+            {"kind": kind, "item_id": item_id, "rank": rank, "related_id": other, "score": round(score, 6)}
+            for item_id in chunk
+            if item_id in index
+            for rank, (score, other) in enumerate(index.top(item_id, limit))
+        ]
+        if rows:
+            db.session.execute(insert(RelatedItem), rows)
+
+
+def _save_index(kind: str, index: SimilarityIndex):
+    """Guarda el índice invertido y las frecuencias documentales para los guardados incrementales."""
+    db.session.execute(delete(RelatedFeature).where(RelatedFeature.kind == kind))
+    db.session.execute(delete(RelatedTerm).where(RelatedTerm.kind == kind))
+    terms = [{"kind": kind, "feature": _TOTAL, "df": index.total}]
+    terms += [{"kind": kind, "feature": _key(f), "df": n} for f, n in index.df.items() if n >= 2]
+    for chunk in _chunks(terms):
+        db.session.execute(insert(RelatedTerm), chunk)
+    postings = [
+        {"kind": kind, "feature": _key(feature), "item_id": item_id, "weight": weight}
+        for feature, items in index.postings.items()
+        for item_id, weight in items
+    ]
+    for chunk in _chunks(postings):
+        db.session.execute(insert(RelatedFeature), chunk)
+
+
+def rebuild_related(kind: str, limit: int = RELATED_LIMIT) -> int:
+    """Recalcula la tabla entera para `kind` y renueva el idf guardado. No hace commit."""
+    index = SimilarityIndex(_FEATURES[kind]())
+    db.session.execute(delete(RelatedItem).where(RelatedItem.kind == kind))
+    _store(kind, index, index.vectors.keys(), limit)
+    _save_index(kind, index)
+    return len(index.vectors)
+
+
+def _stored_df(kind: str, features):
+    """(df por rasgo, total de documentos) de la última reconstrucción; total None si no la hubo."""
+    total = db.session.scalar(select(RelatedTerm.df).where(RelatedTerm.kind == kind, RelatedTerm.feature == _TOTAL))
+    keys = {_key(f): f for f in features}
+    df = {}
+    for chunk in _chunks(keys):
+        for key, count in db.session.execute(
+            select(RelatedTerm.feature, RelatedTerm.df).where(RelatedTerm.kind == kind, RelatedTerm.feature.in_(chunk))
+        ):
+            df[keys[key]] = count
+    return df, total
+
+
+def _stored_vector(kind: str, item_id: int) -> dict:
+    return dict(db.session.execute(
+        select(RelatedFeature.feature, RelatedFeature.weight)
+        .where(RelatedFeature.kind == kind, RelatedFeature.item_id == item_id)
+    ).all())
+
+
+def _stored_scores(kind: str, vector: dict, item_id: int) -> dict:
+    """Coseno de `vector` ({clave: peso}) con cada item del índice guardado, salvo `item_id`."""
+    acc = defaultdict(float)
+    for chunk in _chunks(vector):
+        for key, other_id, weight in db.session.execute(
+            select(RelatedFeature.feature, RelatedFeature.item_id, RelatedFeature.weight)
+            .where(RelatedFeature.kind == kind, RelatedFeature.feature.in_(chunk))
+        ):
+            acc[other_id] += vector[key] * weight
+    acc.pop(item_id, None)
+    return acc
+
+
+def _write_list(kind: str, item_id: int, top):
+    db.session.execute(delete(RelatedItem).where(RelatedItem.kind == kind, RelatedItem.item_id == item_id))
+    rows = [
+        {"kind": kind, "item_id": item_id, "rank": rank, "related_id": other, "score": round(score, 6)}
+        for rank, (score, other) in enumerate(top)
+    ]
+    if rows:
+        db.session.execute(insert(RelatedItem), rows)
+
+
+def refresh_related(kind: str, item_id: int, limit: int = RELATED_LIMIT) -> int:
+    """Actualiza el top-N tras guardar `item_id` sin releer el resto del corpus.
+
+    Solo se leen los rasgos del item; se pesan con el idf de la última reconstrucción
+    completa (related_terms) y se comparan con el índice invertido guardado
+    (related_features). Se reescriben su lista, las listas que lo contenían y aquellas en
+    las que ahora entra. Sirve también para borrados y despublicaciones: se quita del índice
+    y de las listas. `python manage.py related` renormaliza el idf con todo el corpus.
+    No hace commit. Devuelve cuántas listas se recalcularon.
+    """
+    counts = _FEATURES[kind]([item_id]).get(item_id)
+    df, total = _stored_df(kind, counts or ())
+    if total is None:
+        # Sin reconstrucción previa no hay idf guardado: la primera vez se hace la completa.
+        return rebuild_related(kind, limit)
+
+    holders = set(db.session.scalars(
+        select(RelatedItem.item_id).where(RelatedItem.kind == kind, RelatedItem.related_id == item_id)
+    )) - {item_id}
+    db.session.execute(delete(RelatedFeature).where(RelatedFeature.kind == kind, RelatedFeature.item_id == item_id))
+    scores = {}
+    if counts is None:
+        db.session.execute(delete(RelatedItem).where(RelatedItem.kind == kind, RelatedItem.item_id == item_id))
+    else:
+        vector = _weigh(counts, df, total)
+        postings = [
+            {"kind": kind, "feature": _key(f), "item_id": item_id, "weight": w}
+            for f, w in vector.items()
+            if _indexed(f, df, total)
+        ]
+        if postings:
+            db.session.execute(insert(RelatedFeature), postings)
+        scores = _stored_scores(kind, {_key(f): w for f, w in vector.items()}, item_id)
+        _write_list(kind, item_id, _top(scores, limit))
+
+    # Las listas que lo contenían se recalculan enteras: puede haber bajado o desaparecido.
+    for holder in holders:
+        _write_list(kind, holder, _top(_stored_scores(kind, _stored_vector(kind, holder), holder), limit))
+
+    # En las demás entra si cabe: lista incompleta o score >= su mínimo.
+    candidates = [other for other, score in scores.items() if score > 0 and other not in holders]
+    floors = {}
+    for chunk in _chunks(candidates):
+        floors.update({
+            other: (min_score, count)
+            for other, min_score, count in db.session.execute(
+                select(RelatedItem.item_id, func.min(RelatedItem.score), func.count())
+                .where(RelatedItem.kind == kind, RelatedItem.item_id.in_(chunk))
+                .group_by(RelatedItem.item_id)
+            )
+        })
+    entered = 0
+    for other in candidates:
+        min_score, count = floors.get(other, (0.0, 0))
+        if count < limit or scores[other] >= min_score:
+            current = {
+                related_id: score
+                for related_id, score in db.session.execute(
+                    select(RelatedItem.related_id, RelatedItem.score)
+                    .where(RelatedItem.kind == kind, RelatedItem.item_id == other)
+                )
+            }
+            current[item_id] = scores[other]
+            _write_list(kind, other, _top(current, limit))
+            entered += 1
+    return 1 + len(holders) + entered
+
+
+def related_posts(post_id: int, limit: int = RELATED_LIMIT):
+    return db.session.execute(
+        select(BlogPost.slug, BlogPost.title, BlogPost.excerpt, BlogPost.published_at, BlogPost.created_at)
+        .join(RelatedItem, and_(RelatedItem.kind == "post", RelatedItem.related_id == BlogPost.id))
+        .where(RelatedItem.item_id == post_id, BlogPost.is_published.is_(True))
+        .order_by(RelatedItem.rank)
+        .limit(limit)
+    ).all()
+
+
+def related_projects(project_id: int, limit: int = RELATED_LIMIT):
+    return db.session.execute(
+        select(Project.id, Project.title, Project.description, Project.category_slug)
+        .join(RelatedItem, and_(RelatedItem.kind == "project", RelatedItem.related_id == Project.id))
+        .where(RelatedItem.item_id == project_id)
+        .order_by(RelatedItem.rank)
+        .limit(limit)
+    ).all()
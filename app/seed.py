@@ -0,0 +1,129 @@
+import os
+import random
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, select
+
+from app.extensions import db
+from app.models import BlogPost, BlogTag, Project, ProjectCode, ProjectImage, post_tags, project_technologies
+from app.technologies import refresh_counts, sync_technologies
+
+
+SEED_PREFIX = "seed-"
+
+# PNG 1x1 transparente: basta para que las plantillas tengan algo que servir.
+_PLACEHOLDER_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082"
+)
+
+_CATEGORIES = ["web-dev", "data-science", "data-engineer", "other"]
+_TECHNOLOGIES = [
+    "Python", "Flask", "Docker", "PostgreSQL", "SQLAlchemy", "Airflow", "Spark",
+    "Pandas", "Kubernetes", "Terraform", "Redis", "FastAPI", "React", "Tailwind",
+]
+_LANGUAGES = [("app.py", "python"), ("pipeline.sql", "sql"), ("main.js", "javascript"), ("Dockerfile", "docker")]
+_WORDS = (
+    "data pipeline backend service deploy latency cache query index schema batch stream "
+    "worker queue metrics container cluster request response template database migration "
+    "throughput testing refactor release monitoring storage network python flask docker"
+).split()
+
+_BASE_DATE = datetime(2024, 1, 1, 9, 0, 0)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    return "\n\n".join(" ".join(_sentence(rng, rng.randint(8, 18)) for _ in range(5)) for _ in range(count))
+
+
+def clear_seed_data():
+    """Borra el contenido generado por `seed` (slugs con prefijo `seed-`)."""
+    post_ids = select(BlogPost.id).where(BlogPost.slug.like(f"{SEED_PREFIX}%"))
+    project_ids = select(Project.id).where(Project.slug.like(f"{SEED_PREFIX}%"))
+    db.session.execute(delete(post_tags).where(post_tags.c.post_id.in_(post_ids)))
+    db.session.execute(delete(BlogPost).where(BlogPost.slug.like(f"{SEED_PREFIX}%")))
+    db.session.execute(delete(BlogTag).where(BlogTag.slug.like(f"{SEED_PREFIX}%")))
+    db.session.execute(delete(ProjectImage).where(ProjectImage.project_id.in_(project_ids)))
+    db.session.execute(delete(ProjectCode).where(ProjectCode.project_id.in_(project_ids)))
+    db.session.execute(delete(project_technologies).where(project_technologies.c.project_id.in_(project_ids)))
+    db.session.execute(delete(Project).where(Project.slug.like(f"{SEED_PREFIX}%")))
+    refresh_counts()
+    db.session.commit()
+
+
+def seed_content(
+    projects: int,
+    posts: int,
+    tags: int,
+    seed: int = 42,
+    images_per_project: int = 2,
+    snippets_per_project: int = 2,
+    write_files: bool = True,
+):
+    """Genera proyectos, posts y tags de forma determinista a partir de `seed`."""
+    rng = random.Random(seed)
+    upload_dir = current_app.config["UPLOAD_FOLDER"]
+    if write_files and images_per_project:
+        os.makedirs(upload_dir, exist_ok=True)
+
+    tag_rows = []
+    for i in range(tags):
+        word = _WORDS[i % len(_WORDS)]
+        tag_rows.append(BlogTag(name=f"Seed {word.title()} {i:04d}", slug=f"{SEED_PREFIX}{word}-{i:04d}"))
+    db.session.add_all(tag_rows)
+
+    for i in range(projects):
+        title = f"{_sentence(rng, 3)[:-1]} {i:04d}"
+        project = Project(
+            title=title[:100],
+            slug=f"{SEED_PREFIX}project-{i:04d}",
+            description=_sentence(rng, 16)[:255],
+            long_description=_paragraphs(rng, 3),
+            technologies=", ".join(rng.sample(_TECHNOLOGIES, rng.randint(2, 5))),
+            github_url=f"https://github.com/example/project-{i:04d}",
+            website_url=f"https://example.com/project-{i:04d}" if i % 3 == 0 else None,
+            created_at=_BASE_DATE + timedelta(days=i, minutes=rng.randint(0, 600)),
+            category_slug=_CATEGORIES[i % len(_CATEGORIES)],
+        )
+        for j in range(images_per_project):
+            filename = f"{SEED_PREFIX}{i:04d}-{j}.png"
+            if write_files:
+                path = os.path.join(upload_dir, filename)
+                if not os.path.exists(path):
+                    with open(path, "wb") as fh:
+                        fh.write(_PLACEHOLDER_PNG)
+            project.images.append(ProjectImage(image_path=filename, caption=project.title))
+        for j in range(snippets_per_project):
+            file_name, language = _LANGUAGES[(i + j) % len(_LANGUAGES)]
+            code = "\n".join(f"# {_sentence(rng, 6)}" for _ in range(rng.randint(10, 40)))
+            project.code.append(ProjectCode(file_name=file_name, code_snippet=code, language=language))
+        db.session.add(project)
+
+    for i in range(posts):
+        published = i % 10 != 0
+        created_at = _BASE_DATE + timedelta(hours=i * 7, minutes=rng.randint(0, 59))
+        post = BlogPost(
+            slug=f"{SEED_PREFIX}post-{i:05d}",
+            title=_sentence(rng, rng.randint(4, 9))[:-1],
+            excerpt=_sentence(rng, 20)[:300],
+            content=_paragraphs(rng, rng.randint(3, 12)),
+            meta_title=None,
+            meta_description=None,
+            is_published=published,
+            published_at=created_at if published else None,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        if tag_rows:
+            post.tags = rng.sample(tag_rows, min(len(tag_rows), rng.randint(1, 4)))
+        db.session.add(post)
+
+    db.session.flush()
+    sync_technologies(db.session.execute(select(Project.id).where(Project.slug.like(f"{SEED_PREFIX}%"))).scalars().all())
+    db.session.commit()
+    return {"projects": projects, "posts": posts, "tags": tags}
@@ -0,0 +1,246 @@
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+logger = logging.getLogger("app.shared_cache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires REAL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS ix_entries_stored_at ON entries (stored_at);
+CREATE TABLE IF NOT EXISTS generations (
+    namespace TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+"""
+
+_GET = """
+SELECT e.value, e.expires FROM entries e
+WHERE e.namespace = ? AND e.key = ?
+  AND e.generation = COALESCE((SELECT generation FROM generations WHERE namespace = ?), 0)
+"""
+
+_SET = """
+INSERT OR REPLACE INTO entries (namespace, key, generation, value, size, stored_at, expires)
+VALUES (?, ?, COALESCE((SELECT generation FROM generations WHERE namespace = ?), 0), ?, ?, ?, ?)
+"""
+
+
+class SharedCache:
+    """Caché clave/valor compartida por todos los workers del host, sobre un fichero SQLite en modo WAL.
+
+    Las claves viven en un `namespace`; `invalidate(namespace)` sube su generación y deja
+    obsoletas de golpe todas sus entradas en todos los procesos (se borran en la siguiente
+    poda). Los valores se guardan con pickle, con TTL opcional, y el fichero se mantiene por
+    debajo de `max_bytes` descartando primero las entradas más antiguas.
+
+    Cualquier error de SQLite se registra y se trata como un fallo de caché: quien llama
+    siempre puede recalcular el valor. Sin `init_app` (sin fichero) todo es un fallo de caché.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = 64 * 1024 * 1024, generation_ttl: float = 1.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.generation_ttl = generation_ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._generations = {}
+        self._writes = 0
+
+    def init_app(self, app):
+        self.path = app.config.get("SHARED_CACHE_PATH") or os.path.join(app.instance_path, "shared_cache.sqlite")
+        self.max_bytes = app.config.get("SHARED_CACHE_MAX_BYTES", self.max_bytes)
+        self.generation_ttl = app.config.get("SHARED_CACHE_GENERATION_TTL", self.generation_ttl)
+        app.extensions["shared_cache"] = self
+        if not event.contains(Session, "after_commit", self._after_commit):
+            event.listen(Session, "after_commit", self._after_commit)
+            event.listen(Session, "after_rollback", self._after_rollback)
+
+    def _connection(self):
+        # Una conexión por hilo y por proceso: tras el fork de gunicorn no se reutiliza la del padre.
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid() and self._local.path == self.path:
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._local.conn, self._local.pid, self._local.path = conn, os.getpid(), self.path
+        return conn
+
+    def get(self, namespace: str, key: str, default=None):
+        if not self.path:
+            return default
+        try:
+            row = self._connection().execute(_GET, (namespace, key, namespace)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Shared cache read failed for %s:%s: %s", namespace, key, e)
+            row = None
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, namespace: str, key: str, value, ttl: float = None):
+        if not self.path:
+            return
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(_SET, (namespace, key, namespace, blob, len(blob), now, now + ttl if ttl else None))
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self.prune()
+        except sqlite3.Error as e:
+            logger.warning("Shared cache write failed for %s:%s: %s", namespace, key, e)
+
+    def delete(self, namespace: str, key: str):
+        if not self.path:
+            return
+        try:
+            self._connection().execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        except sqlite3.Error as e:
+            logger.warning("Shared cache delete failed for %s:%s: %s", namespace, key, e)
+
+    def get_or_set(self, namespace: str, key: str, build, ttl: float = None):
+        """Valor de la caché o, si falta, `build()` guardado para el resto de workers."""
+        value = self.get(namespace, key, _MISSING)
+        if value is _MISSING:
+            value = build()
+            self.set(namespace, key, value, ttl)
+        return value
+
+    def generation(self, namespace: str) -> int:
+        """Generación actual de `namespace`, leída del fichero como mucho cada `generation_ttl` segundos."""
+        if not self.path:
+            return 0
+        cached = self._generations.get(namespace)
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < self.generation_ttl:
+            return cached[0]
+        try:
+            row = self._connection().execute(
+                "SELECT generation FROM generations WHERE namespace = ?", (namespace,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Shared cache generation read failed for %s: %s", namespace, e)
+            return cached[0] if cached is not None else 0
+        generation = row[0] if row else 0
+        self._generations[namespace] = (generation, now)
+        return generation
+
+    def invalidate(self, namespace: str) -> int:
+        """Sube la generación de `namespace`: sus entradas dejan de verse en todos los workers."""
+        if not self.path:
+            return 0
+        try:
+            row = self._connection().execute(
+                "INSERT INTO generations (namespace, generation) VALUES (?, 1) "
+                "ON CONFLICT (namespace) DO UPDATE SET generation = generation + 1 RETURNING generation",
+                (namespace,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Shared cache invalidation failed for %s: %s", namespace, e)
+            self._generations.pop(namespace, None)
+            return 0
+        self._generations[namespace] = (row[0], time.monotonic())
+        return row[0]
+
+    def prune(self):
+        """Borra entradas caducadas o de generaciones viejas y, si sobran bytes, las más antiguas."""
+        if not self.path:
+            return
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "DELETE FROM entries WHERE (expires IS NOT NULL AND expires < ?) "
+                    "OR generation < COALESCE((SELECT g.generation FROM generations g WHERE g.namespace = entries.namespace), 0)",
+                    (time.time(),),
+                )
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > self.max_bytes:
+                    # Corte por fecha: la suma acumulada de las más recientes que cabe en el límite.
+                    cutoff = conn.execute(
+                        "SELECT stored_at FROM (SELECT stored_at, SUM(size) OVER (ORDER BY stored_at DESC) AS running "
+                        "FROM entries) WHERE running > ? ORDER BY stored_at DESC LIMIT 1",
+                        (self.max_bytes,),
+                    ).fetchone()
+                    if cutoff is not None:
+                        conn.execute("DELETE FROM entries WHERE stored_at <= ?", (cutoff[0],))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning("Shared cache prune failed: %s", e)
+
+    def clear(self):
+        if not self.path:
+            return
+        try:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM generations")
+        except sqlite3.Error as e:
+            logger.warning("Shared cache clear failed: %s", e)
+        self._generations = {}
+
+    def invalidate_on_commit(self, session, namespace: str):
+        """Invalida `namespace` cuando `session` haga commit (no antes: otro worker podría
+        recalcular el valor con los datos viejos y guardarlo ya en la generación nueva)."""
+        if session is None:
+            self.invalidate(namespace)
+        else:
+            session.info.setdefault("shared_cache_invalidate", set()).add(namespace)
+
+    def _after_commit(self, session):
+        for namespace in session.info.pop("shared_cache_invalidate", ()):
+            self.invalidate(namespace)
+
+    def _after_rollback(self, session):
+        session.info.pop("shared_cache_invalidate", None)
+
+    def stats(self) -> dict:
+        if not self.path:
+            return {"path": None}
+        try:
+            entries, size = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        except sqlite3.Error:
+            entries, size = None, None
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+_MISSING = object()
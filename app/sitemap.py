@@ -0,0 +1,189 @@
+import hashlib
+import threading
+import time
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from flask import Response, abort, current_app, request, url_for
+from sqlalchemy import func, select
+
+from app.extensions import cache, db
+from app.models import BlogPost, Project
+from app.versions import content_version
+
+
+# Límite del protocolo: por encima, /sitemap.xml pasa a ser un índice de /sitemap-<n>.xml.
+SITEMAP_MAX_URLS = 50000
+
+# Sin SITE_URL hay un sitemap por host; el Host lo elige el cliente, así que se guardan pocos.
+SITEMAP_MAX_HOSTS = 4
+
+_STATIC_ENDPOINTS = ["main.about", "main.resume", "main.contact"]
+
+_HEAD = '<?xml version="1.0" encoding="UTF-8"?>\n<{tag} xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+
+
+def _w3c(dt) -> str:
+    # Las fechas se guardan con datetime.utcnow (naive, UTC).
+    return dt.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+def _latest(*dates):
+    dates = [d for d in dates if d is not None]
+    return max(dates) if dates else None
+
+
+def iter_entries(chunk_size: int = 2000):
+    """(url, lastmod) de todas las páginas públicas, leyendo filas en streaming (sin objetos ORM)."""
+    posts_lastmod, projects_lastmod = db.session.execute(
+        select(
+            select(func.max(BlogPost.updated_at)).where(BlogPost.is_published.is_(True)).scalar_subquery(),
+            select(func.max(func.coalesce(Project.updated_at, Project.created_at))).scalar_subquery(),
+        )
+    ).one()
+
+    yield request.url_root, _latest(posts_lastmod, projects_lastmod)
+    for endpoint in _STATIC_ENDPOINTS:
+        yield url_for(endpoint, _external=True), None
+    yield url_for("projects.projects_home", _external=True), projects_lastmod
+    yield url_for("blog.index", _external=True), posts_lastmod
+
+    # url_for por fila es lo más caro del recorrido: se construye una plantilla una sola vez.
+    post_url = url_for("blog.post_detail", slug="__slug__", _external=True)
+    rows = db.session.execute(
+        select(BlogPost.slug, BlogPost.updated_at, BlogPost.published_at, BlogPost.created_at)
+        .where(BlogPost.is_published.is_(True))
+        .order_by(BlogPost.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for slug, updated_at, published_at, created_at in rows:
+        yield post_url.replace("__slug__", quote(slug, safe="")), updated_at or published_at or created_at
+
+    project_url = url_for("projects.project_detail", project_id=0, _external=True)
+    prefix, suffix = project_url.rsplit("/0", 1)
+    rows = db.session.execute(
+        select(Project.id, Project.updated_at, Project.created_at)
+        .order_by(Project.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for project_id, updated_at, created_at in rows:
+        yield f"{prefix}/{project_id}{suffix}", updated_at or created_at
+
+
+class SitemapPart:
+    __slots__ = ("body", "etag", "lastmod")
+
+    def __init__(self, body: bytes, lastmod):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.lastmod = lastmod
+
+
+def _urlset(entries) -> SitemapPart:
+    out = [_HEAD.format(tag="urlset")]
+    lastmod = None
+    for url, modified in entries:
+        if modified is None:
+            out.append(f"  <url><loc>{escape(url)}</loc></url>\n")
+        else:
+            out.append(f"  <url><loc>{escape(url)}</loc><lastmod>{_w3c(modified)}</lastmod></url>\n")
+            lastmod = _latest(lastmod, modified)
+    out.append("</urlset>\n")
+    return SitemapPart("".join(out).encode("utf-8"), lastmod)
+
+
+def _sitemap_index(parts) -> SitemapPart:
+    out = [_HEAD.format(tag="sitemapindex")]
+    for n, part in enumerate(parts, start=1):
+        loc = escape(url_for("main.sitemap_part", n=n, _external=True))
+        if part.lastmod is None:
+            out.append(f"  <sitemap><loc>{loc}</loc></sitemap>\n")
+        else:
+            out.append(f"  <sitemap><loc>{loc}</loc><lastmod>{_w3c(part.lastmod)}</lastmod></sitemap>\n")
+    out.append("</sitemapindex>\n")
+    return SitemapPart("".join(out).encode("utf-8"), _latest(*(p.lastmod for p in parts)))
+
+
+def build_sitemap(max_urls: int = SITEMAP_MAX_URLS):
+    """Devuelve (root, parts): root es /sitemap.xml; parts solo tiene elementos si hace falta un índice."""
+    parts = []
+    chunk = []
+    for entry in iter_entries():
+        chunk.append(entry)
+        if len(chunk) == max_urls:
+            parts.append(_urlset(chunk))
+            chunk = []
+    if chunk or not parts:
+        parts.append(_urlset(chunk))
+    if len(parts) == 1:
+        return parts[0], []
+    return _sitemap_index(parts), parts
+
+
+def _build_for(base_url: str):
+    with current_app.test_request_context(base_url=base_url):
+        return build_sitemap()
+
+
+class SitemapCache:
+    """Sitemap ya serializado por proceso, reconstruido solo cuando cambia la versión del contenido.
+
+    Se genera con SITE_URL si está configurada; si no, con el host de la petición, guardando
+    como mucho `SITEMAP_MAX_HOSTS` (se descarta el usado hace más tiempo).
+    La versión se comprueba como mucho cada `SITEMAP_CHECK_SECONDS` para no lanzar
+    los agregados en cada visita de un crawler. Cada versión se genera una sola vez por
+    host: el primer worker que la ve la deja en la caché compartida para el resto.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        self._entries.clear()
+
+    def get(self):
+        root_url = current_app.config.get("SITE_URL") or request.url_root
+        root_url = root_url.rstrip("/") + "/"
+        check_every = current_app.config.get("SITEMAP_CHECK_SECONDS", 60)
+        entry = self._entries.get(root_url)
+        if entry is not None and time.monotonic() - entry["checked_at"] < check_every:
+            return entry
+        with self._lock:
+            entry = self._entries.get(root_url)
+            if entry is not None and time.monotonic() - entry["checked_at"] < check_every:
+                return entry
+            version = content_version("posts", "projects")
+            if entry is None or entry["version"] != version:
+                root, parts = cache.get_or_set(
+                    "sitemap", f"{root_url}|{version}", lambda: _build_for(root_url), ttl=86400
+                )
+                entry = {"version": version, "root": root, "parts": parts}
+            entry["checked_at"] = time.monotonic()
+            self._entries.pop(root_url, None)
+            while len(self._entries) >= SITEMAP_MAX_HOSTS:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[root_url] = entry
+            return entry
+
+
+sitemap_cache = SitemapCache()
+
+
+def sitemap_response(part: SitemapPart):
+    response = Response(part.body, mimetype="application/xml")
+    response.set_etag(part.etag)
+    if part.lastmod is not None:
+        response.last_modified = part.lastmod
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get("SITEMAP_CHECK_SECONDS", 60)
+    return response.make_conditional(request)
+
+
+def serve_sitemap(n: int = None):
+    entry = sitemap_cache.get()
+    if n is None:
+        return sitemap_response(entry["root"])
+    if not 1 <= n <= len(entry["parts"]):
+        abort(404)
+    return sitemap_response(entry["parts"][n - 1])
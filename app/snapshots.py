@@ -0,0 +1,211 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import Response, current_app, g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.exc import InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+
+from app.extensions import db
+
+
+logger = logging.getLogger("app.snapshots")
+
+# Páginas públicas de las que se guarda la última respuesta buena.
+SNAPSHOT_ENDPOINTS = {
+    "main.index",
+    "main.about",
+    "main.resume",
+    "main.sitemap",
+    "main.sitemap_part",
+    "projects.projects_home",
+    "projects.projects_grid",
+    "projects.project_detail",
+    "blog.index",
+    "blog.post_detail",
+    "blog.rss",
+}
+# Solo estos parámetros forman parte de la clave: `?q=...` u otros libres no generan snapshots.
+_KEY_ARGS = ("page", "per_page", "tag", "category")
+
+DB_UNAVAILABLE_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError)
+
+
+class SnapshotStore:
+    """Última respuesta buena por URL, en disco para que la compartan todos los workers.
+
+    Cada fichero es una línea JSON de metadatos seguida del cuerpo. Las escrituras son
+    atómicas y, para no escribir en cada visita, solo se renueva cuando la copia tiene más
+    de `refresh_seconds`.
+    """
+
+    def __init__(self, folder: str, refresh_seconds: float = 60):
+        self.folder = folder
+        self.refresh_seconds = refresh_seconds
+
+    def path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.folder, digest[:2], digest[2:] + ".snap")
+
+    def is_fresh(self, key: str) -> bool:
+        try:
+            return time.time() - os.stat(self.path(key)).st_mtime < self.refresh_seconds
+        except OSError:
+            return False
+
+    def save(self, key: str, body: bytes, mimetype: str):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = {"key": key, "mimetype": mimetype, "saved_at": time.time()}
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "wb") as fh:
+            fh.write(json.dumps(meta).encode("utf-8") + b"\n")
+            fh.write(body)
+        os.replace(tmp, path)
+
+    def load(self, key: str):
+        try:
+            with open(self.path(key), "rb") as fh:
+                meta = json.loads(fh.readline())
+                return meta, fh.read()
+        except (OSError, ValueError):
+            return None
+
+
+def _store() -> SnapshotStore:
+    return current_app.extensions["snapshots"]
+
+
+def snapshot_key():
+    if request.endpoint not in SNAPSHOT_ENDPOINTS or request.method != "GET":
+        return None
+    args = [(name, request.args.get(name)) for name in _KEY_ARGS if request.args.get(name)]
+    if len(args) != len(request.args):
+        return None
+    return request.path + ("?" + "&".join(f"{k}={v}" for k, v in args) if args else "")
+
+
+def mark_degraded():
+    """La respuesta en curso se ha construido con datos incompletos: no debe guardarse como snapshot."""
+    if has_request_context():
+        g.snapshot_degraded = True
+
+
+def stale_response():
+    """Respuesta desde el último snapshot de la URL actual (stale-if-error) o None si no hay."""
+    mark_degraded()
+    if "snapshots" not in current_app.extensions:
+        return None
+    key = snapshot_key()
+    if key is None:
+        return None
+    found = _store().load(key)
+    if found is None:
+        return None
+    meta, body = found
+    age = max(0, int(time.time() - meta.get("saved_at", time.time())))
+    response = Response(body, mimetype=meta.get("mimetype") or "text/html")
+    response.headers["Warning"] = '110 - "Response is Stale"'
+    response.headers["X-Snapshot-Age"] = str(age)
+    response.headers["Age"] = str(age)
+    response.headers["Cache-Control"] = "no-store"
+    logger.warning("Serving snapshot for %s (%ss old): database unavailable", key, age)
+    return response
+
+
+def snapshot_wanted():
+    """Clave del snapshot que debería guardarse para la petición en curso, o None."""
+    if "snapshots" not in current_app.extensions:
+        return None
+    if g.get("snapshot_degraded") or current_user.is_authenticated:
+        return None
+    key = snapshot_key()
+    if key is None or _store().is_fresh(key):
+        return None
+    return key
+
+
+def save_snapshot(key: str, body: bytes, mimetype: str):
+    if g.get("snapshot_degraded"):
+        return
+    try:
+        _store().save(key, body, mimetype)
+    except OSError:
+        logger.exception("Could not write snapshot for %s", key)
+
+
+def _save_snapshot(response):
+    # Las respuestas en streaming guardan su snapshot al terminar de enviarse (ver app.streaming).
+    if response.status_code != 200 or response.is_streamed or response.direct_passthrough:
+        return response
+    key = snapshot_wanted()
+    if key is not None:
+        save_snapshot(key, response.get_data(), response.mimetype)
+    return response
+
+
+def _handle_db_unavailable(e):
+    try:
+        db.session.rollback()
+    except Exception:
+        pass
+    response = stale_response()
+    if response is not None:
+        return response
+    logger.error("Database unavailable and no snapshot for %s: %s", request.path, e)
+    response = Response("The site is temporarily unavailable. Please try again in a moment.", status=503, mimetype="text/plain")
+    response.headers["Retry-After"] = "30"
+    return response
+
+
+def _install_statement_deadline(engine, timeout_ms: int):
+    """Límite de tiempo por transacción para las peticiones GET (no afecta a los comandos de manage.py).
+
+    PostgreSQL: SET LOCAL statement_timeout al empezar la transacción.
+    SQLite: un progress handler interrumpe la consulta pasado el plazo.
+    Ambos acaban en OperationalError, que sirve el snapshot.
+    """
+
+    def in_public_read() -> bool:
+        return has_request_context() and request.method in ("GET", "HEAD")
+
+    if engine.dialect.name == "postgresql":
+        @event.listens_for(engine, "begin")
+        def _set_timeout(conn):
+            if in_public_read():
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+    elif engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "begin")
+        def _set_deadline(conn):
+            raw = conn.connection.driver_connection
+            if not in_public_read():
+                raw.set_progress_handler(None, 0)
+                return
+            deadline = time.monotonic() + timeout_ms / 1000
+
+            def _check():
+                return 1 if time.monotonic() > deadline else 0
+
+            raw.set_progress_handler(_check, 10000)
+
+
+def init_app(app):
+    if not app.config.get("SNAPSHOT_ENABLED", True):
+        return
+    app.extensions["snapshots"] = SnapshotStore(
+        app.config.get("SNAPSHOT_FOLDER") or os.path.join(app.instance_path, "snapshots"),
+        refresh_seconds=app.config.get("SNAPSHOT_REFRESH_SECONDS", 60),
+    )
+    app.after_request(_save_snapshot)
+    for error in DB_UNAVAILABLE_ERRORS:
+        app.register_error_handler(error, _handle_db_unavailable)
+
+    timeout_ms = app.config.get("DB_STATEMENT_TIMEOUT_MS") or 0
+    if timeout_ms:
+        with app.app_context():
+            _install_statement_deadline(db.engine, timeout_ms)
@@ -0,0 +1,152 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import BlogPost, ProjectImage
+
+
+# Ficheros temporales de upload_cv: "<uuid4.hex>_<nombre>". En DOCUMENTS_FOLDER solo estos son candidatos.
+_CV_TEMP_RE = re.compile(r"^[0-9a-f]{32}_")
+
+
+def _scopes():
+    """(nombre, directorio, columna que referencia el fichero o None, filtro de candidatos)."""
+    upload_dir = current_app.config["UPLOAD_FOLDER"]
+    documents_dir = current_app.config.get("DOCUMENTS_FOLDER") or os.path.join(current_app.root_path, "static", "documents")
+    cv_filename = current_app.config.get("CV_FILENAME") or "cv_angel.pdf"
+    return [
+        ("project_images", upload_dir, ProjectImage.image_path, None),
+        ("blog_covers", os.path.join(upload_dir, "blog"), BlogPost.cover_image_path, None),
+        ("documents", documents_dir, None, lambda name: name != cv_filename and _CV_TEMP_RE.match(name)),
+    ]
+
+
+def _list_files(directory: str):
+    try:
+        with os.scandir(directory) as entries:
+            return [e.path for e in entries if e.is_file(follow_symlinks=False) and not e.name.startswith(".")]
+    except FileNotFoundError:
+        return []
+
+
+def _stat_chunk(paths):
+    out = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        out.append((os.path.basename(path), path, st.st_size, st.st_mtime))
+    return out
+
+
+def scan_files(directories, workers: int = 8, chunk_size: int = 256):
+    """{directorio: [(nombre, ruta, bytes, mtime)]}: listado y stat repartidos en un pool de hilos."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        listings = dict(zip(directories, pool.map(_list_files, directories)))
+        jobs = []
+        for directory, paths in listings.items():
+            for start in range(0, len(paths), chunk_size):
+                jobs.append((directory, pool.submit(_stat_chunk, paths[start:start + chunk_size])))
+        result = {directory: [] for directory in directories}
+        for directory, future in jobs:
+            result[directory].extend(future.result())
+    return result
+
+
+def referenced_names(column, names, batch_size: int = 500):
+    """Subconjunto de `names` que aparece en `column`, consultando en lotes de IN (...)."""
+    names = list(names)
+    found = set()
+    for start in range(0, len(names), batch_size):
+        chunk = names[start:start + batch_size]
+        found.update(db.session.scalars(select(column).where(column.in_(chunk)).distinct()))
+    return found
+
+
+def _missing_references(column, present: set) -> int:
+    rows = db.session.execute(select(column).where(column.is_not(None)).distinct().execution_options(yield_per=1000))
+    return sum(1 for (name,) in rows if name not in present)
+
+
+class UnsafeCollection(RuntimeError):
+    pass
+
+
+def collect_garbage(grace_seconds: float = 24 * 3600, dry_run: bool = True, workers: int = 8) -> dict:
+    """Busca (y sin `dry_run` borra) los ficheros subidos que ya no referencia ninguna fila.
+
+    Los huérfanos más recientes que `grace_seconds` se respetan: pueden ser subidas cuyo
+    commit aún no ha terminado. Si hay que borrar y algún directorio tiene ficheros pero
+    la BD no referencia ninguno (BD vacía o DATABASE_URL equivocada), lanza
+    UnsafeCollection sin tocar nada.
+    """
+    scopes = _scopes()
+    files = scan_files([directory for _, directory, _, _ in scopes], workers=workers)
+    references = {}
+    for name, directory, column, candidate in scopes:
+        present = {entry[0] for entry in files[directory]}
+        if column is not None:
+            references[name] = (referenced_names(column, present), _missing_references(column, present))
+        else:
+            references[name] = ({n for n in present if not candidate(n)}, 0)
+    if not dry_run:
+        unreferenced = [
+            f"{name} ({directory}: {len(files[directory])} files)"
+            for name, directory, column, _ in scopes
+            if column is not None and files[directory] and not references[name][0]
+        ]
+        if unreferenced:
+            raise UnsafeCollection(
+                "The database references none of the files in " + ", ".join(unreferenced)
+                + "; refusing to delete. Check DATABASE_URL."
+            )
+
+    cutoff = time.time() - grace_seconds
+    report = {}
+    for name, directory, column, candidate in scopes:
+        entries = files[directory]
+        referenced, missing = references[name]
+        stats = {
+            "directory": directory,
+            "files": len(entries),
+            "bytes": sum(entry[2] for entry in entries),
+            "referenced": len(referenced),
+            "orphans": 0,
+            "orphan_bytes": 0,
+            "in_grace": 0,
+            "reclaimable": 0,
+            "reclaimable_bytes": 0,
+            "deleted": 0,
+            "reclaimed_bytes": 0,
+            "errors": [],
+            "missing_files": missing,
+        }
+        for file_name, path, size, mtime in entries:
+            if file_name in referenced or (candidate is not None and not candidate(file_name)):
+                continue
+            stats["orphans"] += 1
+            stats["orphan_bytes"] += size
+            if mtime > cutoff:
+                stats["in_grace"] += 1
+                continue
+            stats["reclaimable"] += 1
+            stats["reclaimable_bytes"] += size
+            if dry_run:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                stats["errors"].append(f"{path}: {e}")
+                continue
+            stats["deleted"] += 1
+            stats["reclaimed_bytes"] += size
+        report[name] = stats
+    return report
@@ -0,0 +1,56 @@
+from flask import Response, current_app, render_template, stream_template, stream_with_context
+from flask_login import current_user
+
+from app.fragments import fragment_version
+from app.query_budget import query_budget
+from app.snapshots import save_snapshot, snapshot_wanted
+
+
+def _chunks(pieces, template_name: str, chunk_bytes: int, snapshot_key):
+    """Agrupa la salida de Jinja: el primer trozo sale al cerrar </head> (CSS y preloads) y el resto en bloques de `chunk_bytes`."""
+    body = [] if snapshot_key is not None else None
+    buffer, size, head_sent = [], 0, False
+    # Las consultas ya se han hecho en la vista: una a mitad de stream es un bug (se avisa en debug/testing).
+    with query_budget(0, label=f"{template_name} (streamed)"):
+        for piece in pieces:
+            buffer.append(piece)
+            size += len(piece)
+            if size >= chunk_bytes or (not head_sent and "</head>" in piece):
+                head_sent = True
+                chunk = "".join(buffer)
+                buffer, size = [], 0
+                if body is not None:
+                    body.append(chunk)
+                yield chunk
+        if buffer:
+            chunk = "".join(buffer)
+            if body is not None:
+                body.append(chunk)
+            yield chunk
+    if body is not None:
+        save_snapshot(snapshot_key, "".join(body).encode("utf-8"), "text/html")
+
+
+def render_page(template_name: str, versions=(), **context):
+    """`render_template` o, con STREAMED_RENDERING, la misma página enviada por trozos.
+
+    `versions` son las tuplas de tipos que la plantilla pasa a `fragment_version`: se
+    calculan aquí, junto al usuario actual, para que ninguna consulta quede para mitad
+    del stream (donde un error ya no puede convertirse en una página de error o snapshot).
+    """
+    config = current_app.config
+    if not config.get("STREAMED_RENDERING"):
+        return render_template(template_name, **context)
+
+    current_user.is_authenticated
+    for kinds in versions:
+        fragment_version(*kinds)
+    snapshot_key = snapshot_wanted()
+    pieces = stream_template(template_name, **context)
+    response = Response(
+        stream_with_context(_chunks(pieces, template_name, config.get("STREAMED_CHUNK_BYTES", 16384), snapshot_key)),
+        mimetype="text/html",
+    )
+    # Sin esto nginx acumula la respuesta entera antes de reenviarla y se pierde la ventaja.
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,191 @@
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import delete, event, func, insert, literal, or_, select, update
+from sqlalchemy.orm import object_session
+
+from app.extensions import cache, db
+from app.models import BlogTag, post_tags
+
+
+def slugify_text(value: str, max_len: int = 120) -> str:
+    value = (value or "").strip().lower()
+    out = []
+    prev_dash = False
+    for ch in value:
+        if ("a" <= ch <= "z") or ("0" <= ch <= "9"):
+            out.append(ch)
+            prev_dash = False
+            continue
+        if ch in {" ", "-", "_", ".", "/"}:
+            if not prev_dash and out:
+                out.append("-")
+                prev_dash = True
+    slug = "".join(out).strip("-")[:max_len]
+    return slug or "tag"
+
+
+def parse_tags(tag_string: str):
+    raw = [t.strip() for t in (tag_string or "").split(",")]
+    return [t for t in raw if t]
+
+
+def resolve_tags(names):
+    """Devuelve {slug: BlogTag} para `names`, creando los que falten, con un único SELECT."""
+    by_slug = {}
+    for name in names:
+        by_slug.setdefault(slugify_text(name, max_len=80), name)
+    if not by_slug:
+        return {}
+    rows = db.session.execute(
+        select(BlogTag).where(or_(BlogTag.slug.in_(list(by_slug)), BlogTag.name.in_(list(by_slug.values()))))
+    ).scalars().all()
+    existing = {t.slug: t for t in rows}
+    by_name = {t.name: t for t in rows}
+    for slug, name in by_slug.items():
+        if slug in existing:
+            continue
+        tag = by_name.get(name)
+        if tag is None:
+            tag = BlogTag(name=name, slug=slug)
+            db.session.add(tag)
+        existing[slug] = tag
+    return existing
+
+
+def upsert_tags(tag_string: str):
+    names = parse_tags(tag_string)
+    resolved = resolve_tags(names)
+    tags = []
+    for name in names:
+        tag = resolved[slugify_text(name, max_len=80)]
+        if tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+class TagIndex:
+    """Índice ordenado por prefijo sobre BlogTag.name/slug, uno por proceso.
+
+    Los datos se construyen una vez por host y se guardan en la caché compartida (namespace
+    "tags"); un cambio de tag en cualquier worker sube la generación del namespace al hacer
+    commit y el resto reconstruye en cuanto la ve. `max_age` queda para cambios hechos por
+    fuera de la aplicación.
+    """
+
+    namespace = "tags"
+
+    def __init__(self, max_age: float = 60):
+        self.max_age = max_age
+        self._keys = []
+        self._tags = {}
+        self._built_at = None
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def invalidate(self, session=None):
+        self._built_at = None
+        cache.invalidate_on_commit(session, self.namespace)
+
+    def _stale(self) -> bool:
+        if self._built_at is None or time.monotonic() - self._built_at > self.max_age:
+            return True
+        return cache.generation(self.namespace) != self._generation
+
+    def _build(self):
+        rows = db.session.execute(
+            select(BlogTag.id, BlogTag.name, BlogTag.slug, func.count(post_tags.c.post_id))
+            .outerjoin(post_tags, post_tags.c.tag_id == BlogTag.id)
+            .group_by(BlogTag.id, BlogTag.name, BlogTag.slug)
+        ).all()
+        tags = {tag_id: {"id": tag_id, "name": name, "slug": slug, "count": int(count)} for tag_id, name, slug, count in rows}
+        keys = sorted({(name.lower(), tag_id) for tag_id, name, _, _ in rows} | {(slug, tag_id) for tag_id, _, slug, _ in rows})
+        return keys, tags
+
+    def rebuild(self):
+        # La generación se lee antes de construir: si sube a mitad, la siguiente consulta reconstruye.
+        generation = cache.generation(self.namespace)
+        self._keys, self._tags = cache.get_or_set(self.namespace, "index", self._build, ttl=self.max_age)
+        self._generation = generation
+        self._built_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        if not self._stale():
+            return
+        with self._lock:
+            if self._stale():
+                self.rebuild()
+
+    def all(self):
+        self._ensure_fresh()
+        return sorted(self._tags.values(), key=lambda t: t["name"].lower())
+
+    def search(self, prefix: str, limit: int = 10):
+        """Tags cuyo nombre o slug empieza por `prefix`, los más usados primero."""
+        self._ensure_fresh()
+        keys, tags = self._keys, self._tags
+        prefixes = {(prefix or "").strip().lower()}
+        if any(ch.isalnum() for ch in prefix or ""):
+            prefixes.add(slugify_text(prefix, max_len=80))
+        prefixes.discard("")
+        if not prefixes:
+            return []
+        found = set()
+        for p in prefixes:
+            i = bisect_left(keys, (p,))
+            while i < len(keys) and keys[i][0].startswith(p) and len(found) < 200:
+                found.add(keys[i][1])
+                i += 1
+        matches = [tags[tag_id] for tag_id in found if tag_id in tags]
+        matches.sort(key=lambda t: (-t["count"], t["name"].lower()))
+        return matches[:limit]
+
+
+tag_index = TagIndex()
+
+
+def _invalidate_index(mapper, connection, target):
+    tag_index.invalidate(object_session(target))
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(BlogTag, _event_name, _invalidate_index)
+
+
+def merge_tags(source_ids, target_id: int) -> int:
+    """Reasigna los posts de `source_ids` a `target_id` y borra los tags origen. Devuelve los posts afectados."""
+    source_ids = [i for i in set(source_ids) if i != target_id]
+    if not source_ids:
+        return 0
+    # Una sola sentencia reescribe post_tags: INSERT ... SELECT DISTINCT evita duplicar
+    # el enlace cuando un post ya tenía el tag destino o varios tags origen.
+    already_tagged = select(post_tags.c.post_id).where(post_tags.c.tag_id == target_id)
+    result = db.session.execute(
+        insert(post_tags).from_select(
+            ["post_id", "tag_id"],
+            select(post_tags.c.post_id, literal(target_id))
+            .where(post_tags.c.tag_id.in_(source_ids), post_tags.c.post_id.not_in(already_tagged))
+            .distinct(),
+        )
+    )
+    db.session.execute(delete(post_tags).where(post_tags.c.tag_id.in_(source_ids)))
+    db.session.execute(delete(BlogTag).where(BlogTag.id.in_(source_ids)))
+    tag_index.invalidate(db.session)
+    return result.rowcount or 0
+
+
+def rename_tag(tag: BlogTag, new_name: str) -> BlogTag:
+    """Renombra un tag; si el nuevo nombre ya existe como otro tag, fusiona este en aquel."""
+    new_name = (new_name or "").strip()
+    new_slug = slugify_text(new_name, max_len=80)
+    other = db.session.execute(
+        select(BlogTag).where(BlogTag.id != tag.id, or_(BlogTag.slug == new_slug, BlogTag.name == new_name))
+    ).scalars().first()
+    if other is not None:
+        merge_tags([tag.id], other.id)
+        db.session.expunge(tag)
+        return other
+    db.session.execute(update(BlogTag).where(BlogTag.id == tag.id).values(name=new_name, slug=new_slug))
+    tag_index.invalidate(db.session)
+    return tag
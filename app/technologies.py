@@ -0,0 +1,75 @@
+from sqlalchemy import delete, func, insert, select, update
+
+from app.extensions import db
+from app.models import Project, Technology, project_technologies
+from app.tags import slugify_text
+
+
+# Se deletrean para que "C", "C++" y "C#" no acaben en el mismo slug
+_SPELLED = {"+": " plus ", "#": " sharp "}
+
+
+def technology_slug(name: str) -> str:
+    return slugify_text("".join(_SPELLED.get(ch, ch) for ch in (name or "").lower()), max_len=80)
+
+
+def parse_technologies(value: str):
+    """[(slug, nombre)] del texto "Python, Flask, Docker", en su orden y sin repetidos ni vacíos."""
+    found = {}
+    for raw in (value or "").split(","):
+        name = raw.strip()[:64]
+        if name:
+            found.setdefault(technology_slug(name), name)
+    return list(found.items())
+
+
+def refresh_counts():
+    """Recalcula Technology.project_count de todas las tecnologías y borra las que ya no usa ningún proyecto."""
+    used_by = (
+        select(func.count())
+        .select_from(project_technologies)
+        .where(project_technologies.c.technology_id == Technology.id)
+        .scalar_subquery()
+    )
+    db.session.execute(update(Technology).values(project_count=used_by))
+    db.session.execute(delete(Technology).where(Technology.project_count == 0))
+
+
+def sync_technologies(project_ids=None) -> int:
+    """Rehace los enlaces de `project_ids` (todos con None) a partir de Project.technologies.
+
+    Crea las tecnologías que falten y recalcula los contadores; de los ids ya borrados solo
+    quita los enlaces. No hace commit. Devuelve el número de enlaces escritos.
+    """
+    query = select(Project.id, Project.technologies)
+    links = delete(project_technologies)
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        if not project_ids:
+            return 0
+        query = query.where(Project.id.in_(project_ids))
+        links = links.where(project_technologies.c.project_id.in_(project_ids))
+    parsed = {project_id: parse_technologies(value) for project_id, value in db.session.execute(query)}
+
+    names = {}
+    for items in parsed.values():
+        for slug, name in items:
+            names.setdefault(slug, name)
+    ids = {}
+    if names:
+        ids = dict(db.session.execute(select(Technology.slug, Technology.id).where(Technology.slug.in_(list(names)))).all())
+        missing = [{"slug": slug, "name": name} for slug, name in names.items() if slug not in ids]
+        if missing:
+            result = db.session.execute(insert(Technology).returning(Technology.slug, Technology.id), missing)
+            ids.update(dict(result.all()))
+
+    db.session.execute(links)
+    rows = [
+        {"project_id": project_id, "technology_id": ids[slug], "position": position}
+        for project_id, items in parsed.items()
+        for position, (slug, _name) in enumerate(items)
+    ]
+    if rows:
+        db.session.execute(insert(project_technologies), rows)
+    refresh_counts()
+    return len(rows)
@@ -0,0 +1,138 @@
+import json
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+
+from flask import before_render_template, g, has_app_context, request, template_rendered
+from flask_login import current_user
+from sqlalchemy import event
+
+from app.extensions import db
+
+
+logger = logging.getLogger("app.timing")
+
+
+class RequestTimings:
+    __slots__ = ("start", "db_count", "db_ms", "render_ms", "render_start", "io_ms")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_count = 0
+        self.db_ms = 0.0
+        self.render_ms = 0.0
+        self.render_start = None
+        self.io_ms = {}
+
+    def server_timing(self, total_ms: float) -> str:
+        parts = [
+            f'db;dur={self.db_ms:.1f};desc="{self.db_count} queries"',
+            f"render;dur={self.render_ms:.1f}",
+        ]
+        parts += [f"io-{label};dur={ms:.1f}" for label, ms in self.io_ms.items()]
+        parts.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(parts)
+
+
+def _current():
+    if not has_app_context():
+        return None
+    return g.get("_timings")
+
+
+@contextmanager
+def _timed_io(label: str, timings: RequestTimings):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.io_ms[label] = timings.io_ms.get(label, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def timed_io(label: str):
+    """Context manager para medir E/S de ficheros (p. ej. el `stat` del CV). No hace nada si la instrumentación está apagada."""
+    timings = _current()
+    if timings is None:
+        return nullcontext()
+    return _timed_io(label, timings)
+
+
+def _log(payload: dict):
+    logger.warning(json.dumps(payload, default=str))
+
+
+def init_app(app):
+    if not app.config.get("TIMING_ENABLED"):
+        return
+
+    slow_request_ms = float(app.config.get("SLOW_REQUEST_MS") or 0)
+    slow_query_ms = float(app.config.get("SLOW_QUERY_MS") or 0)
+
+    # El inicio va en el contexto de ejecución de cada sentencia y no en la conexión: si la
+    # consulta falla no hay after_cursor_execute, y el contexto se descarta con ella.
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._timing_start = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_timing_start", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        timings = _current()
+        if timings is None:
+            return
+        timings.db_count += 1
+        timings.db_ms += elapsed_ms
+        if slow_query_ms and elapsed_ms >= slow_query_ms:
+            _log({
+                "event": "slow_query",
+                "endpoint": request.endpoint,
+                "duration_ms": round(elapsed_ms, 1),
+                "sql": " ".join(statement.split()),
+            })
+
+    def on_before_render(sender, template, context, **extra):
+        timings = _current()
+        if timings is not None:
+            timings.render_start = time.perf_counter()
+
+    def on_rendered(sender, template, context, **extra):
+        timings = _current()
+        if timings is not None and timings.render_start is not None:
+            timings.render_ms += (time.perf_counter() - timings.render_start) * 1000
+            timings.render_start = None
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    before_render_template.connect(on_before_render, app, weak=False)
+    template_rendered.connect(on_rendered, app, weak=False)
+
+    @app.before_request
+    def _start_timings():
+        g._timings = RequestTimings()
+
+    @app.after_request
+    def _finish_timings(response):
+        timings = g.pop("_timings", None)
+        if timings is None:
+            return response
+        total_ms = (time.perf_counter() - timings.start) * 1000
+        if current_user.is_authenticated:
+            response.headers["Server-Timing"] = timings.server_timing(total_ms)
+        if slow_request_ms and total_ms >= slow_request_ms:
+            _log({
+                "event": "slow_request",
+                "endpoint": request.endpoint,
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "duration_ms": round(total_ms, 1),
+                "db_queries": timings.db_count,
+                "db_ms": round(timings.db_ms, 1),
+                "render_ms": round(timings.render_ms, 1),
+                "io_ms": {k: round(v, 1) for k, v in timings.io_ms.items()},
+            })
+        return response
@@ -0,0 +1,115 @@
+import hashlib
+import threading
+import time
+from itertools import chain
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.extensions import cache, db
+from app.models import BlogPost, BlogTag, Project, ProjectCode, ProjectImage, project_technologies
+
+
+# Huella de cada tipo de contenido: count/max/sum de ids detectan altas y bajas; max(updated_at)
+# (indexado), las ediciones (títulos, descripciones, renombrados de tags). Imágenes, snippets y
+# tecnologías de un proyecto van en sus propias tablas. Los max() son una búsqueda en el índice,
+# pero count() y sum() recorren un índice entero: el coste crece con el archivo. Por eso no se
+# calcula por petición; `ContentVersions` guarda el resultado por proceso (ver más abajo).
+_FINGERPRINTS = {
+    "posts": lambda: select(func.count(BlogPost.id), func.max(BlogPost.id), func.max(BlogPost.updated_at)),
+    "projects": lambda: select(
+        func.count(Project.id),
+        func.max(Project.id),
+        func.sum(Project.id),
+        func.max(Project.created_at),
+        func.max(Project.updated_at),
+        select(func.count(ProjectImage.id)).scalar_subquery(),
+        select(func.max(ProjectImage.id)).scalar_subquery(),
+        select(func.max(ProjectCode.id)).scalar_subquery(),
+        # Cambiar el texto de tecnologías rehace los enlaces (app/technologies.py)
+        select(func.count()).select_from(project_technologies).scalar_subquery(),
+        select(func.sum(project_technologies.c.technology_id)).scalar_subquery(),
+    ),
+    "tags": lambda: select(func.count(BlogTag.id), func.max(BlogTag.id), func.sum(BlogTag.id), func.max(BlogTag.updated_at)),
+}
+
+
+# Tablas que alimentan cada huella: un commit que las toque sube la generación del tipo.
+_TABLE_KINDS = {
+    "blog_posts": ("posts",),
+    "post_tags": ("posts", "tags"),
+    "blog_tags": ("tags",),
+    "projects": ("projects",),
+    "project_images": ("projects",),
+    "project_code": ("projects",),
+    "project_technologies": ("projects",),
+    "technologies": ("projects",),
+}
+
+
+def _namespace(kind: str) -> str:
+    return f"content-{kind}"
+
+
+class ContentVersions:
+    """Huella de cada tipo de contenido, calculada una vez por proceso y reutilizada.
+
+    Se recalcula cuando otro worker (o este) hace commit sobre sus tablas, lo que sube la
+    generación del namespace "content-<tipo>" de la caché compartida, o cada `max_age`
+    segundos para cambios hechos por fuera de la aplicación.
+    """
+
+    def __init__(self, max_age: float = 60):
+        self.max_age = max_age
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind: str) -> str:
+        cached = self._versions.get(kind)
+        # La generación se lee antes de la huella: si sube a mitad, la siguiente petición recalcula.
+        generation = cache.generation(_namespace(kind))
+        if cached is not None and cached[1] == generation and time.monotonic() - cached[2] < self.max_age:
+            return cached[0]
+        row = db.session.execute(_FINGERPRINTS[kind]()).one()
+        version = ",".join("" if v is None else str(v) for v in row)
+        with self._lock:
+            self._versions[kind] = (version, generation, time.monotonic())
+        return version
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+
+content_versions = ContentVersions()
+
+
+def content_version(*kinds: str) -> str:
+    """Versión corta de `kinds` ("posts", "projects", "tags"); cambia cuando cambian sus filas."""
+    parts = [f"{kind}={content_versions.get(kind)}" for kind in kinds]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+def _touch(session, table_name: str):
+    for kind in _TABLE_KINDS.get(table_name, ()):
+        cache.invalidate_on_commit(session, _namespace(kind))
+
+
+def _after_flush(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        _touch(session, getattr(obj, "__tablename__", None))
+
+
+def _do_orm_execute(state):
+    # INSERT/UPDATE/DELETE masivos (importación, tecnologías, renombrado de tags) no pasan por el flush
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        if table is not None:
+            _touch(state.session, table.name)
+
+
+def init_app(app):
+    content_versions.max_age = app.config.get("CONTENT_VERSION_MAX_AGE", 60)
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "do_orm_execute", _do_orm_execute)
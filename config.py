@@ -23,6 +23,13 @@ class Config:
         _database_url = _database_url.replace('postgres://', 'postgresql://', 1)
     SQLALCHEMY_DATABASE_URI = _database_url or 'sqlite:///' + os.path.join(basedir, 'cvweb.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Con Postgres, no dejar workers bloqueados esperando a una base de datos caída (ver sección 12)
+    if SQLALCHEMY_DATABASE_URI.startswith('postgresql'):
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_pre_ping': True,
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT') or 5),
+            'connect_args': {'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT') or 3)},
+        }
 
     # 3. Configuración de Correo Electrónico
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.googlemail.com'
@@ -43,3 +50,70 @@ class Config:
     # 6. Documentos (CV)
     DOCUMENTS_FOLDER = os.environ.get('DOCUMENTS_FOLDER') or os.path.join(os.path.abspath(os.path.dirname(__file__)), 'app/static/documents')
     CV_FILENAME = os.environ.get('CV_FILENAME') or 'cv_angel.pdf'
+
+    # 7. Instrumentación (Server-Timing para admins y log de peticiones/queries lentas)
+    TIMING_ENABLED = _str_to_bool(os.environ.get('TIMING_ENABLED'), False)
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS') or 500)
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS') or 100)
+
+    # 8. Métricas Prometheus (/metrics). Con gunicorn, PROMETHEUS_MULTIPROC_DIR agrega todos los workers.
+    METRICS_ENABLED = _str_to_bool(os.environ.get('METRICS_ENABLED'), True)
+    # Sin login solo para peticiones desde 127.0.0.1/::1 que no pasen por un proxy. Desactivado por
+    # defecto: detrás de un proxy en el mismo host todos los clientes llegan como 127.0.0.1.
+    METRICS_ALLOW_LOCAL = _str_to_bool(os.environ.get('METRICS_ALLOW_LOCAL'), False)
+
+    # 9. Autocompletado de tags (índice en memoria por proceso, invalidado entre workers vía caché compartida)
+    TAG_INDEX_MAX_AGE = int(os.environ.get('TAG_INDEX_MAX_AGE') or 60)
+
+    # 10. Sitemap (cacheado por versión del contenido; cada cuánto se comprueba la versión)
+    SITEMAP_CHECK_SECONDS = int(os.environ.get('SITEMAP_CHECK_SECONDS') or 60)
+    # URL pública canónica (https://ejemplo.com/). Si está, el sitemap se genera siempre con ella
+    # y no con la cabecera Host de cada petición.
+    SITE_URL = os.environ.get('SITE_URL') or None
+
+    # 11. Contadores de visitas (buffer por worker volcado cada N segundos) y ranking de populares
+    PAGEVIEWS_ENABLED = _str_to_bool(os.environ.get('PAGEVIEWS_ENABLED'), True)
+    PAGEVIEWS_FLUSH_SECONDS = int(os.environ.get('PAGEVIEWS_FLUSH_SECONDS') or 5)
+    POPULAR_POSTS_MAX_AGE = int(os.environ.get('POPULAR_POSTS_MAX_AGE') or 300)
+
+    # 12. Modo degradado: última respuesta buena de cada página pública, servida si la BD falla o se pasa del plazo
+    SNAPSHOT_ENABLED = _str_to_bool(os.environ.get('SNAPSHOT_ENABLED'), True)
+    SNAPSHOT_FOLDER = os.environ.get('SNAPSHOT_FOLDER') or os.path.join(basedir, 'snapshots')
+    SNAPSHOT_REFRESH_SECONDS = int(os.environ.get('SNAPSHOT_REFRESH_SECONDS') or 60)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS') or 3000)
+
+    # 13. Redirecciones (tabla `redirects`, mapa en memoria por proceso, invalidado entre workers vía caché compartida)
+    REDIRECTS_MAX_AGE = int(os.environ.get('REDIRECTS_MAX_AGE') or 60)
+    REDIRECTS_CACHE_SECONDS = int(os.environ.get('REDIRECTS_CACHE_SECONDS') or 86400)
+
+    # 14. CSS crítico en línea por plantilla (generado con `python manage.py build_critical_css`); output.css pasa a cargarse async
+    CRITICAL_CSS_ENABLED = _str_to_bool(os.environ.get('CRITICAL_CSS_ENABLED'), True)
+
+    # 15. Caché de fragmentos de plantilla ({% cache %}): LRU por proceso, acotado en entradas y bytes
+    FRAGMENT_CACHE_ENABLED = _str_to_bool(os.environ.get('FRAGMENT_CACHE_ENABLED'), True)
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL') or 300)
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES') or 2000)
+    FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES') or 32 * 1024 * 1024)
+    # Huella del contenido de la que cuelgan las claves: se recalcula tras un commit que toque sus
+    # tablas y, para cambios hechos por fuera de la aplicación, como mucho cada tantos segundos
+    CONTENT_VERSION_MAX_AGE = int(os.environ.get('CONTENT_VERSION_MAX_AGE') or 60)
+
+    # 16. Caché compartida entre workers del mismo host (fichero SQLite en modo WAL; por defecto en instance/)
+    SHARED_CACHE_PATH = os.environ.get('SHARED_CACHE_PATH')
+    SHARED_CACHE_MAX_BYTES = int(os.environ.get('SHARED_CACHE_MAX_BYTES') or 64 * 1024 * 1024)
+    SHARED_CACHE_GENERATION_TTL = float(os.environ.get('SHARED_CACHE_GENERATION_TTL') or 1.0)
+
+    # 17. Perfilador por muestreo bajo demanda (admins: ?_profile=1 o ?_profile_window=<segundos>); pilas en formato collapsed
+    PROFILER_ENABLED = _str_to_bool(os.environ.get('PROFILER_ENABLED'), True)
+    PROFILER_FOLDER = os.environ.get('PROFILER_FOLDER') or os.path.join(basedir, 'profiles')
+    PROFILER_INTERVAL_MS = float(os.environ.get('PROFILER_INTERVAL_MS') or 5)
+    PROFILER_MAX_WINDOW_SECONDS = int(os.environ.get('PROFILER_MAX_WINDOW_SECONDS') or 600)
+
+    # 18. Presupuesto de consultas y detector de N+1 (@query_budget); por defecto solo en debug/testing
+    QUERY_BUDGET_ENABLED = _str_to_bool(os.environ.get('QUERY_BUDGET_ENABLED')) if os.environ.get('QUERY_BUDGET_ENABLED') else None
+    QUERY_BUDGET_MAX_REPEATS = int(os.environ.get('QUERY_BUDGET_MAX_REPEATS') or 5)
+    QUERY_BUDGET_RAISE = _str_to_bool(os.environ.get('QUERY_BUDGET_RAISE'))
+
+    # 19. Renderizado en streaming de las páginas largas (resume, blog, proyectos): <head> primero y luego el body por trozos
+    STREAMED_RENDERING = _str_to_bool(os.environ.get('STREAMED_RENDERING'))
+    STREAMED_CHUNK_BYTES = int(os.environ.get('STREAMED_CHUNK_BYTES') or 16384)
@@ -0,0 +1,25 @@
+import os
+import shutil
+
+# Directorio compartido para que /metrics agregue los contadores de todos los workers.
+# Debe definirse antes de importar prometheus_client.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/cvweb-prometheus")
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    # Vuelca las visitas que el worker aún tenga en memoria.
+    from app.pageviews import view_buffer
+
+    view_buffer.stop()
@@ -1,3 +1,5 @@
+import os
+
 import click
 
 from app import create_app
@@ -17,6 +19,9 @@ def create_db_command():
     app = create_app()
     with app.app_context():
         db.create_all()
+        from app.redirects import seed_legacy_redirects
+        seed_legacy_redirects()
+        db.session.commit()
         click.echo("Tablas creadas correctamente.")
 
 
@@ -89,5 +94,519 @@ def create_admin_command(username, password):
         click.echo(f"Usuario admin {action}: {username}")
 
 
+@cli.command("seed")
+@click.option("--projects", default=50, show_default=True, help="Número de proyectos a generar.")
+@click.option("--posts", default=500, show_default=True, help="Número de posts a generar.")
+@click.option("--tags", default=40, show_default=True, help="Número de tags a generar.")
+@click.option("--images-per-project", default=2, show_default=True, help="Imágenes por proyecto.")
+@click.option("--snippets-per-project", default=2, show_default=True, help="Snippets de código por proyecto.")
+@click.option("--seed", "random_seed", default=42, show_default=True, help="Semilla del generador (misma semilla, mismos datos).")
+@click.option("--no-files", is_flag=True, help="No escribe las imágenes de ejemplo en UPLOAD_FOLDER.")
+@click.option("--reset", is_flag=True, help="Borra antes el contenido generado por un seed anterior.")
+def seed_command(projects, posts, tags, images_per_project, snippets_per_project, random_seed, no_files, reset):
+    """Genera contenido de prueba determinista para benchmarks."""
+    from app.seed import clear_seed_data, seed_content
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        if reset:
+            clear_seed_data()
+        counts = seed_content(
+            projects=projects,
+            posts=posts,
+            tags=tags,
+            seed=random_seed,
+            images_per_project=images_per_project,
+            snippets_per_project=snippets_per_project,
+            write_files=not no_files,
+        )
+        click.echo(f"Seed completado: {counts['projects']} proyectos, {counts['posts']} posts, {counts['tags']} tags.")
+
+
+@cli.command("bench")
+@click.option("--requests", "num_requests", default=200, show_default=True, help="Peticiones por ruta.")
+@click.option("--concurrency", default=4, show_default=True, help="Peticiones simultáneas.")
+@click.option("--warmup", default=5, show_default=True, help="Peticiones de calentamiento por ruta (no se miden).")
+@click.option("--url", "base_url", default=None, help="URL de un servidor en marcha (p. ej. gunicorn). Sin ella se usa el test client.")
+@click.option("--endpoint", "endpoints", multiple=True, help="Limita la medición a estos endpoints (repetible).")
+@click.option("--output", default=None, help="Fichero JSON de resultados. Por defecto bench_results/bench-<fecha>.json.")
+@click.option("--compare", "compare_path", default=None, type=click.Path(exists=True, dir_okay=False), help="Resultados previos con los que comparar el p95.")
+def bench_command(num_requests, concurrency, warmup, base_url, endpoints, output, compare_path):
+    """Mide latencia (p50/p95/p99), throughput y queries por petición de las rutas públicas."""
+    import json
+    from datetime import datetime
+
+    from app.bench import compare_reports, run_benchmark, save_report
+
+    app = create_app()
+    report = run_benchmark(
+        app,
+        requests=num_requests,
+        concurrency=concurrency,
+        warmup=warmup,
+        base_url=base_url,
+        only=set(endpoints) or None,
+    )
+
+    click.echo(f"{'path':<45} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>9} {'queries':>8}")
+    for r in report["results"]:
+        queries = "-" if r["queries_per_request"] is None else r["queries_per_request"]
+        click.echo(f"{r['path'][:45]:<45} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['throughput_rps']:>9} {queries:>8}")
+
+    output = output or os.path.join("bench_results", f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    save_report(report, output)
+    click.echo(f"Resultados guardados en {output}")
+
+    if compare_path:
+        with open(compare_path, encoding="utf-8") as fh:
+            previous = json.load(fh)
+        click.echo("")
+        click.echo(f"{'path':<45} {'p95 antes':>10} {'p95 ahora':>10} {'cambio':>8}")
+        for path, old, new, change in compare_reports(report, previous):
+            click.echo(f"{path[:45]:<45} {old:>10} {new:>10} {change:>7}%")
+
+
+@cli.command("export")
+@click.argument("destination")
+@click.option("--format", "fmt", type=click.Choice(["jsonl", "markdown"]), default="jsonl", show_default=True, help="JSONL (un fichero, '-' para stdout) o Markdown con frontmatter (un directorio).")
+@click.option("--only", type=click.Choice(["posts", "projects"]), multiple=True, help="Exporta solo este tipo de contenido (repetible).")
+@click.option("--media-dir", default=None, help="Copia también las imágenes a este directorio (misma estructura que UPLOAD_FOLDER).")
+@click.option("--workers", default=8, show_default=True, help="Hilos para copiar imágenes.")
+def export_command(destination, fmt, only, media_dir, workers):
+    """Exporta posts y proyectos (con tags, imágenes y código) en streaming."""
+    import sys
+
+    from app.content_io import copy_files, export_jsonl, export_markdown, iter_records, media_jobs
+
+    app = create_app()
+    with app.app_context():
+        jobs = []
+        upload_root = app.config["UPLOAD_FOLDER"]
+
+        def collect_media(records):
+            for record in records:
+                if media_dir:
+                    jobs.extend(media_jobs(record, upload_root, media_dir))
+                yield record
+
+        records = collect_media(iter_records(only or ("posts", "projects")))
+        if fmt == "markdown":
+            count = export_markdown(records, destination)
+        elif destination == "-":
+            count = export_jsonl(records, sys.stdout)
+        else:
+            with open(destination, "w", encoding="utf-8") as fh:
+                count = export_jsonl(records, fh)
+
+        jobs = [job for job in jobs if os.path.exists(job[0])]
+        copied = copy_files(jobs, workers=workers) if jobs else []
+        click.echo(f"Exportados {count} registros y {len(copied)} imágenes.", err=destination == "-")
+
+
+@cli.command("import")
+@click.argument("source", type=click.Path(exists=True))
+@click.option("--media-dir", default=None, type=click.Path(exists=True, file_okay=False), help="Directorio con las imágenes a copiar a UPLOAD_FOLDER.")
+@click.option("--batch-size", default=500, show_default=True, help="Registros por INSERT masivo.")
+@click.option("--workers", default=8, show_default=True, help="Hilos para copiar imágenes.")
+def import_command(source, media_dir, batch_size, workers):
+    """Importa un .jsonl o un directorio de .md en una sola transacción (los slugs existentes se omiten)."""
+    from app.content_io import ContentImportError, import_records, iter_jsonl, iter_markdown_dir
+
+    app = create_app()
+    with app.app_context():
+        records = iter_markdown_dir(source) if os.path.isdir(source) else iter_jsonl(source)
+        try:
+            stats = import_records(records, media_dir=media_dir, batch_size=batch_size, workers=workers)
+        except ContentImportError as e:
+            raise click.ClickException(f"Importación cancelada: {e}")
+        click.echo(
+            f"Importados {stats['posts']} posts y {stats['projects']} proyectos "
+            f"({stats['images']} imágenes, {stats['code']} snippets, {stats['files']} ficheros copiados); "
+            f"{stats['skipped']} omitidos por slug existente."
+        )
+
+
+@cli.command("freeze")
+@click.argument("output_dir", default="build", required=False)
+@click.option("--workers", default=8, show_default=True, help="Hilos de renderizado.")
+@click.option("--full", is_flag=True, help="Ignora el manifiesto y re-renderiza todas las páginas.")
+@click.option("--base-url", default="http://localhost/", show_default=True, help="URL pública del sitio (para enlaces absolutos como los del RSS).")
+def freeze_command(output_dir, workers, full, base_url):
+    """Genera una copia estática del sitio público (incremental desde la última ejecución)."""
+    from app.freeze import freeze
+
+    app = create_app()
+    result = freeze(app, output_dir, workers=workers, full=full, base_url=base_url)
+    click.echo(
+        f"{result['rendered']} páginas renderizadas de {result['total']}, "
+        f"{result['removed']} eliminadas, {result['static_copied']} ficheros estáticos copiados en '{output_dir}'."
+    )
+    for url, status in result["failed"]:
+        click.echo(f"  ERROR {status}: {url}", err=True)
+    if result["failed"]:
+        raise SystemExit(1)
+
+
+@cli.command("related")
+@click.option("--kind", "kinds", multiple=True, type=click.Choice(["post", "project"]), help="Solo este tipo (repetible). Por defecto, ambos.")
+@click.option("--limit", default=4, show_default=True, help="Items relacionados por item.")
+def related_command(kinds, limit):
+    """Recalcula la tabla de posts y proyectos relacionados con todo el corpus.
+
+    El admin la actualiza al guardar con el idf de la última ejecución; esto renueva ese idf
+    (conviene programarlo de vez en cuando, p. ej. a diario).
+    """
+    import time
+    from app.related import rebuild_related
+
+    app = create_app()
+    with app.app_context():
+        for kind in kinds or ("post", "project"):
+            started = time.perf_counter()
+            total = rebuild_related(kind, limit=limit)
+            db.session.commit()
+            click.echo(f"{kind}: {total} items indexados en {time.perf_counter() - started:.2f}s")
+
+
+@cli.command("technologies")
+def technologies_command():
+    """Rellena la tabla de tecnologías y sus enlaces a partir del texto Project.technologies de cada proyecto."""
+    import time
+    from app.models import Technology
+    from app.technologies import sync_technologies
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        links = sync_technologies()
+        db.session.commit()
+        total = db.session.query(Technology).count()
+        click.echo(f"{total} tecnologías, {links} enlaces en {time.perf_counter() - started:.2f}s")
+
+
+@cli.command("import_redirects")
+@click.argument("source", type=click.File("r", encoding="utf-8"))
+def import_redirects_command(source):
+    """Importa redirecciones (`origen destino [código]` o CSV) desde un fichero; '-' lee de stdin."""
+    from app.redirects import import_redirects, parse_redirects
+
+    rows, errors = parse_redirects(source.read())
+    for error in errors:
+        click.echo(f"  ERROR {error}", err=True)
+    if errors:
+        raise SystemExit(1)
+    app = create_app()
+    with app.app_context():
+        result = import_redirects(rows)
+        db.session.commit()
+    click.echo(f"{result['created']} redirecciones creadas, {result['updated']} actualizadas.")
+
+
+def _human_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+@cli.command("gc-uploads")
+@click.option("--delete", "delete_files", is_flag=True, help="Borra los huérfanos. Sin esta opción solo informa.")
+@click.option("--grace-hours", default=24.0, show_default=True, help="No borra huérfanos modificados hace menos de estas horas.")
+@click.option("--workers", default=8, show_default=True, help="Hilos para recorrer los directorios.")
+def gc_uploads_command(delete_files, grace_hours, workers):
+    """Informa del uso de UPLOAD_FOLDER/DOCUMENTS_FOLDER y, con --delete, borra los ficheros que ya no referencia la base de datos."""
+    from app.storage import UnsafeCollection, collect_garbage
+
+    dry_run = not delete_files
+    app = create_app()
+    with app.app_context():
+        try:
+            report = collect_garbage(grace_seconds=grace_hours * 3600, dry_run=dry_run, workers=workers)
+        except UnsafeCollection as e:
+            raise click.ClickException(str(e))
+
+    total_reclaimed = 0
+    for name, stats in report.items():
+        click.echo(
+            f"{name} ({stats['directory']}): {stats['files']} ficheros, {_human_bytes(stats['bytes'])}; "
+            f"{stats['referenced']} referenciados, {stats['orphans']} huérfanos ({_human_bytes(stats['orphan_bytes'])}), "
+            f"{stats['in_grace']} en periodo de gracia."
+        )
+        if stats["missing_files"]:
+            click.echo(f"  {stats['missing_files']} referencias en la base de datos sin fichero.")
+        if dry_run:
+            click.echo(f"  Se liberarían {_human_bytes(stats['reclaimable_bytes'])} ({stats['reclaimable']} ficheros).")
+        else:
+            click.echo(f"  Borrados {stats['deleted']} ficheros, {_human_bytes(stats['reclaimed_bytes'])} liberados.")
+            total_reclaimed += stats["reclaimed_bytes"]
+        for error in stats["errors"]:
+            click.echo(f"  ERROR {error}", err=True)
+    if not dry_run:
+        click.echo(f"Total liberado: {_human_bytes(total_reclaimed)}.")
+    if any(stats["errors"] for stats in report.values()):
+        raise SystemExit(1)
+
+
+@cli.command("build_icons")
+@click.option(
+    "--source",
+    default=os.path.join("node_modules", "bootstrap-icons", "font"),
+    show_default=True,
+    type=click.Path(exists=True, file_okay=False),
+    help="Carpeta font/ de bootstrap-icons (bootstrap-icons.css y fonts/).",
+)
+def build_icons_command(source):
+    """Genera en app/static el subconjunto de bootstrap-icons que usan las plantillas (requiere fonttools y brotli)."""
+    try:
+        from app.assets import build_icon_subset
+        import fontTools  # noqa: F401
+        import brotli  # noqa: F401
+    except ImportError:
+        raise click.ClickException("Instala las dependencias de build: pip install fonttools brotli")
+
+    app = create_app()
+    template_dirs = [app.jinja_loader.searchpath[0]] + [
+        os.path.join(bp.root_path, bp.template_folder) for bp in app.blueprints.values() if bp.template_folder
+    ]
+    result = build_icon_subset(source, app.static_folder, template_dirs)
+    click.echo(f"{result['icons']} iconos, fuente de {result['font_bytes']} bytes.")
+    if result["unknown"]:
+        click.echo(f"  Clases sin icono en bootstrap-icons: {', '.join(result['unknown'])}", err=True)
+
+
+
+@cli.command("build_critical_css")
+@click.option("--fold-chars", default=4000, show_default=True, help="Caracteres del bloque content de cada plantilla que se consideran visibles sin scroll.")
+def build_critical_css_command(fold_chars):
+    """Extrae de css/output.css el CSS crítico de cada página a css/critical/ (se inserta en línea desde base.html)."""
+    from app.assets import build_critical_css
+
+    app = create_app()
+    template_dirs = [app.jinja_loader.searchpath[0]] + [
+        os.path.join(bp.root_path, bp.template_folder) for bp in app.blueprints.values() if bp.template_folder
+    ]
+    click.echo(f"{'plantilla':<28} {'crítico':>9} {'output.css':>11}")
+    for name, critical, full in build_critical_css(app.static_folder, template_dirs, fold_chars=fold_chars):
+        click.echo(f"{name:<28} {_human_bytes(critical):>9} {_human_bytes(full):>11}")
+
+
+@cli.command("bench_css")
+@click.option("--endpoint", "endpoints", multiple=True, help="Limita la medición a estos endpoints (repetible).")
+@click.option("--output", default=None, help="Fichero JSON de resultados. Por defecto bench_results/css-<fecha>.json.")
+def bench_css_command(endpoints, output):
+    """Bytes bloqueantes hasta el primer render (HTML + CSS, con gzip) de cada página, con y sin CSS crítico."""
+    from datetime import datetime
+
+    from app.bench import first_render_bytes, save_report
+
+    app = create_app()
+    report = first_render_bytes(app, only=set(endpoints) or None)
+
+    click.echo(f"{'path':<45} {'antes':>9} {'ahora':>9} {'gzip antes':>11} {'gzip ahora':>11} {'ahorro':>7}")
+    for r in report["results"]:
+        click.echo(
+            f"{r['path'][:45]:<45} {_human_bytes(r['before_bytes']):>9} {_human_bytes(r['after_bytes']):>9} "
+            f"{_human_bytes(r['before_gzip']):>11} {_human_bytes(r['after_gzip']):>11} {r['saved_gzip_pct']:>6}%"
+        )
+
+    output = output or os.path.join("bench_results", f"css-{datetime.now():%Y%m%d-%H%M%S}.json")
+    save_report(report, output)
+    click.echo(f"Resultados guardados en {output}")
+
+
+@cli.command("bench_cost")
+@click.option("--requests", "n_requests", default=40, show_default=True, help="Peticiones por ruta (se toma la mediana).")
+@click.option("--endpoint", "endpoints", multiple=True, help="Limita la medición a estos endpoints (repetible).")
+@click.option("--output", default=None, help="Fichero JSON de resultados. Por defecto bench_results/cost-<fecha>.json.")
+@click.option("--compare", "compare_path", default=None, type=click.Path(exists=True, dir_okay=False), help="Resultados previos con los que comparar.")
+def bench_cost_command(n_requests, endpoints, output, compare_path):
+    """CPU y memoria asignada por petición de los listados públicos (blog, proyectos, CV, RSS)."""
+    import json
+    from datetime import datetime
+
+    from app.bench import compare_costs, request_cost, save_report
+
+    app = create_app()
+    report = request_cost(app, requests=n_requests, only=set(endpoints) or None)
+
+    click.echo(f"{'path':<45} {'CPU':>9} {'pico mem':>10}")
+    for r in report["results"]:
+        click.echo(f"{r['path'][:45]:<45} {r['cpu_ms']:>7}ms {r['peak_kb']:>7} KB")
+
+    output = output or os.path.join("bench_results", f"cost-{datetime.now():%Y%m%d-%H%M%S}.json")
+    save_report(report, output)
+    click.echo(f"Resultados guardados en {output}")
+
+    if compare_path:
+        with open(compare_path, "r", encoding="utf-8") as fh:
+            previous = json.load(fh)
+        click.echo(f"\n{'path':<45} {'CPU antes':>10} {'CPU ahora':>10} {'mem antes':>10} {'mem ahora':>10}")
+        for path, cpu_old, cpu_new, mem_old, mem_new in compare_costs(report, previous):
+            click.echo(f"{path[:45]:<45} {cpu_old:>8}ms {cpu_new:>8}ms {mem_old:>7} KB {mem_new:>7} KB")
+
+
+@cli.command("bench_ttfb")
+@click.option("--requests", "n_requests", default=20, show_default=True, help="Peticiones por ruta y modo (se toma la mediana).")
+@click.option("--endpoint", "endpoints", multiple=True, help="Limita la medición a estos endpoints (repetible).")
+@click.option("--output", default=None, help="Fichero JSON de resultados. Por defecto bench_results/ttfb-<fecha>.json.")
+def bench_ttfb_command(n_requests, endpoints, output):
+    """TTFB y tiempo total de las páginas largas, renderizadas de una vez frente a en streaming."""
+    from datetime import datetime
+
+    from app.bench import save_report, ttfb
+
+    app = create_app()
+    report = ttfb(app, requests=n_requests, only=set(endpoints) or None)
+
+    click.echo(f"{'path':<40} {'TTFB antes':>10} {'TTFB ahora':>10} {'total antes':>11} {'total ahora':>11} {'ahorro':>7}")
+    for r in report["results"]:
+        click.echo(
+            f"{r['path'][:40]:<40} {r['buffered_ttfb_ms']:>8}ms {r['streamed_ttfb_ms']:>8}ms "
+            f"{r['buffered_total_ms']:>9}ms {r['streamed_total_ms']:>9}ms {r['ttfb_saved_pct']:>6}%"
+        )
+
+    output = output or os.path.join("bench_results", f"ttfb-{datetime.now():%Y%m%d-%H%M%S}.json")
+    save_report(report, output)
+    click.echo(f"Resultados guardados en {output}")
+
+
+@cli.command("bench_cache")
+@click.option("--ops", default=20000, show_default=True, help="Operaciones por medición (y por proceso en la concurrente).")
+@click.option("--value-bytes", default=1024, show_default=True, help="Tamaño de cada valor.")
+@click.option("--processes", default=4, show_default=True, help="Procesos leyendo a la vez de la caché compartida.")
+@click.option("--output", default=None, help="Fichero JSON de resultados. Por defecto bench_results/cache-<fecha>.json.")
+def bench_cache_command(ops, value_bytes, processes, output):
+    """Rendimiento de la caché compartida entre workers (SQLite WAL) frente a un dict por proceso."""
+    import tempfile
+    from datetime import datetime
+
+    from app.bench import cache_throughput, save_report
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report = cache_throughput(os.path.join(tmp, "bench.sqlite"), ops=ops, value_bytes=value_bytes, processes=processes)
+
+    click.echo(f"{'backend':<8} {'operación':<11} {'procesos':>8} {'ops/s':>11} {'µs/op':>8}")
+    for r in report["results"]:
+        click.echo(f"{r['backend']:<8} {r['operation']:<11} {r['processes']:>8} {r['ops_per_sec']:>11} {r['us_per_op']:>8}")
+
+    output = output or os.path.join("bench_results", f"cache-{datetime.now():%Y%m%d-%H%M%S}.json")
+    save_report(report, output)
+    click.echo(f"Resultados guardados en {output}")
+
+
+@cli.command("cache_clear")
+def cache_clear_command():
+    """Vacía la caché compartida entre workers (todas las entradas y generaciones)."""
+    from app.extensions import cache
+
+    create_app()
+    cache.clear()
+    click.echo(f"Caché compartida vaciada ({cache.path}).")
+
+
+@cli.command("profiles")
+@click.option("--clear", is_flag=True, help="Borra todos los perfiles guardados.")
+def profiles_command(clear):
+    """Lista los perfiles (pilas collapsed por día y endpoint) guardados por el perfilador bajo demanda."""
+    from datetime import datetime
+
+    from app.profiler import list_profiles
+
+    app = create_app()
+    folder = app.config["PROFILER_FOLDER"]
+    rows = list_profiles(folder)
+    if clear:
+        for name, *_ in rows:
+            os.remove(os.path.join(folder, name))
+        click.echo(f"{len(rows)} perfiles borrados de {folder}.")
+        return
+    if not rows:
+        click.echo(f"No hay perfiles en {folder}.")
+        return
+    click.echo(f"{'fichero':<48} {'muestras':>9} {'tamaño':>9}  modificado")
+    for name, size, samples, mtime in rows:
+        click.echo(f"{name:<48} {samples:>9} {_human_bytes(size):>9}  {datetime.fromtimestamp(mtime):%Y-%m-%d %H:%M}")
+
+
+@cli.command("profile_download")
+@click.argument("name")
+@click.argument("destination", default=".", required=False)
+def profile_download_command(name, destination):
+    """Copia un perfil a DESTINATION (fichero o directorio; '-' para la salida estándar).
+
+    Se abre con flamegraph.pl, speedscope o cualquier visor de pilas collapsed.
+    """
+    import shutil
+
+    app = create_app()
+    folder = app.config["PROFILER_FOLDER"]
+    name = name if name.endswith(".folded") else name + ".folded"
+    source = os.path.join(folder, os.path.basename(name))
+    if not os.path.isfile(source):
+        raise click.ClickException(f"No existe el perfil '{name}' en {folder}; ver: python manage.py profiles")
+    if destination == "-":
+        with open(source, "r", encoding="utf-8") as fh:
+            click.echo(fh.read(), nl=False)
+        return
+    if os.path.isdir(destination):
+        destination = os.path.join(destination, os.path.basename(source))
+    shutil.copyfile(source, destination)
+    click.echo(f"Perfil copiado en {destination}")
+
+
+@cli.command("explain")
+@click.option("--endpoint", "endpoints", multiple=True, help="Solo las consultas de estos endpoints (repetible).")
+@click.option("--plans", is_flag=True, help="Muestra el plan completo de cada consulta, no solo las marcadas.")
+@click.option("--migration", is_flag=True, help="Genera una migración de Alembic con los índices recomendados.")
+@click.option("-m", "--message", default="indexes for hot routes", show_default=True, help="Mensaje de la migración.")
+@click.option("--directory", default="migrations", show_default=True, help="Directorio de migraciones.")
+def explain_command(endpoints, plans, migration, message, directory):
+    """Reproduce las consultas de las rutas calientes, las pasa por EXPLAIN y recomienda índices compuestos."""
+    from app.explain import HOT_ROUTES, capture_queries, explain_queries, index_name, recommend_indexes
+
+    app = create_app()
+    routes = [r for r in HOT_ROUTES if not endpoints or r[0] in endpoints]
+    queries = capture_queries(app, routes)
+    with app.app_context():
+        try:
+            explain_queries(queries)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        for query in queries:
+            flagged = query.scans or query.sorts or query.automatic_indexes
+            if not flagged and not plans:
+                continue
+            click.echo(f"{query.endpoint} {query.path}")
+            click.echo(f"  {' '.join(query.sql.split())[:160]}")
+            for line in query.plan:
+                click.echo(f"    {line}")
+            if query.scans:
+                click.echo(f"  ! scan completo: {', '.join(query.scans)}")
+            if query.sorts:
+                click.echo(f"  ! sort: {'; '.join(query.sorts)}")
+            for table, columns in query.automatic_indexes:
+                click.echo(f"  ! índice temporal: {table} ({', '.join(columns)})")
+
+        recommendations = recommend_indexes(queries)
+        click.echo(f"{len(queries)} consultas, {sum(1 for q in queries if q.scans or q.sorts or q.automatic_indexes)} con scan completo, sort o índice temporal.")
+        if not recommendations:
+            click.echo("Sin índices que recomendar.")
+            return
+        click.echo("Índices recomendados:")
+        for (table, columns), reasons in sorted(recommendations.items()):
+            origins = ", ".join(sorted({q.endpoint for q in reasons}))
+            click.echo(f"  {index_name(table, columns)} ON {table} ({', '.join(columns)})  <- {origins}")
+
+        if migration:
+            if not os.path.isdir(directory):
+                raise click.ClickException(f"No existe '{directory}'; ejecuta primero: python manage.py db_init")
+            from app.explain import write_migration
+
+            path = write_migration(recommendations, directory, message)
+            click.echo(f"Migración generada en {path}")
+
+
 if __name__ == "__main__":
     cli()